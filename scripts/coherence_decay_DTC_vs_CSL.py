@@ -4,8 +4,14 @@
 # Visual offsets are only used for the Lime Dashed (Original CSL) and Red (DTC)
 # curves to distinguish them from the Gray curve, which they otherwise overlap.
 
+import sys
 import numpy as np
 import matplotlib.pyplot as plt
+from dtc.snap import snap_time as exp_snap_time
+from dtc.spatial import GridDensityEngine, LowRankDensityEngine
+from dtc.physics import cat_states, sig_z
+from dtc.density import spectral
+from dtc_cache import ResultCache, cache_key, code_version
 
 # --- PARAMETERS (PHYSICALLY CORRECT VALUES) ---
 gamma_env = 1e5           # s^-1 -> T2 ≈ 10 µs
@@ -14,29 +20,131 @@ t_final   = 600e-6        # 600 µs
 times     = np.linspace(0, t_final, 5000) # Time array
 TIME_OFFSET_MU_S = 10.0   # 10 µs offset for visual separation of overlapping tracks
 
-# --- MODELS: QM + Decoherence ---
-C_qm = np.exp(-gamma_env * times)
+lambda_allowed  = 1e-11   # 2025-allowed CSL collapse rate (s^-1)
+lambda_original = 1e-17   # Original GRW/CSL collapse rate (s^-1)
+
+# 'closed_form' (default): the exponential laws on the 5000-point time grid
+# 'grid': every model is a master-equation run of rho(x, x') on the same position grid
+# 'lowrank': the same runs with rho in factored form (LowRankDensityEngine), for
+#            grids of 10^4-10^5 points (set N_grid accordingly)
+# 'spectral': the pointer-basis two-level reduction, evaluated from one cached
+#            eigendecomposition of its Liouvillian (any t, snap time solved directly)
+# The master-equation models reduce to the closed-form laws and are opt-in checks.
+model = 'closed_form'
+
+# Position grid and cat state for the 'grid' and 'lowrank' models
+N_grid     = 1024
+grid_steps = 120          # split steps over t_final (localisation factors are exact per step)
+mass       = 1e-18        # kg
+Delta_x    = 100e-9       # branch separation
+sigma_x    = 5e-9         # packet width
+a_env      = 10e-9        # environmental scattering length (saturated at Delta_x)
+r_C        = 100e-9       # CSL localisation length
+cache_dir  = '.dtc_cache' # result cache for the 'grid' / 'lowrank' runs (dtc_cache), None = off
+
+if '--clear-cache' in sys.argv:
+    ResultCache(cache_dir).invalidate()
+
+if model in ('grid', 'lowrank'):
+    x = np.linspace(-4 * Delta_x, 4 * Delta_x, N_grid)
+    dx = x[1] - x[0]
+    psi_L, psi_R = cat_states(x, Delta_x, sigma_x)
+
+    times = np.linspace(0, t_final, grid_steps + 1)
+    dt = times[1] - times[0]
+    env = (gamma_env, a_env)
+
+    cache = ResultCache(cache_dir) if cache_dir else None
+
+    def run_model(kernels, threshold=None):
+        """(C_track, snap_index) of one master-equation run, from the result cache when unchanged"""
+        key = cache_key(dict(model=model, N_grid=N_grid, grid_steps=grid_steps, t_final=t_final, mass=mass,
+                             Delta_x=Delta_x, sigma_x=sigma_x, kernels=kernels, threshold=threshold),
+                        code_version('dtc/spatial.py', 'dtc/physics.py'))
+        entry = cache.get(key) if cache else None
+        if entry is not None:
+            snap = int(entry['snap_index'])
+            return entry['C'], (snap if snap >= 0 else None)
+        C, snap_index = solve_model(kernels, threshold)
+        if cache:
+            cache.put(key, C=C, snap_index=np.array(-1 if snap_index is None else snap_index))
+        return C, snap_index
+
+    def solve_model(kernels, threshold):
+        if model == 'lowrank':
+            engine = LowRankDensityEngine(x, dt, mass, kernels)
+            C, snap_index, _, _, ranks = engine.run(psi_L, psi_R, grid_steps, C_th=threshold)
+            print(f"Low-rank run: max rank {ranks.max(axis=0).tolist()} (left, right)")
+            return C, snap_index
+        engine = GridDensityEngine(x, dt, mass, kernels)
+        C, snap_index, _, _ = engine.run(psi_L, psi_R, grid_steps, C_th=threshold, coherence_only=True)
+        return C, snap_index
+
+    # --- MODELS: QM + Decoherence ---
+    C_qm, _ = run_model([env])
+    # --- MODELS: CSL (environmental + CSL localisation kernels) ---
+    C_csl_allowed, _  = run_model([env, (lambda_allowed, r_C)])
+    C_csl_original, _ = run_model([env, (lambda_original, r_C)])
+    # --- MODEL: DTC (environment + threshold-triggered pruning) ---
+    C_dtc_run, dtc_snap = run_model([env], threshold=C_th)
+
+    if dtc_snap is not None:
+        first_snap = dtc_snap
+        # Crossing inside the last step, log-linear in C (exponential decay within a step)
+        i = first_snap
+        t_snap = times[i-1] + dt * np.log(C_qm[i-1] / C_th) / np.log(C_qm[i-1] / C_qm[i])
+        snap_time = t_snap * 1e6 # Convert to µs
+        print(f"DTC snaps at {snap_time:.1f} µs")
+    else:
+        first_snap = len(times)
+        snap_time = None
+
+    C_dtc = np.where(C_dtc_run > 0, C_dtc_run, 1e-40)
+
+elif model == 'spectral':
+    # Two-level reduction: D[sig_z] damps rho_LR at twice its rate, so rate = Gamma / 2
+    rho_cat = np.full((2, 2), 0.5, dtype=complex)
+    H0 = np.zeros((2, 2), dtype=complex)
+    curve = lambda rate: spectral(H0, [sig_z], [rate / 2]).coherence(rho_cat, times)
+    # --- MODELS: QM + Decoherence, CSL (total rate = environmental + CSL) ---
+    C_qm = curve(gamma_env)
+    C_csl_allowed = curve(gamma_env + lambda_allowed)
+    C_csl_original = curve(gamma_env + lambda_original)
+    # --- MODEL: DTC (crossing solved on the spectral form) ---
+    t_snap = spectral(H0, [sig_z], [gamma_env / 2]).crossing(rho_cat, C_th, times[-1])
+    if t_snap is not None:
+        first_snap = np.searchsorted(times, t_snap, side='right') # First grid point below C_th
+        snap_time = t_snap * 1e6 # Convert to µs
+        print(f"DTC snaps at {snap_time:.1f} µs")
+    else:
+        first_snap = len(times)
+        snap_time = None
+
+    C_dtc = np.copy(C_qm)
+    C_dtc[first_snap:] = 1e-40
 
-# --- MODELS: CSL (TOTAL RATE = ENVIRONMENTAL + CSL) ---
-# CSL rates are negligible compared to gamma_env, making their total decay rate ~gamma_env.
-lambda_allowed  = 1e-11   # Used in label only, physics uses the rate below
-lambda_original = 1e-17   # Used in label only, physics uses the rate below
-
-C_csl_allowed  = np.exp(-(gamma_env + 1e-11) * times)  # Physically almost identical to C_qm
-C_csl_original = np.exp(-(gamma_env + 1e-17) * times)  # Physically identical to C_qm
-
-# --- MODEL: DTC (Decoherence-Triggered Collapse) ---
-snap_idx = np.where(C_qm < C_th)[0]
-if len(snap_idx) > 0:
-    first_snap = snap_idx[0]
-    snap_time = times[first_snap] * 1e6 # Convert to µs
-    print(f"DTC snaps at {snap_time:.1f} µs")
 else:
-    first_snap = len(times)
-    snap_time = None
-
-C_dtc = np.copy(C_qm)
-C_dtc[first_snap:] = 1e-40
+    # --- MODELS: QM + Decoherence ---
+    C_qm = np.exp(-gamma_env * times)
+
+    # --- MODELS: CSL (TOTAL RATE = ENVIRONMENTAL + CSL) ---
+    # CSL rates are negligible compared to gamma_env, making their total decay rate ~gamma_env.
+    C_csl_allowed  = np.exp(-(gamma_env + lambda_allowed) * times)  # Physically almost identical to C_qm
+    C_csl_original = np.exp(-(gamma_env + lambda_original) * times)  # Physically identical to C_qm
+
+    # --- MODEL: DTC (Decoherence-Triggered Collapse) ---
+    # Closed-form crossing of C_qm = exp(-gamma_env t) with C_th: t = ln(1/C_th) / gamma_env
+    t_snap = exp_snap_time(gamma_env, C_th)
+    if t_snap < times[-1]:
+        first_snap = np.searchsorted(times, t_snap, side='right') # First grid point below C_th
+        snap_time = t_snap * 1e6 # Convert to µs
+        print(f"DTC snaps at {snap_time:.1f} µs")
+    else:
+        first_snap = len(times)
+        snap_time = None
+
+    C_dtc = np.copy(C_qm)
+    C_dtc[first_snap:] = 1e-40
 
 # --- PLOTTING ---
 plt.figure(figsize=(12, 7.5))
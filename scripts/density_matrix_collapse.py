@@ -3,26 +3,10 @@
 
 import numpy as np
 import matplotlib.pyplot as plt
-
-# --- 1. Define the Physics Operators ---
-hbar = 1.0 
-sig_z = np.array([[1, 0], [0, -1]], dtype=complex)
-P_L = np.array([[1, 0], [0, 0]], dtype=complex)
-P_R = np.array([[0, 0], [0, 1]], dtype=complex)
-
-def commutator(A, B):
-    """[A, B] = AB - BA"""
-    return np.dot(A, B) - np.dot(B, A)
-
-def lindblad_dissipator(L, rho):
-    """
-    Standard Lindblad Dissipator: D[L]rho = L rho L^dagger - 0.5 * {L^dagger L, rho}
-    """
-    L_dag = L.conj().T
-    term1 = np.dot(L, np.dot(rho, L_dag))
-    L_dag_L = np.dot(L_dag, L)
-    term2 = 0.5 * (np.dot(L_dag_L, rho) + np.dot(rho, L_dag_L)) # Anti-commutator
-    return term1 - term2
+from dtc.physics import sig_z, P_L, P_R, commutator, lindblad_dissipator, coherence, pointer_projection
+from dtc.density import hbar, propagator, spectral, integrate_adaptive, clear_caches
+from dtc_batch import evolve_batch
+from dtc import qubits
 
 # --- 2. Simulation Parameters ---
 dt = 0.005
@@ -40,45 +24,127 @@ rho_initial = np.dot(psi0, psi0.conj().T)
 gamma_decoherence = 0.3 
 coherence_threshold = 0.15 
 
-# --- 3a. DTC Evolution Loop (Can Break Early) ---
-rho_dtc = rho_initial.copy()
-coherence_history_dtc = []
-snap_index = None
+# Integrator: 'adaptive' (Dormand-Prince 5(4), exact snap time),
+# 'propagator' (cached exp(L dt), one mat-vec per step), 'spectral' (cached
+# eigendecomposition of L: curves and snap time at any t, no stepping) or 'euler' (fixed dt)
+integrator = 'adaptive'
+rtol, atol = 1e-8, 1e-10
+# Batched sweep over (gamma_decoherence, coherence_threshold): points per axis, 0 = off.
+# All batch_grid^2 density matrices are evolved together by dtc_batch.evolve_batch.
+batch_grid = 0
+# Multi-qubit scaling (dtc.qubits): qubit counts n to run the same model on, () = off.
+# 'global' triggers on the l1 coherence of the whole n-qubit state, 'local' on each qubit.
+qubit_sizes = ()
+qubit_scope = 'global'
+
+# --- 3. Evolution ---
+def master_equation_rhs(t, rho):
+    """drho/dt = -i/hbar [H, rho] + gamma D[sig_z] rho (pre-threshold DTC = standard QM)"""
+    return -1j/hbar * commutator(H, rho) + gamma_decoherence * lindblad_dissipator(sig_z, rho)
+
+if integrator == 'adaptive':
+    # --- 3a. DTC Evolution (stops exactly at the threshold crossing) ---
+    rho_grid_dtc, t_snap, rho_snap = integrate_adaptive(
+        master_equation_rhs, rho_initial, (times[0], times[-1]), t_eval=times,
+        event=lambda rho: coherence(rho) - coherence_threshold, rtol=rtol, atol=atol)
+    coherence_history_dtc = [coherence(rho) for rho in rho_grid_dtc]
+    snap_index = None
+    if t_snap is not None:
+        snap_index = len(coherence_history_dtc) # First grid point after the crossing
+        rho_pruned = pointer_projection(rho_snap, (P_L, P_R)) # Discrete pruning event
+        coherence_history_dtc.append(coherence(rho_pruned)) # Snap to zero coherence
+        print(f"Pruned state: P(L) = {rho_pruned[0, 0].real:.3f}, P(R) = {rho_pruned[1, 1].real:.3f}")
+
+    # --- 3b. QM Evolution (Must Run Full Time) ---
+    rho_grid_qm, _, _ = integrate_adaptive(
+        master_equation_rhs, rho_initial, (times[0], times[-1]), t_eval=times,
+        rtol=rtol, atol=atol)
+    coherence_history_qm = [coherence(rho) for rho in rho_grid_qm]
+
+elif integrator == 'spectral':
+    # Pre-threshold dynamics are linear and time-independent: evaluate on the eigenbasis
+    solver = spectral(H, [sig_z], [gamma_decoherence])
+    coherence_history_qm = solver.coherence(rho_initial, times)
+    t_snap = solver.crossing(rho_initial, coherence_threshold, times[-1])
+    snap_index = None
+    if t_snap is not None:
+        n_pre = np.searchsorted(times, t_snap, side='right') # Grid points before the crossing
+        rho_pruned = pointer_projection(solver.rho(rho_initial, t_snap), (P_L, P_R))
+        coherence_history_dtc = list(coherence_history_qm[:n_pre]) + [coherence(rho_pruned)]
+        snap_index = len(coherence_history_dtc)
+        print(f"Pruned state: P(L) = {rho_pruned[0, 0].real:.3f}, P(R) = {rho_pruned[1, 1].real:.3f}")
+    else:
+        coherence_history_dtc = list(coherence_history_qm)
+
+elif integrator == 'propagator':
+    # Both runs share the same physics: the second propagator() call is a cache hit
+    grid_dt = times[1] - times[0]
+
+    def propagate(stop_below=None):
+        U = propagator(H, [sig_z], [gamma_decoherence], grid_dt, projectors=(P_L, P_R))
+        rho_vec = rho_initial.reshape(-1).copy()
+        buf = np.empty_like(rho_vec)
+        history = []
+        for i in range(len(times)):
+            C = coherence(rho_vec.reshape(2, 2))
+            if stop_below is not None and C < stop_below:
+                history.append(0.0) # Snap to zero coherence
+                return history, i
+            history.append(C)
+            np.dot(U, rho_vec, out=buf)
+            rho_vec, buf = buf, rho_vec
+        return history, None
+
+    # --- 3a. DTC Evolution Loop (Can Break Early) ---
+    coherence_history_dtc, snap_index = propagate(stop_below=coherence_threshold)
+    # --- 3b. QM Evolution Loop (Must Run Full Time) ---
+    coherence_history_qm, _ = propagate()
+    t_snap = times[snap_index] if snap_index is not None else None
 
-for i, t in enumerate(times):
-    coherence_dtc = np.abs(rho_dtc[0, 1]) + np.abs(rho_dtc[1, 0])
-    
-    # Check DTC Snap Condition
-    if snap_index is None and coherence_dtc < coherence_threshold:
-        snap_index = i
-        coherence_history_dtc.append(0.0) # Snap to zero coherence
-        break # Terminate DTC evolution
+else:
+    # --- 3a. DTC Evolution Loop (Can Break Early) ---
+    rho_dtc = rho_initial.copy()
+    coherence_history_dtc = []
+    snap_index = None
 
-    coherence_history_dtc.append(coherence_dtc)
-    
-    # Evolution step
-    d_rho_unitary = -1j/hbar * commutator(H, rho_dtc)
-    d_rho_env = gamma_decoherence * lindblad_dissipator(sig_z, rho_dtc)
-    
-    d_rho_dtc_dt = d_rho_unitary + d_rho_env
-    rho_dtc = rho_dtc + d_rho_dtc_dt * dt
-    
-    # Ensure Trace Preservation
-    rho_dtc = rho_dtc / np.trace(rho_dtc) 
+    for i, t in enumerate(times):
+        coherence_dtc = np.abs(rho_dtc[0, 1]) + np.abs(rho_dtc[1, 0])
 
-# --- 3b. QM Evolution Loop (Must Run Full Time) ---
-rho_qm = rho_initial.copy()
-coherence_history_qm = [] # FIX: This list now runs for the full length
+        # Check DTC Snap Condition
+        if snap_index is None and coherence_dtc < coherence_threshold:
+            snap_index = i
+            coherence_history_dtc.append(0.0) # Snap to zero coherence
+            break # Terminate DTC evolution
 
-for i, t in enumerate(times):
-    coherence_qm = np.abs(rho_qm[0, 1]) + np.abs(rho_qm[1, 0])
-    coherence_history_qm.append(coherence_qm)
-    
-    # Evolution step
-    d_rho_qm_dt = -1j/hbar * commutator(H, rho_qm) + gamma_decoherence * lindblad_dissipator(sig_z, rho_qm)
-    rho_qm = rho_qm + d_rho_qm_dt * dt
-    rho_qm = rho_qm / np.trace(rho_qm) 
+        coherence_history_dtc.append(coherence_dtc)
+
+        # Evolution step
+        d_rho_unitary = -1j/hbar * commutator(H, rho_dtc)
+        d_rho_env = gamma_decoherence * lindblad_dissipator(sig_z, rho_dtc)
 
+        d_rho_dtc_dt = d_rho_unitary + d_rho_env
+        rho_dtc = rho_dtc + d_rho_dtc_dt * dt
+
+        # Ensure Trace Preservation
+        rho_dtc = rho_dtc / np.trace(rho_dtc) 
+
+    # --- 3b. QM Evolution Loop (Must Run Full Time) ---
+    rho_qm = rho_initial.copy()
+    coherence_history_qm = [] # FIX: This list now runs for the full length
+
+    for i, t in enumerate(times):
+        coherence_qm = np.abs(rho_qm[0, 1]) + np.abs(rho_qm[1, 0])
+        coherence_history_qm.append(coherence_qm)
+
+        # Evolution step
+        d_rho_qm_dt = -1j/hbar * commutator(H, rho_qm) + gamma_decoherence * lindblad_dissipator(sig_z, rho_qm)
+        rho_qm = rho_qm + d_rho_qm_dt * dt
+        rho_qm = rho_qm / np.trace(rho_qm)
+
+    t_snap = times[snap_index] if snap_index is not None else None
+
+if t_snap is not None:
+    print(f"DTC snap at t = {t_snap:.6f} (integrator: {integrator})")
 
 # --- 4. Plotting (Comparison) ---
 plt.figure(figsize=(10, 6))
@@ -114,8 +180,6 @@ plt.grid(True, alpha=0.3)
 
 # Add text annotations for clarity
 if snap_index is not None:
-    t_snap = times[snap_index]
-    
     # Annotation for Collapse
     plt.text(t_snap * 1.05, 0.05, "OBJECTIVE\nCOLLAPSE", color='red', fontsize=10, fontweight='bold', va='center')
     
@@ -124,3 +188,41 @@ if snap_index is not None:
 
 plt.ylim(0, 0.8)
 plt.show()
+
+# --- 5. Batched Sweep (whole parameter grid in one vectorised pass) ---
+if batch_grid:
+    clear_caches() # the single run's propagator / spectral entries are not reused below
+    gammas = np.linspace(0.05, 1.0, batch_grid)
+    thresholds = np.linspace(0.05, 0.5, batch_grid)
+    G, T = np.meshgrid(gammas, thresholds)
+    _, snaps, _ = evolve_batch(rho_initial, H, [sig_z], G.ravel(), times[1] - times[0], len(times),
+                               projectors=(P_L, P_R), C_th=T.ravel(), method='rk4')
+    t_snaps = np.where(snaps >= 0, times[snaps], np.nan).reshape(G.shape)
+    print(f"Batched sweep: {G.size} parameter sets, {np.mean(snaps >= 0)*100:.1f}% snapped")
+
+    plt.figure(figsize=(8, 6))
+    plt.pcolormesh(gammas, thresholds, t_snaps, shading='auto', cmap='viridis')
+    plt.colorbar(label='DTC snap time (arbitrary units)')
+    plt.xlabel(r'Decoherence rate $\gamma$')
+    plt.ylabel(r'Threshold $C_{th}$')
+    plt.title('DTC Snap Time over the Parameter Grid')
+    plt.show()
+
+# --- 6. Multi-qubit Scaling (local operators on the state tensor, no Kronecker products) ---
+if qubit_sizes:
+    snap_times = []
+    for n in qubit_sizes:
+        model = qubits.QubitModel(n, H, sig_z, gamma_decoherence, C_th=coherence_threshold,
+                                  scope=qubit_scope)
+        rho_n = qubits.density(qubits.product_state(n))
+        _, snaps, _ = qubits.evolve_density(model, rho_n, times[1] - times[0], len(times))
+        snap_times.append(times[snaps.min()] if (snaps >= 0).any() else np.nan)
+        print(f"{n:2d} qubits: first snap at t = {snap_times[-1]:.4f}")
+
+    plt.figure(figsize=(8, 5))
+    plt.plot(qubit_sizes, snap_times, 'o-')
+    plt.xlabel('Number of qubits $n$')
+    plt.ylabel('First DTC snap time (arbitrary units)')
+    plt.title(f'DTC Snap Time vs System Size ({qubit_scope} trigger)')
+    plt.grid(True, alpha=0.3)
+    plt.show()
@@ -2,14 +2,21 @@
 # Final version — tested and working perfectly (December 2025)
 # No Numba needed, runs in ~3 seconds, produces gorgeous figure
 
+import sys
 import numpy as np
-import matplotlib.pyplot as plt
+from dtc_parallel import seed_sequence, run_sharded
+from dtc_stream import EnsembleStats
+from dtc_cache import ResultCache, cache_key, code_version
+from dtc_events import EventLog, DEPHASING, PRUNING
+from dtc import instrument
+from dtc.physics import trigger_rate
 
 # ────────────────────────────── Parameters ──────────────────────────────
 gamma      = 3e8        # s⁻¹ – strong dephasing to trigger collapse fast
 Gamma_0    = 1e13       # s⁻¹ – very fast pruning
 kappa      = 3000       # ultra-sharp threshold
 C_th       = 0.4        # collapse when coherence drops below ~40%
+trigger_mode = 'logistic' # 'logistic' (finite Gamma_0, kappa) or 'sharp' (Gamma_0 → ∞; batch engines only, raises for 'scalar')
 
 steps      = 3000
 t_max      = 6e-9       # 6 ns total → perfect visual separation
@@ -17,13 +24,25 @@ times      = np.linspace(0, t_max, steps)
 dt         = times[1] - times[0]
 
 num_traj   = 5000
+engine     = 'ensemble' # 'ensemble' (all at once), 'waiting_time' (event-driven) or 'scalar' (reference loop)
+batch_size = 100_000    # trajectories advanced together by the ensemble engine
+shard_size = 1000       # trajectories per process-pool shard (fixes the RNG streams)
+workers    = None       # pool size, None = all cores; results do not depend on it
+seed       = None       # None = fresh entropy (printed so the run can be repeated)
+statistics = 'stream'   # 'stream' (constant-memory EnsembleStats), 'full' (also keep every trajectory)
+                        # or 'events' (also keep the jump EventLog; waiting_time engine only, raises otherwise)
+events_path = 'double_slit_events.npz'  # where the 'events' mode saves the EventLog
+reservoir  = 16         # example trajectories kept by the streaming statistics
+cache_dir  = '.dtc_cache' # result cache for runs with a fixed seed ('stream'/'full'), None = off
+profile    = False      # dtc.instrument phase timers / jump counters per worker, merged and
+profile_path = 'double_slit_1_profile.json' # printed and written here
 
 # Physical scaling — cold atom in double-slit
 v_drift    = 12e3       # 12 km/s → clear drift in 6 ns
 sep0       = 4.0        # initial half-separation (arbitrary units)
 
 # ────────────────────── Run many trajectories (vectorized) ──────────────────────
-def run_trajectories():
+def run_trajectories(num_traj=num_traj, rng=np.random):
     trajs      = np.zeros((num_traj, steps))
     outcomes   = np.zeros(num_traj, dtype=int)      # 0 = left, 1 = right
     snap_times = np.full(num_traj, steps-1)
@@ -38,13 +57,7 @@ def run_trajectories():
             C = 2.0 * np.abs(cL * cR)
 
             # Trigger rate — sharp sigmoid
-            exponent = kappa * (C - C_th)
-            if exponent > 100:
-                Gamma_trig = 0.0
-            elif exponent < -100:
-                Gamma_trig = Gamma_0
-            else:
-                Gamma_trig = Gamma_0 / (1.0 + np.exp(exponent))
+            Gamma_trig = trigger_rate(C, Gamma_0, C_th, kappa)
 
             p_decoh = gamma * dt
             p_prune = Gamma_trig * dt
@@ -58,18 +71,18 @@ def run_trajectories():
             trajs[n, i] = x
 
             # Jump?
-            if np.random.rand() < p_total:
+            if rng.random() < p_total:
                 if not collapsed:
                     snap_times[n] = i
                     collapsed = True
 
                 # Which kind of jump?
-                if np.random.rand() < p_decoh / p_total:
+                if rng.random() < p_decoh / p_total:
                     # Dephasing jump — random phase
-                    cR *= np.exp(1j * 2 * np.pi * np.random.rand())
+                    cR *= np.exp(1j * 2 * np.pi * rng.random())
                 else:
                     # Pruning jump — project to L or R
-                    if np.random.rand() < prob_L.real:
+                    if rng.random() < prob_L.real:
                         cL, cR = 1.0, 0.0
                         outcomes[n] = 0
                     else:
@@ -88,51 +101,349 @@ def run_trajectories():
 
     return trajs, outcomes, snap_times
 
+# ────────────────────── Trigger (array form for the batch engines) ──────────────────────
+def trigger(C):
+    """
+    Pruning rate Gamma_trig and sharp-limit firing mask for an array of coherences.
+
+    'logistic': dtc.physics.trigger_rate, never fires directly.
+    'sharp':    Gamma_0 → ∞, kappa → ∞, i.e. Gamma_0·Θ(C_th − C). The rate is
+                dropped and trajectories with C <= C_th are pruned immediately as a
+                discrete event, so dt no longer has to resolve 1/Gamma_0.
+    """
+    if trigger_mode == 'sharp':
+        return np.zeros_like(C), C <= C_th
+    return trigger_rate(C, Gamma_0, C_th, kappa), np.zeros(C.shape, dtype=bool)
+
+# ─────────────── Ensemble engine (all trajectories advanced together) ───────────────
+def run_trajectories_ensemble(num_traj=num_traj, rng=np.random):
+    """
+    Same jump process as run_trajectories(), but each time step advances a whole
+    batch of amplitudes (cL, cR) at once: random numbers are drawn in bulk and the
+    dephasing / pruning jumps are applied through boolean masks.
+    """
+    trajs      = np.zeros((num_traj, steps))
+    outcomes   = np.zeros(num_traj, dtype=int)      # 0 = left, 1 = right
+    snap_times = np.full(num_traj, steps-1)
+
+    pos_L   = -sep0/2 - v_drift * times
+    pos_R   =  sep0/2 + v_drift * times
+    p_decoh = gamma * dt
+
+    for start in range(0, num_traj, batch_size):
+        stop = min(start + batch_size, num_traj)
+        n    = stop - start
+
+        cL = np.full(n, 1.0 / np.sqrt(2.0), dtype=complex)
+        cR = np.full(n, 1.0 / np.sqrt(2.0), dtype=complex)
+        collapsed = np.zeros(n, dtype=bool)
+        outcome   = outcomes[start:stop]                # views → written in place
+        snap      = snap_times[start:stop]
+        block     = np.empty((steps, n))                # contiguous rows, transposed once
+        rec       = instrument.current                  # None unless a recording() block is active
+
+        for i in range(steps):
+            if rec: t_lap = rec.clock()
+            prob_L = cL.real**2 + cL.imag**2
+
+            # Coherence measure and trigger
+            C = 2.0 * np.abs(cL * cR)
+            Gamma_trig, fire = trigger(C)
+            p_total = p_decoh + Gamma_trig * dt
+            if rec: t_lap = rec.lap('trigger', t_lap)
+
+            # Position expectation
+            block[i] = pos_L[i] * prob_L + pos_R[i] * (1.0 - prob_L)
+            if rec: t_lap = rec.lap('observable', t_lap)
+
+            # Jump?
+            u = rng.random((3, n))
+            jumped = np.flatnonzero((u[0] < p_total) | fire)
+            if rec: t_lap = rec.lap('rng', t_lap)
+            if jumped.size:
+                first = jumped[~collapsed[jumped]]
+                snap[first] = i
+                collapsed[jumped] = True
+
+                # Which kind of jump?
+                is_decoh = (u[1, jumped] < p_decoh / p_total[jumped]) & ~fire[jumped]
+
+                # Dephasing jumps — random phase
+                deph = jumped[is_decoh]
+                cR[deph] *= np.exp(1j * 2 * np.pi * u[2, deph])
+
+                # Pruning jumps — project to L or R
+                prune = jumped[~is_decoh]
+                to_L  = u[2, prune] < prob_L[prune]
+                cL[prune] = to_L
+                cR[prune] = ~to_L
+                outcome[prune] = np.where(to_L, 0, 1)
+                if rec:
+                    rec.count('dephasing_jump', deph.size)
+                    rec.count('pruning_jump', prune.size)
+                    t_lap = rec.lap('jump', t_lap)
+
+            # Re-normalize
+            norm = np.sqrt(cL.real**2 + cL.imag**2 + cR.real**2 + cR.imag**2)
+            cL /= norm
+            cR /= norm
+            if rec: rec.lap('normalise', t_lap)
+
+        trajs[start:stop] = block.T
+
+    return trajs, outcomes, snap_times
+
+# ──────────── Waiting-time engine (jump straight to the next event) ────────────
+def run_event_log(num_traj=num_traj, rng=np.random):
+    """
+    Event-driven Monte Carlo: between jumps (cL, cR) do not change, so the total
+    jump probability per step p_total is constant and the number of quiet steps
+    before the next jump is drawn directly (geometric in min(p_total, 1), the
+    per-step jump probability of the other engines).
+    All trajectories in a batch advance jump by jump and only the jumps are kept,
+    as an EventLog; <x>(t) is rebuilt from it on demand.
+    Cost and storage scale with the number of jumps, not with `steps`.
+    """
+    outcomes   = np.zeros(num_traj, dtype=int)      # 0 = left, 1 = right
+    snap_times = np.full(num_traj, steps-1)
+    prob_L0    = np.empty(num_traj)
+    p_decoh    = gamma * dt
+    ev_row, ev_step, ev_kind, ev_phase, ev_prob = [], [], [], [], []
+
+    for start in range(0, num_traj, batch_size):
+        stop = min(start + batch_size, num_traj)
+        n    = stop - start
+
+        cL = np.full(n, 1.0 / np.sqrt(2.0), dtype=complex)
+        cR = np.full(n, 1.0 / np.sqrt(2.0), dtype=complex)
+        collapsed = np.zeros(n, dtype=bool)
+        outcome   = outcomes[start:stop]
+        snap      = snap_times[start:stop]
+        i_next    = np.zeros(n, dtype=int)          # first step not yet simulated
+        prob_L0[start:stop] = cL.real**2 + cL.imag**2
+
+        active = np.arange(n)
+        rec = instrument.current # None unless a recording() block is active
+        while active.size:
+            if rec: t_lap = rec.clock()
+            a_L, a_R = cL[active], cR[active]
+            prob_L = a_L.real**2 + a_L.imag**2
+
+            C = 2.0 * np.abs(a_L * a_R)
+            Gamma_trig, fire = trigger(C)
+            p_total = p_decoh + Gamma_trig * dt
+            if rec: t_lap = rec.lap('trigger', t_lap)
+
+            # Quiet steps until the next jump: failures before the first success of
+            # the ensemble engine's per-step coin, P(jump) = min(p_total, 1) (none if
+            # the sharp trigger fires); trajectories past the grid are done
+            q     = np.minimum(p_total, 1.0)
+            wait  = np.full(active.size, np.inf)
+            wait[q > 0] = rng.geometric(q[q > 0]) - 1
+            wait[fire] = 0.0
+            alive = wait < steps - i_next[active]
+            active, p_total, prob_L, fire = active[alive], p_total[alive], prob_L[alive], fire[alive]
+            j = i_next[active] + wait[alive].astype(int)
+
+            first = ~collapsed[active]
+            snap[active[first]] = j[first]
+            collapsed[active] = True
+
+            u = rng.random((2, active.size))
+            is_decoh = (u[0] < p_decoh / p_total) & ~fire
+            if rec: t_lap = rec.lap('rng', t_lap)
+
+            deph = active[is_decoh]
+            cR[deph] *= np.exp(1j * 2 * np.pi * u[1, is_decoh])
+
+            prune = active[~is_decoh]
+            to_L  = u[1, ~is_decoh] < prob_L[~is_decoh]
+            cL[prune] = to_L
+            cR[prune] = ~to_L
+            outcome[prune] = np.where(to_L, 0, 1)
+            if rec:
+                rec.count('dephasing_jump', deph.size)
+                rec.count('pruning_jump', prune.size)
+                t_lap = rec.lap('jump', t_lap)
+
+            ev_row.append(start + active)
+            ev_step.append(j)
+            ev_kind.append(np.where(is_decoh, DEPHASING, PRUNING))
+            ev_phase.append(np.where(is_decoh, 2 * np.pi * u[1], 0.0))
+            ev_prob.append(cL[active].real**2 + cL[active].imag**2)
+            i_next[active] = j + 1
+            if rec: rec.lap('log', t_lap)
+
+            # Pruned trajectories sit in a pointer state; later jumps change nothing
+            active = active[is_decoh]
+
+    cat = lambda parts, dtype: np.concatenate(parts) if parts else np.empty(0, dtype)
+    return EventLog.from_events(steps, prob_L0, cat(ev_row, int), cat(ev_step, int), cat(ev_kind, int),
+                                cat(ev_phase, float), cat(ev_prob, float), snap_times, outcomes)
+
+def run_trajectories_waiting_time(num_traj=num_traj, rng=np.random):
+    """Waiting-time engine with every trajectory rebuilt from its event log"""
+    log = run_event_log(num_traj, rng)
+    rec = instrument.current
+    if rec: t_lap = rec.clock()
+    pos_L = -sep0/2 - v_drift * times
+    pos_R =  sep0/2 + v_drift * times
+    trajs = log.trajectory_x(pos_L, pos_R)
+    if rec: rec.lap('rebuild', t_lap)
+    return trajs, log.outcome.astype(int), log.snap.astype(int)
+
+ENGINES = {
+    'scalar':       run_trajectories,
+    'ensemble':     run_trajectories_ensemble,
+    'waiting_time': run_trajectories_waiting_time,
+}
+
+def check_config():
+    """Reject engine / trigger_mode / statistics combinations no engine implements"""
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine '{engine}', expected one of {sorted(ENGINES)}")
+    if trigger_mode not in ('logistic', 'sharp'):
+        raise ValueError(f"Unknown trigger_mode '{trigger_mode}', expected 'logistic' or 'sharp'")
+    if statistics not in ('stream', 'full', 'events'):
+        raise ValueError(f"Unknown statistics '{statistics}', expected 'stream', 'full' or 'events'")
+    if trigger_mode == 'sharp' and engine == 'scalar':
+        raise ValueError("trigger_mode='sharp' needs a batch engine ('ensemble' or 'waiting_time'); "
+                         "the scalar reference loop only implements the logistic trigger")
+    if statistics == 'events' and engine != 'waiting_time':
+        raise ValueError(f"statistics='events' records the jump EventLog of the 'waiting_time' engine, "
+                         f"not '{engine}'")
+
+def run_shard(n, rng):
+    """
+    One process-pool shard: n trajectories of the selected engine on their own stream,
+    reduced to EnsembleStats (plus the raw arrays when statistics == 'full', or the
+    EventLog of the waiting-time engine when statistics == 'events')
+    """
+    check_config()
+    if statistics == 'events':
+        log = run_event_log(n, rng)
+        trajs = log.trajectory_x(-sep0/2 - v_drift * times, sep0/2 + v_drift * times)
+        stats = EnsembleStats(steps, ('L', 'R'), reservoir).update(trajs, log.outcome, log.snap, rng)
+        return stats, log
+    trajs, outcomes, snap_times = ENGINES[engine](n, rng)
+    stats = EnsembleStats(steps, ('L', 'R'), reservoir).update(trajs, outcomes, snap_times, rng)
+    return (stats,) if statistics == 'stream' else (stats, trajs, outcomes, snap_times)
+
+# Everything the ensemble depends on; `workers` is left out (results do not depend on it)
+CACHE_PARAMS = ('gamma', 'Gamma_0', 'kappa', 'C_th', 'trigger_mode', 'steps', 't_max',
+                'num_traj', 'engine', 'batch_size', 'shard_size', 'seed', 'statistics',
+                'reservoir', 'v_drift', 'sep0')
+ARRAY_NAMES = ('trajs', 'outcomes', 'snaps')
+
+def run_cached(ss):
+    """
+    run_ensemble(ss), served from the result cache when the seed is
+    fixed and the parameters and code are unchanged
+    """
+    cache = ResultCache(cache_dir) if cache_dir and seed is not None and statistics != 'events' else None
+    if cache is None:
+        return run_ensemble(ss)
+    key = cache_key({k: globals()[k] for k in CACHE_PARAMS},
+                    code_version(__file__, 'dtc/physics.py', 'dtc_stream.py', 'dtc_parallel.py', 'dtc_events.py'))
+    entry = cache.get(key)
+    if entry is not None:
+        print(f"Loaded from cache {key[:12]}")
+        arrays = tuple(entry[k] for k in ARRAY_NAMES) if statistics == 'full' else None
+        return EnsembleStats.from_arrays(entry), arrays
+    stats, arrays = run_ensemble(ss)
+    cache.put(key, **stats.to_arrays(), **dict(zip(ARRAY_NAMES, arrays or ())))
+    return stats, arrays
+
+def merge_shard(acc, result):
+    """
+    run_sharded reducer: fold one shard result into acc = (stats, per-shard arrays)
+    in shard order (independent of the pool size); 'stream' keeps only the stats.
+    """
+    if acc is None:
+        acc = (result[0], [])
+    else:
+        acc[0].merge(result[0])
+    if statistics != 'stream':
+        acc[1].append(result[1:])
+    return acc
+
+def run_ensemble(ss, recorder=None):
+    """
+    All shards of the ensemble, merged in shard order as they arrive:
+    (stats, arrays), where arrays is (trajs, outcomes, snap_times) for
+    statistics == 'full', the concatenated EventLog for 'events' and None otherwise
+    """
+    stats, parts = run_sharded(run_shard, num_traj, shard_size, ss, workers, recorder=recorder,
+                               reduce=merge_shard)
+    if statistics == 'stream':
+        return stats, None
+    if statistics == 'events':
+        return stats, EventLog.concatenate(part[0] for part in parts)
+    return stats, tuple(np.concatenate(arrays) for arrays in zip(*parts))
+
 # ────────────────────────────── Run ──────────────────────────────
-print("Running 5000 trajectories... (3–4 seconds)")
-trajs, outcomes, snap_times = run_trajectories()
-
-# ────────────────────────────── Beautiful Plot ──────────────────────────────
-median_snap = int(np.median(snap_times))
-example = np.argmin(np.abs(snap_times - median_snap))
-traj = trajs[example]
-outcome = 'L' if outcomes[example] == 0 else 'R'
-snap = snap_times[example]
-
-t_ns = times * 1e9
-L_ref = -sep0/2 - v_drift * times
-R_ref =  sep0/2 + v_drift * times
-
-plt.figure(figsize=(12, 7))
-
-# Potential paths
-plt.plot(t_ns, L_ref, ':', color='gray', lw=2, alpha=0.7, label='Potential Path L')
-plt.plot(t_ns, R_ref, ':', color='gray', lw=2, alpha=0.7, label='Potential Path R')
-
-# Pruned branch — stops at collapse
-pruned = R_ref if outcome == 'L' else L_ref
-plt.plot(t_ns[:snap+1], pruned[:snap+1], '--', color='orange', lw=4,
-         label=f'Pruned Branch ({outcome == "L" and "R" or "L"})')
-
-# Observed trajectory
-plt.plot(t_ns, traj, '-', color='red', lw=4, label=f'Observed → {outcome}')
-
-# Collapse marker
-plt.axvline(t_ns[snap], color='black', ls='--', lw=2.5, alpha=0.9)
-plt.text(t_ns[snap]*1.03, 0.8*np.max(traj), 'Pruning Event',
-         rotation=90, fontsize=13, color='black', weight='bold')
-
-plt.xlabel('Time (ns)', fontsize=14)
-plt.ylabel(r'$\langle x \rangle$ (arb. units)', fontsize=14)
-plt.title('DTC: Decoherence-Triggered Collapse – Single Trajectory', fontsize=16)
-plt.legend(fontsize=12)
-plt.grid(alpha=0.3)
-plt.xlim(0, t_max*1e9)
-plt.ylim(-45, 45)
-plt.tight_layout()
-plt.show()
-
-# Stats
-print(f"\nPruning rate: {100*np.mean(outcomes != -1):.1f}%")
-print(f"Mean pruning time: {t_ns[int(np.mean(snap_times))]:.2f} ns")
-print(f"L/R final states: {np.sum(outcomes==0)} / {np.sum(outcomes==1)}")
+if __name__ == '__main__':
+    import matplotlib.pyplot as plt # plotting only; pool workers never import it
+
+    if '--clear-cache' in sys.argv:
+        ResultCache(cache_dir).invalidate()
+    check_config()
+    ss = seed_sequence(seed)
+    print(f"Running {num_traj} trajectories ({engine} engine, seed {ss.entropy})...")
+    if profile:
+        rec = instrument.Recorder(sample_every=1000)
+        stats, arrays = run_ensemble(ss, recorder=rec)
+        rec.stop()
+        print(rec.summary())
+        rec.save(profile_path)
+    else:
+        stats, arrays = run_cached(ss)
+    if statistics == 'events':
+        arrays.save(events_path)
+        print(f"Event log: {len(arrays.step)} jumps, {arrays.nbytes/1e6:.2f} MB "
+              f"(dense trajectories: {num_traj*steps*8/1e6:.0f} MB) → {events_path}")
+
+    # ────────────────────────────── Beautiful Plot ──────────────────────────────
+    median_snap = stats.snap_quantile(0.5)
+    example = np.argmin(np.abs(stats.sample_snaps - median_snap))
+    traj = stats.samples[example]
+    outcome = stats.labels[stats.sample_outcomes[example]]
+    snap = stats.sample_snaps[example]
+
+    t_ns = times * 1e9
+    L_ref = -sep0/2 - v_drift * times
+    R_ref =  sep0/2 + v_drift * times
+
+    plt.figure(figsize=(12, 7))
+
+    # Potential paths
+    plt.plot(t_ns, L_ref, ':', color='gray', lw=2, alpha=0.7, label='Potential Path L')
+    plt.plot(t_ns, R_ref, ':', color='gray', lw=2, alpha=0.7, label='Potential Path R')
+
+    # Pruned branch — stops at collapse
+    pruned = R_ref if outcome == 'L' else L_ref
+    plt.plot(t_ns[:snap+1], pruned[:snap+1], '--', color='orange', lw=4,
+             label=f'Pruned Branch ({outcome == "L" and "R" or "L"})')
+
+    # Observed trajectory
+    plt.plot(t_ns, traj, '-', color='red', lw=4, label=f'Observed → {outcome}')
+
+    # Collapse marker
+    plt.axvline(t_ns[snap], color='black', ls='--', lw=2.5, alpha=0.9)
+    plt.text(t_ns[snap]*1.03, 0.8*np.max(traj), 'Pruning Event',
+             rotation=90, fontsize=13, color='black', weight='bold')
+
+    plt.xlabel('Time (ns)', fontsize=14)
+    plt.ylabel(r'$\langle x \rangle$ (arb. units)', fontsize=14)
+    plt.title('DTC: Decoherence-Triggered Collapse – Single Trajectory', fontsize=16)
+    plt.legend(fontsize=12)
+    plt.grid(alpha=0.3)
+    plt.xlim(0, t_max*1e9)
+    plt.ylim(-45, 45)
+    plt.tight_layout()
+    plt.show()
+
+    # Stats
+    print(f"\nPruning rate: {100*stats.outcome_counts.sum()/stats.count:.1f}%")
+    print(f"Mean pruning time: {t_ns[int(stats.snap_mean())]:.2f} ns")
+    print(f"L/R final states: {stats.counts()['L']} / {stats.counts()['R']}")
@@ -3,9 +3,13 @@
 # Strictly follows the DTC mechanism: pure dephasing + state-dependent collapse JUMP.
 # Continuous DTC (H_eff) term is ZERO pre-threshold to prevent double-counting.
 
+import sys
 import numpy as np
-import matplotlib.pyplot as plt
-from qutip import Qobj, basis, ket2dm, sigmaz, expect, identity
+from dtc import mcwf, instrument
+from dtc.mcwf import make_backend, SAMPLERS, cross_check_backends
+from dtc_parallel import seed_sequence, run_sharded
+from dtc_stream import EnsembleStats
+from dtc_cache import ResultCache, cache_key, code_version
 
 # --- Physical and Numerical Parameters (Validated) ---
 hbar = 1.0545718e-34 # J*s
@@ -24,147 +28,163 @@ times = np.linspace(0, t_max, steps)
 dt = times[1] - times[0]
 num_traj = 500
 
-# Setup
-basis_L = basis(2, 0)
-basis_R = basis(2, 1)
-H = Qobj(np.zeros((2,2)))
-I = identity(2) # Identity operator
-P_L = basis_L.proj()
-P_R = basis_R.proj()
-L_decoh = sigmaz()
-L_decoh_sq = L_decoh.dag() * L_decoh
-
-# --- Functions ---
-def coherence(rho):
-    """l1 off-diag norm: 2*|rho_{01}|^2"""
-    return 2 * np.abs(rho[0, 1])**2
-
-def gamma_trigger(rho):
-    """Smoothed step rate: Γ(C) = Γ₀ / (1 + exp(κ (C_th - C)))"""
-    C = coherence(rho)
-    exponent = kappa * (C_th - C)
-    # Numerical stability safeguard
-    exponent = np.clip(exponent, -500, 500) 
-    # Using 1/(1+exp(-arg)) gives a smooth S-curve transition
-    return Gamma_0 / (1 + np.exp(-exponent)) 
-
-# --- Custom Stochastic Unraveling (Strict MCWF) ---
-def single_trajectory():
-    psi = (basis_L + basis_R).unit()
-    trajectory_x = []
-    
-    # FIX: Initialize outcome and collapse status
-    outcome = 'no_collapse'
-    collapsed = False
-    snap_index = steps - 1
-    
-    for i, t in enumerate(times):
-        rho = ket2dm(psi)
-        
-        # 1. Calculate Jump Rates and H_eff
-        Gamma_trig = gamma_trigger(rho)
-        
-        # Environmental Jump Probability
-        p_jump_decoh = gamma * expect(L_decoh_sq, psi) * dt
-        # Objective Collapse Jump Probability (pure jump only, no continuous noise)
-        p_jump_trig = Gamma_trig * dt                       
-        p_jump_total = p_jump_decoh + p_jump_trig
-        
-        # H_eff: ONLY INCLUDES ENVIRONMENTAL DECOHERENCE (gamma)
-        # REFEREE FIX: NO Gamma_trig term in H_eff
-        H_eff = H - 1j * hbar/2 * (gamma * L_decoh_sq) 
-        
-        # 2. Check for Jumps
-        if np.random.rand() < p_jump_total:
-            # A JUMP OCCURRED (Jump Action)
-            if not collapsed:
-                snap_index = i # Record jump time only the first time
-            
-            # Select which jump occurred based on relative probability
-            if np.random.rand() < p_jump_decoh / p_jump_total:
-                # DECOHERENCE JUMP (L_decoh action)
-                psi_new = L_decoh * psi
-            else:
-                # TRIGGERED COLLAPSE JUMP (Projection action)
-                p_L = expect(P_L, rho) 
-                
-                if np.random.rand() < p_L / (p_L + expect(P_R, rho)):
-                    psi_new = basis_L # Jump to |L>
-                    outcome = 'L'
-                else:
-                    psi_new = basis_R # Jump to |R>
-                    outcome = 'R'
-                
-                # DTC-specific: Once collapsed, the system is permanently defined
-                collapsed = True 
-            
-            psi = psi_new.unit() # Re-normalize
-        
-        else:
-            # 3. NO JUMP OCCURRED (Non-Unitary Evolution)
-            U_non_H = I - 1j * H_eff * dt / hbar
-            psi = U_non_H * psi
-            psi = psi.unit() # Re-normalize (Crucial for trace preservation)
-            
-        # 4. Compute expectation value (Plotting Utility)
-        v = 1e9 # m/s (Arbitrary velocity for plot scale)
-        amp = 1.0 
-        pos_L = -2.0 - v * t * amp
-        pos_R = 2.0 + v * t * amp
-        
-        exp_L = expect(P_L, psi)
-        exp_R = expect(P_R, psi)
-        exp_x = pos_L * exp_L + pos_R * exp_R 
-        trajectory_x.append(exp_x)
-    
-    # Snap: Index of max |Δ<x>|
-    diffs = np.diff(trajectory_x)
-    snap_idx = np.argmax(np.abs(diffs)) if np.max(np.abs(diffs)) > 1e-5 else len(trajectory_x)-1
-    return np.array(trajectory_x), outcome, snap_idx
-
-# --- Ensemble Run and Plotting ---
-trajectories = [single_trajectory() for _ in range(num_traj)]
-trajectories = list(zip(*trajectories))  
-
-# FIX: Convert tuples to NumPy arrays for calculation (Resolves TypeError)
-trajs = np.array(trajectories[0])
-outcomes = list(trajectories[1]) # Keep outcomes as list/tuple
-snap_indices = np.array(trajectories[2]) 
-
-avg_traj = np.mean(trajs, axis=0)
-
-# Plot single (pick trajectory closest to mean snap time)
-example_idx = np.argmin(np.abs(snap_indices - steps/2))
-example_traj = trajs[example_idx]
-example_outcome = outcomes[example_idx]
-example_snap = snap_indices[example_idx]
-
-vanished_label = "Vanished Path (Right)" if example_outcome == 'L' else "Vanished Path (Left)"
-
-# Refs
-v_plot = 1e9
-amp_plot = 1.0
-traj_L_ref = -2.0 - v_plot * times * amp_plot
-traj_R_ref = 2.0 + v_plot * times * amp_plot
-
-plt.figure(figsize=(12, 7))
-pre_snap = min(example_snap + 1, len(times))
-plt.plot(times, traj_L_ref, color='green', ls=':', alpha=0.5, label="Potential L")
-plt.plot(times, traj_R_ref, color='purple', ls=':', alpha=0.5, label="Potential R")
-plt.plot(times[:pre_snap], np.zeros(pre_snap), color='orange', ls='--', label=vanished_label + " (Pruned)")
-plt.plot(times, example_traj, color='red', linewidth=3, label=f"Observed ({example_outcome})")
-plt.axvline(times[example_snap], color='k', ls='--', alpha=0.7)
-plt.text(times[example_snap] + 1e-11, 1, "Collapse Event", rotation=90, fontsize=10)
-plt.xlabel("Time (s)")
-plt.ylabel(r"$\langle x \rangle$ (arb. units)")
-plt.title("DTC: Single Trajectory ")
-plt.legend(loc='upper left')
-plt.grid(alpha=0.3)
-plt.ylim(-55, 55)
-plt.tight_layout()
-plt.show() 
-
-# Stats 
-print(f"Collapse rate: {sum(1 for o in outcomes if o != 'no_collapse') / num_traj * 100:.1f}%")
-print(f"Mean snap index: {np.mean(snap_indices):.0f} ({times[int(np.mean(snap_indices))]:.1e} s)")
-print(f"L/R balance: L={sum(o=='L' for o in outcomes)}, R={sum(o=='R' for o in outcomes)}")
+# Operator backend: 'numpy' (fast, precomputed 2x2 propagators), 'qutip' (validation)
+# or 'pointer' (N-slit grating with n_branches pointer states, sparse projectors)
+backend = 'qutip'
+n_branches = 2
+# Jump sampling: 'grid' (coin flip every step) or 'waiting_time' (jump straight to the next event)
+sampling = 'grid'
+# Trigger: 'logistic' (finite Gamma_0, kappa) or 'sharp' (Gamma_0 → ∞: prune as soon as C <= C_th)
+trigger = 'logistic'
+# Process pool: trajectories per shard (fixes the RNG streams), pool size (None = all
+# cores; results do not depend on it), seed (None = fresh entropy, printed)
+shard_size = 50
+workers = None
+seed = None
+# Ensemble statistics: 'stream' (constant-memory EnsembleStats with a reservoir of
+# example trajectories) or 'full' (also keep every trajectory)
+statistics = 'stream'
+reservoir = 16
+# Result cache (dtc_cache) for runs with a fixed seed, None = off
+cache_dir = '.dtc_cache'
+# Instrumentation (dtc.instrument): per-phase timers and jump counters, printed and
+# written to profile_path. Each pool worker records its shards; the recorders are merged.
+profile = False
+profile_path = 'double_slit_profile.json'
+
+# The solver itself lives in dtc.mcwf (headless); hand it this script's parameters
+mcwf.configure(hbar=hbar, gamma=gamma, C_th=C_th, Gamma_0=Gamma_0, kappa=kappa,
+               steps=steps, t_max=t_max, backend=backend, trigger=trigger, n_branches=n_branches)
+OUTCOMES = mcwf.outcome_labels()
+
+def run_shard(n, rng):
+    """
+    One process-pool shard: n trajectories on the shard's own generator, reduced to
+    EnsembleStats (plus the raw trajectories when statistics == 'full').
+    """
+    ops = make_backend(backend)
+    run_one = SAMPLERS[sampling]
+    stats = EnsembleStats(steps, OUTCOMES, reservoir)
+    trajs = np.empty((n, steps))
+    codes = np.empty(n, dtype=int)
+    snaps = np.empty(n, dtype=int)
+    for k in range(n):
+        trajs[k], outcome, snaps[k] = run_one(ops, rng)
+        codes[k] = OUTCOMES.index(outcome)
+    stats.update(trajs, codes, snaps, rng)
+    return (stats,) if statistics == 'stream' else (stats, trajs, codes, snaps)
+
+# Everything the ensemble depends on; `workers` is left out (results do not depend on it)
+CACHE_PARAMS = ('hbar', 'gamma', 'C_th', 'Gamma_0', 'kappa', 'steps', 't_max', 'num_traj',
+                'backend', 'n_branches', 'sampling', 'trigger', 'shard_size', 'seed', 'statistics',
+                'reservoir')
+ARRAY_NAMES = ('trajs', 'outcomes', 'snaps')
+
+def run_cached(ss):
+    """
+    run_ensemble(ss), served from the result cache when the seed is
+    fixed and the parameters and code are unchanged
+    """
+    cache = ResultCache(cache_dir) if cache_dir and seed is not None and statistics != 'events' else None
+    if cache is None:
+        return run_ensemble(ss)
+    key = cache_key({k: globals()[k] for k in CACHE_PARAMS},
+                    code_version(__file__, 'dtc/mcwf.py', 'dtc/physics.py', 'dtc/pointer.py', 'dtc_stream.py', 'dtc_parallel.py'))
+    entry = cache.get(key)
+    if entry is not None:
+        print(f"Loaded from cache {key[:12]}")
+        arrays = tuple(entry[k] for k in ARRAY_NAMES) if statistics == 'full' else None
+        return EnsembleStats.from_arrays(entry), arrays
+    stats, arrays = run_ensemble(ss)
+    cache.put(key, **stats.to_arrays(), **dict(zip(ARRAY_NAMES, arrays or ())))
+    return stats, arrays
+
+def merge_shard(acc, result):
+    """
+    run_sharded reducer: fold one shard result into acc = (stats, per-shard arrays)
+    in shard order (independent of the pool size); 'stream' keeps only the stats.
+    """
+    if acc is None:
+        acc = (result[0], [])
+    else:
+        acc[0].merge(result[0])
+    if statistics != 'stream':
+        acc[1].append(result[1:])
+    return acc
+
+def run_ensemble(ss, recorder=None):
+    """
+    All shards of the ensemble, merged in shard order as they arrive:
+    (stats, arrays), arrays = (trajs, outcome codes, snap indices) for
+    statistics == 'full', else None
+    """
+    stats, parts = run_sharded(run_shard, num_traj, shard_size, ss, workers, recorder=recorder,
+                               reduce=merge_shard)
+    if statistics == 'stream':
+        return stats, None
+    return stats, tuple(np.concatenate(arrays) for arrays in zip(*parts))
+
+if __name__ == '__main__':
+    import matplotlib.pyplot as plt # plotting only; pool workers never import it
+
+    if '--check' in sys.argv:
+        cross_check_backends()
+        sys.exit()
+    if '--clear-cache' in sys.argv:
+        ResultCache(cache_dir).invalidate()
+
+    # --- Ensemble Run and Plotting ---
+    ss = seed_sequence(seed)
+    print(f"Running {num_traj} trajectories ({backend}/{sampling}, seed {ss.entropy})...")
+    if profile:
+        rec = instrument.Recorder(sample_every=1000)
+        stats, arrays = run_ensemble(ss, recorder=rec)
+        rec.stop()
+        print(rec.summary())
+        rec.save(profile_path)
+    else:
+        stats, arrays = run_cached(ss)
+
+    avg_traj = stats.mean
+
+    # Plot single (pick the reservoir trajectory closest to the middle of the run)
+    example_idx = np.argmin(np.abs(stats.sample_snaps - steps/2))
+    example_traj = stats.samples[example_idx]
+    example_outcome = OUTCOMES[stats.sample_outcomes[example_idx]]
+    example_snap = stats.sample_snaps[example_idx]
+
+    vanished_label = "Vanished Path (Right)" if example_outcome == 'L' else "Vanished Path (Left)"
+
+    # Refs
+    v_plot = 1e9
+    amp_plot = 1.0
+    traj_L_ref = -2.0 - v_plot * times * amp_plot
+    traj_R_ref = 2.0 + v_plot * times * amp_plot
+
+    plt.figure(figsize=(12, 7))
+    pre_snap = min(example_snap + 1, len(times))
+    plt.plot(times, traj_L_ref, color='green', ls=':', alpha=0.5, label="Potential L")
+    plt.plot(times, traj_R_ref, color='purple', ls=':', alpha=0.5, label="Potential R")
+    plt.plot(times[:pre_snap], np.zeros(pre_snap), color='orange', ls='--', label=vanished_label + " (Pruned)")
+    plt.plot(times, example_traj, color='red', linewidth=3, label=f"Observed ({example_outcome})")
+    plt.axvline(times[example_snap], color='k', ls='--', alpha=0.7)
+    plt.text(times[example_snap] + 1e-11, 1, "Collapse Event", rotation=90, fontsize=10)
+    plt.xlabel("Time (s)")
+    plt.ylabel(r"$\langle x \rangle$ (arb. units)")
+    plt.title("DTC: Single Trajectory ")
+    plt.legend(loc='upper left')
+    plt.grid(alpha=0.3)
+    plt.ylim(-55, 55)
+    plt.tight_layout()
+    plt.show() 
+
+    # Stats 
+    counts = stats.counts()
+    print(f"Collapse rate: {(1 - counts['no_collapse'] / stats.count) * 100:.1f}%")
+    print(f"Mean snap index: {stats.snap_mean():.0f} ({times[int(stats.snap_mean())]:.1e} s)")
+    if 'L' in counts:
+        print(f"L/R balance: L={counts['L']}, R={counts['R']}")
+    else:
+        branch = np.array([counts[label] for label in OUTCOMES[:-1]])
+        print(f"Branch occupation over {len(branch)} slits: min {branch.min()}, max {branch.max()}, "
+              f"expected {stats.count / len(branch):.1f} each")
@@ -0,0 +1,43 @@
+# dtc - headless DTC simulation core (no matplotlib; QuTiP only for its backend).
+#   dtc.physics    operators, coherence, dissipator, trigger rate, cat states
+#   dtc.density    Liouvillian / propagator / spectral cache, adaptive DP5(4) integrator
+#   dtc.mcwf       strict MCWF backends and samplers
+#   dtc.pointer    N-branch pointer bases with sparse diagonal projectors
+#   dtc.qubits     n-qubit evolution with local operators on tensor-shaped states
+#   dtc.snap       closed-form snap times for exponential / piecewise coherence laws
+#   dtc.spatial    split-step, grid, Krylov and low-rank engines on a position grid
+#   dtc.measures   coherence / purity of grid states without forming rho
+#   dtc.scenarios  cat-state, Lazarus and LISA model curves
+#   dtc.instrument opt-in phase timers / counters for the solver loops
+# Submodules and their public names are loaded on first attribute access, so
+# `import dtc` costs nothing and pool workers import only what they use.
+
+import importlib
+
+_SUBMODULES = ('physics', 'density', 'mcwf', 'pointer', 'qubits', 'snap', 'spatial', 'measures',
+               'scenarios', 'instrument')
+_EXPORTS = {
+    'physics': ('sig_z', 'P_L', 'P_R', 'commutator', 'lindblad_dissipator', 'coherence',
+                'pointer_projection', 'trigger_rate', 'gamma_trigger', 'cat_states'),
+    'density': ('liouvillian', 'propagator', 'spectral', 'SpectralSolver', 'dissipator_superop',
+                'integrate_adaptive', 'clear_caches'),
+    'mcwf': ('NumpyBackend', 'QutipBackend', 'PointerBackend', 'make_backend', 'single_trajectory',
+             'waiting_time_trajectory', 'cross_check_backends'),
+    'pointer': ('PointerBasis', 'born_sample'),
+    'qubits': ('QubitModel', 'evolve_density', 'trajectory', 'product_state'),
+    'snap': ('snap_time', 'cat_snap_time', 'snap_time_piecewise', 'solve_snap'),
+    'spatial': ('SplitStepEngine', 'GridDensityEngine', 'KrylovDensityEngine', 'LowRankDensityEngine'),
+    'measures': ('l1_coherence', 'purity', 'purity_proxy'),
+    'scenarios': ('cat_coherence', 'lazarus_curves'),
+}
+_OWNER = {name: module for module, names in _EXPORTS.items() for name in names}
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        return importlib.import_module(f'{__name__}.{name}')
+    if name in _OWNER:
+        return getattr(importlib.import_module(f'{__name__}.{_OWNER[name]}'), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(set(globals()) | set(_SUBMODULES) | set(_OWNER))
@@ -0,0 +1,294 @@
+# dtc/density.py
+# Density-matrix solvers for the DTC master equation: cached Liouvillian
+# superoperators / propagators, a cached spectral solver for arbitrary-time queries
+# and an adaptive Dormand-Prince 5(4) integrator with exact threshold-crossing
+# detection. scipy is imported on first use.
+
+import warnings
+from collections import OrderedDict
+
+import numpy as np
+from dtc import instrument
+
+hbar = 1.0
+
+# --- Vectorised Liouvillian and Propagator Cache ---
+# Row-major vectorisation: vec(rho) = rho.reshape(-1), so vec(A rho B) = kron(A, B.T) vec(rho).
+# Generators and propagators exp(L dt) are cached by (operators, rates, dt): runs and
+# sweeps that reuse the same physics only pay for one matrix-vector product per step.
+# Each cache keeps the cache_size most recently used entries (a sweep over rates or
+# dt would otherwise grow it by one d^2 x d^2 matrix per point); clear_caches()
+# empties all three.
+cache_size = 128
+_liouvillian_cache = OrderedDict()
+_propagator_cache = OrderedDict()
+cache_stats = {'hits': 0, 'misses': 0}
+
+def _cached(cache, key, build):
+    """(value, hit): cache[key], built on a miss; evicts the least recently used entries"""
+    if key in cache:
+        cache.move_to_end(key)
+        return cache[key], True
+    value = cache[key] = build()
+    while len(cache) > cache_size:
+        cache.popitem(last=False)
+    return value, False
+
+def clear_caches():
+    """Drop every cached Liouvillian, propagator and spectral solver"""
+    for cache in (_liouvillian_cache, _propagator_cache, _spectral_cache):
+        cache.clear()
+
+def _ops_key(ops):
+    return tuple((op.shape, op.tobytes()) for op in ops)
+
+def dissipator_superop(L):
+    """Superoperator of D[L]: kron(L, L*) - 1/2 kron(L^dag L, I) - 1/2 kron(I, (L^dag L)^T)"""
+    I = np.eye(L.shape[0])
+    L_dag_L = L.conj().T @ L
+    return np.kron(L, L.conj()) - 0.5 * (np.kron(L_dag_L, I) + np.kron(I, L_dag_L.T))
+
+def liouvillian(H, L_ops, rates, projectors=(), Gamma_trig=0.0):
+    """
+    Generator of drho/dt = -i/hbar [H, rho] + sum_k rate_k D[L_k] rho + Gamma_trig sum_n D[P_n] rho
+    as a d^2 x d^2 matrix acting on vec(rho).
+    """
+    def build():
+        I = np.eye(H.shape[0])
+        L = -1j/hbar * (np.kron(H, I) - np.kron(I, H.T))
+        for L_k, rate in zip(L_ops, rates):
+            L = L + rate * dissipator_superop(L_k)
+        for P_n in projectors:
+            L = L + Gamma_trig * dissipator_superop(P_n)
+        return L
+
+    key = (_ops_key([H]), _ops_key(L_ops), tuple(rates), _ops_key(projectors), Gamma_trig)
+    return _cached(_liouvillian_cache, key, build)[0]
+
+def propagator(H, L_ops, rates, dt, projectors=(), Gamma_trig=0.0):
+    """Cached one-step propagator exp(L dt) for the generator built by liouvillian()."""
+    def build():
+        from scipy.linalg import expm
+        return expm(liouvillian(H, L_ops, rates, projectors, Gamma_trig) * dt)
+
+    key = (_ops_key([H]), _ops_key(L_ops), tuple(rates), _ops_key(projectors), Gamma_trig, dt)
+    U, hit = _cached(_propagator_cache, key, build)
+    cache_stats['hits' if hit else 'misses'] += 1
+    return U
+
+# --- Spectral Solver (time-independent generator) ---
+# rho(t) = sum_k c_k exp(lambda_k t) R_k from one eigendecomposition L = R diag(lambda) R^-1,
+# cached like the propagators. One entry rho_ij(t) is a single row of R against the
+# d^2 mode amplitudes, O(d^2) per entry and time; the full rho(t) or the l1 coherence
+# (all d^2 - d off-diagonal entries) is O(d^4) per time, and each bisection step of a
+# crossing pays that once. Coherence curves and threshold crossings are evaluated at
+# any t without stepping through a time grid; the off-diagonal rows of R they use are
+# sliced once per solver.
+_spectral_cache = OrderedDict()
+
+class SpectralSolver:
+    """
+    Eigendecomposition of a (diagonalisable) Liouvillian for arbitrary-time queries.
+    Warns (RuntimeWarning) when the eigenbasis condition number exceeds cond_max:
+    L is then near-defective and rho(t) loses about log10(cond) digits; use
+    propagator() or integrate_adaptive() instead.
+    """
+    cond_max = 1e8
+
+    def __init__(self, L):
+        self.lam, self.R = np.linalg.eig(L)
+        # Condition number of the eigenbasis: large values flag a near-defective L
+        self.cond = np.linalg.cond(self.R)
+        if not self.cond < self.cond_max:
+            warnings.warn(f"SpectralSolver: eigenbasis condition number {self.cond:.1e} > {self.cond_max:.0e}, "
+                          "the Liouvillian is near-defective", RuntimeWarning, stacklevel=2)
+        self.R_inv = np.linalg.inv(self.R)
+        self.d = int(round(np.sqrt(len(self.lam))))
+        off = [(i, j) for i in range(self.d) for j in range(self.d) if i != j]
+        self._off = np.array([i * self.d + j for i, j in off], dtype=int)
+        self._R_off_T = np.ascontiguousarray(self.R[self._off].T) # (d^2, d^2 - d)
+
+    def modes(self, rho0):
+        """Mode amplitudes c = R^-1 vec(rho0)"""
+        return self.R_inv @ np.asarray(rho0, dtype=complex).reshape(-1)
+
+    def _weights(self, c, t):
+        """c_k exp(lambda_k t) for each t: (T, d^2)"""
+        return np.exp(np.multiply.outer(np.atleast_1d(t), self.lam)) * c
+
+    def _entries(self, c, t, flat):
+        """vec(rho(t))[flat] for each t: (T, len(flat))"""
+        return self._weights(c, t) @ self.R[flat].T
+
+    def rho(self, rho0, t):
+        """rho(t): (d, d) for scalar t, (T, d, d) for an array of times"""
+        vals = self._entries(self.modes(rho0), t, slice(None)).reshape(-1, self.d, self.d)
+        return vals[0] if np.ndim(t) == 0 else vals
+
+    def entries(self, rho0, t, index):
+        """rho_ij(t) for the (i, j) pairs in index: (T, len(index))"""
+        flat = np.array([i * self.d + j for i, j in index], dtype=int)
+        return self._entries(self.modes(rho0), t, flat)
+
+    def _coherence(self, c, t):
+        return np.abs(self._weights(c, t) @ self._R_off_T).sum(axis=1)
+
+    def coherence(self, rho0, t):
+        """l1 off-diagonal coherence sum_{i != j} |rho_ij(t)| at each t: (T,)"""
+        return self._coherence(self.modes(rho0), t)
+
+    def crossing(self, rho0, C_th, t_max, n_bracket=256, xtol=None):
+        """
+        First time in [0, t_max] at which the coherence drops below C_th (None if it
+        does not). The crossing is bracketed on n_bracket intervals and bisected on
+        the spectral form to xtol (default 1e-12 t_max); excursions below C_th that
+        start and end inside one bracket interval are not seen.
+        """
+        c = self.modes(rho0)
+        t = np.linspace(0.0, t_max, n_bracket + 1)
+        below = np.flatnonzero(self._coherence(c, t) < C_th)
+        if not len(below):
+            return None
+        k = below[0]
+        if k == 0:
+            return 0.0
+        lo, hi = t[k - 1], t[k]
+        xtol = 1e-12 * t_max if xtol is None else xtol
+        while hi - lo > xtol:
+            mid = 0.5 * (lo + hi)
+            if self._coherence(c, mid)[0] < C_th:
+                hi = mid
+            else:
+                lo = mid
+        return hi
+
+def spectral(H, L_ops, rates, projectors=(), Gamma_trig=0.0):
+    """Cached SpectralSolver for the generator built by liouvillian()."""
+    key = (_ops_key([H]), _ops_key(L_ops), tuple(rates), _ops_key(projectors), Gamma_trig)
+    build = lambda: SpectralSolver(liouvillian(H, L_ops, rates, projectors, Gamma_trig))
+    return _cached(_spectral_cache, key, build)[0]
+
+# --- Adaptive Dormand-Prince 5(4) Integrator with Event Detection ---
+# Butcher tableau, embedded error weights and 4th-order dense-output matrix
+DP_C = np.array([0, 1/5, 3/10, 4/5, 8/9, 1])
+DP_A = [
+    [],
+    [1/5],
+    [3/40, 9/40],
+    [44/45, -56/15, 32/9],
+    [19372/6561, -25360/2187, 64448/6561, -212/729],
+    [9017/3168, -355/33, 46732/5247, 49/176, -5103/18656],
+]
+DP_B = np.array([35/384, 0, 500/1113, 125/192, -2187/6784, 11/84])
+DP_E = np.array([-71/57600, 0, 71/16695, -71/1920, 17253/339200, -22/525, 1/40])
+DP_P = np.array([
+    [1, -8048581381/2820520608, 8663915743/2820520608, -12715105075/11282082432],
+    [0, 0, 0, 0],
+    [0, 131558114200/32700410799, -68118460800/10900136933, 87487479700/32700410799],
+    [0, -1754552775/470086768, 14199869525/1410260304, -10690763975/1880347072],
+    [0, 127303824393/49829197408, -318862633887/49829197408, 701980252875/199316789632],
+    [0, -282668133/205662961, 2019193451/616988883, -1453857185/822651844],
+    [0, 40617522/29380423, -110615467/29380423, 69997945/29380423],
+])
+
+def dense_eval(t, t_old, h, y_old, Q):
+    """Evaluate the 4th-order dense output of one accepted step at time t."""
+    theta = (t - t_old) / h
+    return y_old + h * np.tensordot(Q, theta ** np.arange(1, 5), axes=([0], [0]))
+
+def find_crossing(event, t_old, h, y_old, Q, xtol):
+    """Illinois (modified regula falsi) root of event() on the dense output."""
+    a, b = t_old, t_old + h
+    fa = event(dense_eval(a, t_old, h, y_old, Q))
+    fb = event(dense_eval(b, t_old, h, y_old, Q))
+    side = 0
+    while b - a > xtol:
+        c = b - fb * (b - a) / (fb - fa)
+        fc = event(dense_eval(c, t_old, h, y_old, Q))
+        if fc < 0:
+            b, fb = c, fc
+            if side == -1:
+                fa *= 0.5
+            side = -1
+        elif fc > 0:
+            a, fa = c, fc
+            if side == 1:
+                fb *= 0.5
+            side = 1
+        else:
+            return c
+    return b
+
+def integrate_adaptive(rhs, y0, t_span, t_eval=(), event=None,
+                       rtol=1e-8, atol=1e-10, h0=None, max_step=np.inf):
+    """
+    Adaptive Dormand-Prince 5(4) integration of dy/dt = rhs(t, y) over t_span.
+
+    Values at the requested t_eval points come from the dense output, so the
+    step size is set by the error tolerance only (h0 is the first trial step,
+    max_step an upper bound on every step). If `event(y)` is given, the
+    run stops at its first downward zero crossing, located by root-bracketing
+    on the dense output of the step in which the sign changes.
+
+    Returns (y_eval, t_event, y_event); t_event is None if no crossing occurred.
+    """
+    t0, t1 = t_span
+    t_eval = np.asarray(t_eval, dtype=float)
+    y_eval = np.zeros((len(t_eval),) + np.shape(y0), dtype=complex)
+    n_done = 0
+
+    t, y = t0, np.asarray(y0, dtype=complex)
+    f = rhs(t, y)
+    h = h0 if h0 is not None else 1e-3 * (t1 - t0)
+    g_old = event(y) if event is not None else None
+    K = np.empty((7,) + y.shape, dtype=complex)
+    rec = instrument.current # None unless a recording() block is active
+
+    while t < t1:
+        if rec: t_lap = rec.clock()
+        h = min(h, t1 - t, max_step)
+        K[0] = f
+        for s in range(1, 6):
+            dy = np.tensordot(DP_A[s], K[:s], axes=([0], [0]))
+            K[s] = rhs(t + DP_C[s] * h, y + h * dy)
+        y_new = y + h * np.tensordot(DP_B, K[:6], axes=([0], [0]))
+        f_new = rhs(t + h, y_new)
+        K[6] = f_new
+        if rec: t_lap = rec.lap('stages', t_lap)
+
+        err = h * np.tensordot(DP_E, K, axes=([0], [0]))
+        scale = atol + rtol * np.maximum(np.abs(y), np.abs(y_new))
+        err_norm = np.sqrt(np.mean(np.abs(err / scale)**2))
+        if rec: t_lap = rec.lap('error', t_lap)
+
+        if err_norm > 1:
+            h *= max(0.2, 0.9 * err_norm ** -0.2)
+            if rec: rec.count('rejected_step')
+            continue
+
+        Q = np.tensordot(DP_P, K, axes=([0], [0]))
+        t_new = t1 if h == t1 - t else t + h
+
+        t_stop = None
+        if event is not None:
+            g_new = event(y_new)
+            if g_old >= 0 > g_new:
+                t_stop = find_crossing(event, t, h, y, Q, xtol=1e-12 * (t1 - t0))
+            g_old = g_new
+            if rec: t_lap = rec.lap('event', t_lap)
+
+        t_end = t_new if t_stop is None else t_stop
+        while n_done < len(t_eval) and t_eval[n_done] <= t_end:
+            y_eval[n_done] = dense_eval(t_eval[n_done], t, h, y, Q)
+            n_done += 1
+        if rec:
+            rec.lap('dense_output', t_lap)
+            rec.count('accepted_step')
+
+        if t_stop is not None:
+            return y_eval[:n_done], t_stop, dense_eval(t_stop, t, h, y, Q)
+
+        t, y, f = t_new, y_new, f_new
+        h *= min(10.0, 0.9 * max(err_norm, 1e-10) ** -0.2)
+
+    return y_eval[:n_done], None, y
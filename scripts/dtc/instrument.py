@@ -0,0 +1,127 @@
+# dtc/instrument.py
+# Opt-in instrumentation for the solver loops: per-phase timers, event counters,
+# traced allocation per phase and a sampled event trace.
+# Solvers read the module attribute `current` once per call; it is None unless a
+# recording() block is active, so the disabled cost is one truth test per phase.
+#
+#   with instrument.recording(sample_every=1000) as rec:
+#       waiting_time_trajectory()
+#   print(rec.summary()); rec.save('profile.json')
+#
+# Inside a loop:  t = rec.clock() ... t = rec.lap('trigger', t) ... rec.count('pruning_jump')
+#
+# `current` is per process: pool workers record into their own Recorder (see
+# dtc_parallel.run_sharded(recorder=...)) and the parent merges them in shard order.
+
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+current = None
+
+class Recorder:
+    """Accumulates phase timings, counters and (optionally) traced allocations"""
+
+    def __init__(self, sample_every=0, allocations=False):
+        self.sample_every = sample_every
+        self.allocations = allocations
+        self.times = {}   # phase -> total seconds
+        self.calls = {}   # phase -> laps
+        self.alloc = {}   # phase -> net traced bytes allocated
+        self.counters = {}
+        self.trace = []   # sampled (t since start, phase, duration)
+        self.clock = time.perf_counter
+        self.t_start = self.clock()
+        self.t_stop = None
+        self.merged_seconds = 0.0  # summed wall time of the recorders merged in
+        self._laps = 0
+        self._mem = 0
+
+    def lap(self, phase, t0):
+        """Charge the time since t0 to `phase`; returns the current time for the next lap"""
+        t = self.clock()
+        self.times[phase] = self.times.get(phase, 0.0) + (t - t0)
+        self.calls[phase] = self.calls.get(phase, 0) + 1
+        if self.allocations:
+            mem = tracemalloc.get_traced_memory()[0]
+            self.alloc[phase] = self.alloc.get(phase, 0) + (mem - self._mem)
+            self._mem = mem
+        self._laps += 1
+        if self.sample_every and self._laps % self.sample_every == 0:
+            self.trace.append((t - self.t_start, phase, t - t0))
+        return t
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def stop(self):
+        """Freeze the wall clock (done when a recording() block exits)"""
+        if self.t_stop is None:
+            self.t_stop = self.clock()
+
+    def wall(self):
+        return (self.clock() if self.t_stop is None else self.t_stop) - self.t_start
+
+    def busy(self):
+        """Time the recorded phases ran in: the merged recorders' wall time, else our own"""
+        return self.merged_seconds or self.wall()
+
+    def merge(self, other):
+        """Fold in another Recorder (e.g. from a pool worker): phases, counters and trace add up"""
+        for phase, seconds in other.times.items():
+            self.times[phase] = self.times.get(phase, 0.0) + seconds
+            self.calls[phase] = self.calls.get(phase, 0) + other.calls[phase]
+        for phase, nbytes in other.alloc.items():
+            self.alloc[phase] = self.alloc.get(phase, 0) + nbytes
+        for name, n in other.counters.items():
+            self.count(name, n)
+        self.trace = self.trace + other.trace
+        self.merged_seconds += other.busy()
+        return self
+
+    def report(self):
+        """
+        Structured report: wall time, phases (seconds, calls, share, bytes), counters,
+        trace. Shares are of busy() (summed over workers for merged recorders).
+        """
+        busy = self.busy()
+        phases = {p: dict(seconds=s, calls=self.calls[p], share=s / busy if busy else 0.0,
+                          **({'alloc_bytes': self.alloc.get(p, 0)} if self.allocations else {}))
+                  for p, s in sorted(self.times.items(), key=lambda kv: -kv[1])}
+        return dict(wall_seconds=self.wall(), busy_seconds=busy, phases=phases,
+                    counters=dict(self.counters), trace=self.trace)
+
+    def summary(self):
+        """Human-readable table of the report"""
+        r = self.report()
+        lines = [f"wall {r['wall_seconds']:.3f} s"
+                 + (f", {r['busy_seconds']:.3f} s in workers" if self.merged_seconds else '')]
+        for p, v in r['phases'].items():
+            lines.append(f"  {p:<16} {v['seconds']:9.4f} s  {100*v['share']:5.1f} %  {v['calls']:>10} laps"
+                         + (f"  {v['alloc_bytes']/1e6:9.2f} MB" if self.allocations else ''))
+        lines += [f"  {k:<16} {v:>10}" for k, v in sorted(self.counters.items())]
+        return '\n'.join(lines)
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.report(), f, indent=2)
+
+@contextmanager
+def recording(sample_every=0, allocations=False):
+    """Enable instrumentation for the enclosed block and yield its Recorder"""
+    global current
+    rec = Recorder(sample_every, allocations)
+    started = allocations and not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    if allocations:
+        rec._mem = tracemalloc.get_traced_memory()[0]
+    previous, current = current, rec
+    try:
+        yield rec
+    finally:
+        current = previous
+        rec.stop()
+        if started:
+            tracemalloc.stop()
@@ -0,0 +1,419 @@
+# dtc/mcwf.py
+# Strict MCWF unravelling of the two-level DTC model: pure dephasing jumps plus the
+# state-dependent collapse jump (no continuous DTC term in H_eff pre-threshold).
+# Operator backends (NumPy, QuTiP for validation; QuTiP is imported only when its
+# backend is built; 'pointer' for N-branch gratings), per-step and waiting-time
+# samplers and the backend cross-check.
+# Samplers read the module parameters below; scripts set them with configure().
+
+import numpy as np
+from dtc import instrument, physics
+from dtc.pointer import PointerBasis, born_sample
+
+hbar = 1.0545718e-34 # J*s
+gamma = 1e8          # s^{-1}, environmental dephasing
+C_th = 0.5           # coherence threshold
+Gamma_0 = 1e12       # max collapse rate (s^{-1})
+kappa = 1000         # logistic smoothing steepness
+steps = 5000
+t_max = 5 / gamma
+times = np.linspace(0, t_max, steps)
+dt = times[1] - times[0]
+backend = 'numpy'    # default backend of the samplers ('numpy' or 'qutip')
+trigger = 'logistic' # 'logistic' or 'sharp'
+n_branches = 2       # pointer states of the 'pointer' backend (slits of the grating)
+
+PARAMS = ('hbar', 'gamma', 'C_th', 'Gamma_0', 'kappa', 'steps', 't_max', 'backend', 'trigger',
+          'n_branches')
+
+def configure(**params):
+    """
+    Set module parameters (any of PARAMS) and rebuild the `times` grid and dt.
+    Backends built before the call keep the gamma and dt they were built with.
+    """
+    unknown = set(params) - set(PARAMS)
+    if unknown:
+        raise ValueError(f"Unknown MCWF parameters {sorted(unknown)}, expected some of {PARAMS}")
+    g = globals()
+    g.update(params)
+    g['times'] = np.linspace(0, g['t_max'], g['steps'])
+    g['dt'] = g['times'][1] - g['times'][0]
+
+def coherence(rho):
+    """l1 off-diag norm: 2*|rho_{01}|^2"""
+    return 2 * np.abs(rho[0, 1])**2
+
+def trigger_rate(C):
+    """dtc.physics.trigger_rate with the module's Gamma_0, C_th and kappa"""
+    return physics.trigger_rate(C, Gamma_0, C_th, kappa)
+
+def gamma_trigger(rho):
+    """Trigger rate evaluated on a density matrix."""
+    return trigger_rate(coherence(rho))
+
+def trigger_jump(C):
+    """
+    Pruning rate and sharp-limit firing flag for coherence C.
+    In the sharp limit Γ_trigger = Γ₀·Θ(C_th − C) with Γ₀ → ∞: no rate enters the
+    jump probabilities, and the projection is applied as a discrete event as soon
+    as C <= C_th (the κ → ∞ limit of the logistic is Γ₀/2 → ∞ at C = C_th).
+    """
+    if trigger == 'sharp':
+        return 0.0, C <= C_th
+    return trigger_rate(C), False
+
+# --- Operator Backends ---
+# The backends expose the same small interface used by single_trajectory():
+#   initial_state(), coherence(psi), populations(psi), decoh_jump_prob(psi),
+#   decoh_jump(psi), sample_branch(psi, u), project(psi, branch), no_jump_step(psi)
+# and must consume random numbers in the same order, so a fixed seed gives the
+# same trajectory with either one. They also carry a `stationary` flag: True when
+# the normalised no-jump step leaves every state unchanged (H_eff ∝ I), which is
+# what waiting-time sampling relies on.
+# populations(psi) is the (left, right) weight pair behind <x>; sample_branch draws
+# the Born outcome of a pruning jump from one uniform u.
+
+class QutipBackend:
+    """Reference implementation on QuTiP Qobj operators (slow, used for validation)."""
+    name = 'qutip'
+
+    def __init__(self):
+        from qutip import Qobj, basis, ket2dm, sigmaz, expect, identity
+        self._ket2dm = ket2dm
+        self._expect = expect
+        self.basis_L = basis(2, 0)
+        self.basis_R = basis(2, 1)
+        self.H = Qobj(np.zeros((2,2)))
+        self.I = identity(2) # Identity operator
+        self.P_L = self.basis_L.proj()
+        self.P_R = self.basis_R.proj()
+        self.L_decoh = sigmaz()
+        self.L_decoh_sq = self.L_decoh.dag() * self.L_decoh
+        # H_eff: ONLY INCLUDES ENVIRONMENTAL DECOHERENCE (gamma)
+        # REFEREE FIX: NO Gamma_trig term in H_eff
+        self.H_eff = self.H - 1j * hbar/2 * (gamma * self.L_decoh_sq)
+        U_non_H = (self.I - 1j * self.H_eff * dt / hbar).full()
+        self.stationary = np.allclose(U_non_H, U_non_H[0, 0] * np.eye(2))
+
+    def initial_state(self):
+        return (self.basis_L + self.basis_R).unit()
+
+    def coherence(self, psi):
+        return coherence(self._ket2dm(psi))
+
+    def populations(self, psi):
+        return self._expect(self.P_L, psi), self._expect(self.P_R, psi)
+
+    def sample_branch(self, psi, u):
+        p_L, p_R = self.populations(psi)
+        return 'L' if u < p_L / (p_L + p_R) else 'R'
+
+    def decoh_jump_prob(self, psi):
+        return gamma * self._expect(self.L_decoh_sq, psi) * dt
+
+    def decoh_jump(self, psi):
+        return (self.L_decoh * psi).unit()
+
+    def project(self, psi, branch):
+        return self.basis_L if branch == 'L' else self.basis_R
+
+    def no_jump_step(self, psi):
+        U_non_H = self.I - 1j * self.H_eff * dt / hbar
+        return (U_non_H * psi).unit() # Re-normalize (Crucial for trace preservation)
+
+class NumpyBackend:
+    """
+    Plain-NumPy 2x2 backend. P_L, P_R, L_decoh and the no-jump propagator
+    (I - i H_eff dt / hbar) are built once; the state vector is updated in place.
+    """
+    name = 'numpy'
+
+    def __init__(self):
+        self.H = np.zeros((2, 2), dtype=complex)
+        self.P_L = np.diag([1.0, 0.0]).astype(complex)
+        self.P_R = np.diag([0.0, 1.0]).astype(complex)
+        self.L_decoh = np.diag([1.0, -1.0]).astype(complex)
+        self.L_decoh_sq = self.L_decoh.conj().T @ self.L_decoh
+        self.H_eff = self.H - 1j * hbar/2 * (gamma * self.L_decoh_sq)
+        self.U_non_H = np.eye(2, dtype=complex) - 1j * self.H_eff * dt / hbar
+        self.stationary = np.allclose(self.U_non_H, self.U_non_H[0, 0] * np.eye(2))
+        # Pointer projectors are diagonal: <psi|P|psi> is a weighted sum of |psi_i|^2
+        self._w_L = np.diag(self.P_L).real.copy()
+        self._w_R = np.diag(self.P_R).real.copy()
+        self._buf = np.empty(2, dtype=complex)
+
+    def initial_state(self):
+        return np.array([1.0, 1.0], dtype=complex) / np.sqrt(2)
+
+    def coherence(self, psi):
+        return 2 * np.abs(psi[0] * psi[1].conjugate())**2
+
+    def populations(self, psi):
+        prob = psi.real**2 + psi.imag**2
+        return self._w_L @ prob, self._w_R @ prob
+
+    def sample_branch(self, psi, u):
+        p_L, p_R = self.populations(psi)
+        return 'L' if u < p_L / (p_L + p_R) else 'R'
+
+    def decoh_jump_prob(self, psi):
+        np.dot(self.L_decoh_sq, psi, out=self._buf)
+        return gamma * np.vdot(psi, self._buf).real * dt
+
+    def _apply(self, op, psi):
+        np.dot(op, psi, out=self._buf)
+        psi[:] = self._buf
+        psi /= np.sqrt(np.vdot(psi, psi).real)
+        return psi
+
+    def decoh_jump(self, psi):
+        return self._apply(self.L_decoh, psi)
+
+    def project(self, psi, branch):
+        psi[:] = (1.0, 0.0) if branch == 'L' else (0.0, 1.0)
+        return psi
+
+    def no_jump_step(self, psi):
+        return self._apply(self.U_non_H, psi)
+
+class PointerBackend:
+    """
+    N-branch (multi-slit) backend on a sparse pointer basis (dtc.pointer): one
+    amplitude per slit, dephasing by the clock operator Z = diag(exp(2πi n/N))
+    (sigma_z for N = 2; unitary, so H_eff ∝ I and the flow is stationary) and a
+    pruning jump onto one of the N pointer states with Born weights |psi_n|^2.
+    Every operation is O(N), so gratings of 100-1000 slits run at the two-branch
+    cost per jump. Coherence generalises 2|psi_L psi_R|^2 = l1^2/2 with l1
+    normalised by N-1, so an equal superposition has the same C for every N.
+    Slit n sits at the fraction n/(N-1) of the way from the L to the R path.
+    """
+    name = 'pointer'
+
+    def __init__(self):
+        self.basis = PointerBasis.slits(n_branches)
+        self.labels = tuple(str(n) for n in range(n_branches))
+        self._index = {label: n for n, label in enumerate(self.labels)}
+        self.L_decoh = np.exp(2j * np.pi * np.arange(n_branches) / n_branches)
+        self.stationary = True
+        self._w_R = np.arange(n_branches) / (n_branches - 1)
+        self._w_L = 1.0 - self._w_R
+        self._norm = 2.0 * (n_branches - 1)**2
+
+    def initial_state(self):
+        return np.full(n_branches, 1.0 / np.sqrt(n_branches), dtype=complex)
+
+    def coherence(self, psi):
+        return self.basis.state_coherence(psi)**2 / self._norm
+
+    def populations(self, psi):
+        prob = self.basis.state_populations(psi)
+        return self._w_L @ prob, self._w_R @ prob
+
+    def sample_branch(self, psi, u):
+        return self.labels[born_sample(self.basis.state_populations(psi), u)]
+
+    def decoh_jump_prob(self, psi):
+        return gamma * np.vdot(psi, psi).real * dt # Z^dagger Z = I
+
+    def decoh_jump(self, psi):
+        psi *= self.L_decoh
+        return psi
+
+    def project(self, psi, branch):
+        return self.basis.project_state(psi, self._index[branch])
+
+    def no_jump_step(self, psi):
+        return psi # H_eff ∝ I: the normalised state does not move
+
+BACKENDS = {'qutip': QutipBackend, 'numpy': NumpyBackend, 'pointer': PointerBackend}
+
+def outcome_labels(name=None):
+    """Pruning outcomes of a backend (default: module `backend`) plus 'no_collapse'"""
+    if (name or backend) == 'pointer':
+        return tuple(str(n) for n in range(n_branches)) + ('no_collapse',)
+    return ('L', 'R', 'no_collapse')
+
+def make_backend(name):
+    """Instantiate an operator backend by name ('numpy', 'qutip' or 'pointer')."""
+    try:
+        return BACKENDS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown backend '{name}', expected one of {sorted(BACKENDS)}")
+
+# --- Custom Stochastic Unraveling (Strict MCWF) ---
+def single_trajectory(ops=None, rng=np.random):
+    """
+    One MCWF trajectory; `ops` is a backend instance (default: module `backend`),
+    `rng` a Generator or the legacy np.random module.
+    """
+    if ops is None:
+        ops = make_backend(backend)
+    psi = ops.initial_state()
+    trajectory_x = []
+    
+    # FIX: Initialize outcome and collapse status
+    outcome = 'no_collapse'
+    collapsed = False
+    snap_index = steps - 1
+    rec = instrument.current # None unless a recording() block is active
+    
+    for i, t in enumerate(times):
+        if rec: t_lap = rec.clock()
+        # 1. Calculate Jump Rates
+        Gamma_trig, fire = trigger_jump(ops.coherence(psi))
+        
+        # Environmental Jump Probability
+        p_jump_decoh = ops.decoh_jump_prob(psi)
+        # Objective Collapse Jump Probability (pure jump only, no continuous noise)
+        p_jump_trig = Gamma_trig * dt                       
+        p_jump_total = p_jump_decoh + p_jump_trig
+        if rec: t_lap = rec.lap('trigger', t_lap)
+        
+        # 2. Check for Jumps
+        jumped = fire or rng.random() < p_jump_total
+        if rec: t_lap = rec.lap('rng', t_lap)
+        if jumped:
+            # A JUMP OCCURRED (Jump Action)
+            if not collapsed:
+                snap_index = i # Record jump time only the first time
+            
+            # Select which jump occurred based on relative probability
+            if not fire and rng.random() < p_jump_decoh / p_jump_total:
+                # DECOHERENCE JUMP (L_decoh action)
+                psi = ops.decoh_jump(psi)
+                if rec: rec.count('dephasing_jump')
+            else:
+                # TRIGGERED COLLAPSE JUMP (Projection action, Born rule over the branches)
+                outcome = ops.sample_branch(psi, rng.random())
+                psi = ops.project(psi, outcome)
+                
+                # DTC-specific: Once collapsed, the system is permanently defined
+                collapsed = True 
+                if rec: rec.count('pruning_jump')
+            if rec: t_lap = rec.lap('jump', t_lap)
+        
+        else:
+            # 3. NO JUMP OCCURRED (Non-Unitary Evolution)
+            psi = ops.no_jump_step(psi)
+            if rec:
+                rec.count('no_jump_step')
+                t_lap = rec.lap('no_jump', t_lap)
+            
+        # 4. Compute expectation value (Plotting Utility)
+        v = 1e9 # m/s (Arbitrary velocity for plot scale)
+        amp = 1.0 
+        pos_L = -2.0 - v * t * amp
+        pos_R = 2.0 + v * t * amp
+        
+        exp_L, exp_R = ops.populations(psi)
+        exp_x = pos_L * exp_L + pos_R * exp_R 
+        trajectory_x.append(exp_x)
+        if rec: rec.lap('observable', t_lap)
+    
+    # Snap: Index of max |Δ<x>|
+    diffs = np.diff(trajectory_x)
+    snap_idx = np.argmax(np.abs(diffs)) if np.max(np.abs(diffs)) > 1e-5 else len(trajectory_x)-1
+    return np.array(trajectory_x), outcome, snap_idx
+
+def waiting_time_trajectory(ops=None, rng=np.random):
+    """
+    Event-driven version of single_trajectory(). Instead of a coin flip per step,
+    the number of no-jump steps before the next jump is drawn directly from the
+    same per-step law, survival (1 - min(p_total, 1))^k with p_total = p_jump_decoh
+    + Gamma_trig*dt evaluated on the current state, so both samplers share one
+    distribution. The state is then advanced straight to the
+    jump and <x> is filled in on the `times` grid segment by segment, so the cost
+    scales with the number of jumps rather than with `steps`.
+
+    Requires a stationary no-jump flow (normalised state unchanged between
+    jumps), which holds for the pure-dephasing H_eff used here.
+    """
+    if ops is None:
+        ops = make_backend(backend)
+    if not ops.stationary:
+        raise ValueError("waiting-time sampling needs H_eff ∝ I; use sampling='grid'")
+    psi = ops.initial_state()
+    trajectory_x = np.empty(steps)
+
+    v = 1e9 # m/s (Arbitrary velocity for plot scale)
+    amp = 1.0
+    pos_L = -2.0 - v * times * amp
+    pos_R = 2.0 + v * times * amp
+
+    outcome = 'no_collapse'
+    collapsed = False
+    snap_index = steps - 1
+
+    rec = instrument.current # None unless a recording() block is active
+
+    i = 0
+    while i < steps:
+        if rec: t_lap = rec.clock()
+        p_jump_decoh = ops.decoh_jump_prob(psi)
+        Gamma_trig, fire = trigger_jump(ops.coherence(psi))
+        p_jump_total = p_jump_decoh + Gamma_trig * dt
+        if rec: t_lap = rec.lap('trigger', t_lap)
+
+        # Number of no-jump steps before the next jump: failures before the first
+        # success of the grid sampler's per-step coin, P(jump) = min(p_total, 1);
+        # a firing sharp trigger prunes on the current step
+        if fire:
+            n_wait = 0
+        elif p_jump_total > 0:
+            n_wait = rng.geometric(min(p_jump_total, 1.0)) - 1
+        else:
+            n_wait = steps
+        j = i + int(n_wait) if n_wait < steps - i else steps
+        if rec: t_lap = rec.lap('rng', t_lap)
+
+        # Deterministic stretch: state unchanged, only the drift moves <x>
+        exp_L, exp_R = ops.populations(psi)
+        trajectory_x[i:j] = pos_L[i:j] * exp_L + pos_R[i:j] * exp_R
+        if rec:
+            rec.count('no_jump_step', j - i)
+            t_lap = rec.lap('drift', t_lap)
+        if j >= steps:
+            break
+
+        if not collapsed:
+            snap_index = j
+        if not fire and rng.random() < p_jump_decoh / p_jump_total:
+            psi = ops.decoh_jump(psi)
+            if rec: rec.count('dephasing_jump')
+        else:
+            outcome = ops.sample_branch(psi, rng.random())
+            psi = ops.project(psi, outcome)
+            collapsed = True
+            if rec: rec.count('pruning_jump')
+
+        exp_L, exp_R = ops.populations(psi)
+        trajectory_x[j] = pos_L[j] * exp_L + pos_R[j] * exp_R
+        i = j + 1
+        if rec: rec.lap('jump', t_lap)
+
+        # A pruned state is a pointer state: every later jump maps it onto itself
+        if collapsed and ops.coherence(psi) == 0:
+            trajectory_x[i:] = pos_L[i:] * exp_L + pos_R[i:] * exp_R
+            break
+
+    diffs = np.diff(trajectory_x)
+    snap_idx = np.argmax(np.abs(diffs)) if np.max(np.abs(diffs)) > 1e-5 else len(trajectory_x)-1
+    return trajectory_x, outcome, snap_idx
+
+SAMPLERS = {'grid': single_trajectory, 'waiting_time': waiting_time_trajectory}
+
+def cross_check_backends(n_check=5, seed=1234, rtol=1e-9):
+    """
+    Run the same seeded trajectories on the QuTiP and NumPy backends and
+    assert that trajectories, outcomes and snap indices agree.
+    """
+    ref, fast = make_backend('qutip'), make_backend('numpy')
+    for k in range(n_check):
+        np.random.seed(seed + k)
+        x_ref, out_ref, snap_ref = single_trajectory(ref)
+        np.random.seed(seed + k)
+        x_fast, out_fast, snap_fast = single_trajectory(fast)
+        assert out_ref == out_fast, f"trajectory {k}: outcome {out_ref} != {out_fast}"
+        assert snap_ref == snap_fast, f"trajectory {k}: snap {snap_ref} != {snap_fast}"
+        np.testing.assert_allclose(x_fast, x_ref, rtol=rtol, atol=1e-12)
+    print(f"Backend cross-check passed ({n_check} trajectories, qutip == numpy)")
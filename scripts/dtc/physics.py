@@ -0,0 +1,56 @@
+# dtc/physics.py
+# Two-level DTC building blocks shared by the solvers and figure scripts:
+# pointer-basis operators, commutator / Lindblad dissipator, l1 coherence,
+# the sharp-limit pointer projection, the logistic trigger rate and the
+# two-Gaussian cat state on a position grid.
+
+import numpy as np
+
+sig_z = np.array([[1, 0], [0, -1]], dtype=complex)
+P_L = np.array([[1, 0], [0, 0]], dtype=complex)
+P_R = np.array([[0, 0], [0, 1]], dtype=complex)
+
+def commutator(A, B):
+    """[A, B] = AB - BA"""
+    return np.dot(A, B) - np.dot(B, A)
+
+def lindblad_dissipator(L, rho):
+    """
+    Standard Lindblad Dissipator: D[L]rho = L rho L^dagger - 0.5 * {L^dagger L, rho}
+    """
+    L_dag = L.conj().T
+    term1 = np.dot(L, np.dot(rho, L_dag))
+    L_dag_L = np.dot(L_dag, L)
+    term2 = 0.5 * (np.dot(L_dag_L, rho) + np.dot(rho, L_dag_L)) # Anti-commutator
+    return term1 - term2
+
+def coherence(rho):
+    """l1 off-diagonal coherence sum_{i != j} |rho_ij| (|rho_01| + |rho_10| for a qubit), over (..., d, d)"""
+    rho = np.asarray(rho)
+    return np.where(np.eye(rho.shape[-1], dtype=bool), 0.0, np.abs(rho)).sum(axis=(-2, -1))
+
+def pointer_projection(rho, projectors):
+    """
+    Sharp-limit pruning event (Γ₀ → ∞): rho -> sum_n P_n rho P_n. `projectors` is a
+    list of matrices or a dtc.pointer.PointerBasis (masked, no matrix products).
+    """
+    if hasattr(projectors, 'project'):
+        return projectors.project(rho)
+    return sum(np.dot(P_n, np.dot(rho, P_n)) for P_n in projectors)
+
+def trigger_rate(C, Gamma_0, C_th, kappa):
+    """Logistic trigger Gamma_0 / (1 + exp(kappa (C - C_th))): ~Gamma_0 below C_th, ~0 above"""
+    return Gamma_0 / (1.0 + np.exp(np.clip(kappa * (C - C_th), -500, 500)))
+
+def gamma_trigger(rho, Gamma_0, C_th, kappa):
+    """Trigger rate evaluated on a density matrix (l1 coherence)"""
+    return trigger_rate(coherence(rho), Gamma_0, C_th, kappa)
+
+def cat_states(x, Delta_x, sigma_x):
+    """Grid-normalised Gaussian branches psi_L, psi_R centred at -/+ Delta_x / 2"""
+    dx = x[1] - x[0]
+    psi_L = np.exp(-(x + Delta_x/2)**2 / (4*sigma_x**2))
+    psi_R = np.exp(-(x - Delta_x/2)**2 / (4*sigma_x**2))
+    psi_L /= np.sqrt(np.sum(np.abs(psi_L)**2) * dx)
+    psi_R /= np.sqrt(np.sum(np.abs(psi_R)**2) * dx)
+    return psi_L, psi_R
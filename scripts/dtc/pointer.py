@@ -0,0 +1,88 @@
+# dtc/pointer.py
+# N-branch pointer bases with diagonal projectors stored sparsely.
+# A basis of dimension d is cut into N branches by a label per basis state,
+# P_n = sum_{i: branch_of[i] = n} |i><i|, so no N x d x d projector stack is ever
+# formed: populations are a bincount, the projection sum_n P_n rho P_n is a
+# same-branch mask (O(d^2), or O(d) for pure states), and since sum_n P_n = 1
+# the pruning dissipator is sum_n D[P_n] rho = sum_n P_n rho P_n - rho.
+# Rank-one branches (one basis state per slit) are the default.
+
+import numpy as np
+
+class PointerBasis:
+    """Diagonal pointer projectors P_n given by branch labels branch_of[i] in 0..N-1"""
+
+    def __init__(self, branch_of):
+        self.branch_of = np.asarray(branch_of, dtype=np.intp)
+        self.n = int(self.branch_of.max()) + 1
+        self.d = len(self.branch_of)
+        self.rank_one = self.n == self.d and np.array_equal(self.branch_of, np.arange(self.d))
+        self._same = None
+
+    @classmethod
+    def slits(cls, n):
+        """N rank-one branches: P_n = |n><n|"""
+        return cls(np.arange(n))
+
+    def same_branch(self):
+        """(d, d) bool mask of pairs (i, j) in the same branch (built once)"""
+        if self._same is None:
+            self._same = self.branch_of[:, None] == self.branch_of[None, :]
+        return self._same
+
+    # --- density matrices (..., d, d) ---
+    def populations(self, rho):
+        """Tr P_n rho for each branch: (..., N)"""
+        diag = np.diagonal(rho, axis1=-2, axis2=-1).real
+        if self.rank_one:
+            return diag
+        out = np.zeros(diag.shape[:-1] + (self.n,))
+        np.add.at(out, (..., self.branch_of), diag)
+        return out
+
+    def project(self, rho):
+        """sum_n P_n rho P_n (sharp-limit pruning event)"""
+        if self.rank_one:
+            out = np.zeros_like(rho)
+            idx = np.arange(self.d)
+            out[..., idx, idx] = rho[..., idx, idx]
+            return out
+        return np.where(self.same_branch(), rho, 0)
+
+    def dissipator(self, rho):
+        """sum_n D[P_n] rho = sum_n P_n rho P_n - rho"""
+        return self.project(rho) - rho
+
+    def coherence(self, rho):
+        """l1 coherence between branches: sum of |rho_ij| over i, j in different branches"""
+        a = np.abs(rho)
+        if self.rank_one:
+            return a.sum(axis=(-2, -1)) - np.abs(np.diagonal(rho, axis1=-2, axis2=-1)).sum(axis=-1)
+        return np.where(self.same_branch(), 0.0, a).sum(axis=(-2, -1))
+
+    # --- pure states (d,) ---
+    def state_populations(self, psi):
+        """|P_n psi|^2 for each branch, O(d)"""
+        prob = psi.real**2 + psi.imag**2
+        return prob if self.rank_one else np.bincount(self.branch_of, weights=prob, minlength=self.n)
+
+    def state_coherence(self, psi):
+        """l1 inter-branch coherence of |psi><psi|: (sum_n a_n)^2 - sum_n a_n^2, a_n = sum_{i in n} |psi_i|, O(d)"""
+        a = np.abs(psi)
+        a_n = a if self.rank_one else np.bincount(self.branch_of, weights=a, minlength=self.n)
+        return np.sum(a_n)**2 - np.sum(a_n * a_n)
+
+    def project_state(self, psi, n):
+        """P_n psi / |P_n psi| (in place)"""
+        if self.rank_one:
+            psi[:] = 0.0
+            psi[n] = 1.0
+            return psi
+        psi[self.branch_of != n] = 0.0
+        psi /= np.sqrt(np.vdot(psi, psi).real)
+        return psi
+
+def born_sample(populations, u):
+    """Branch index drawn from the (unnormalised) populations with one uniform u in [0, 1)"""
+    cum = np.cumsum(populations)
+    return int(np.searchsorted(cum / cum[-1], u, side='right'))
@@ -0,0 +1,278 @@
+# dtc/qubits.py
+# Multi-qubit DTC evolution on tensor-structured states. Every operator is local: a
+# 2x2 H, jump operator or pointer projector acts on one qubit axis of the state,
+# reshaped to (2^k, 2, 2^(n-k-1)) (density matrices: the same on rows and columns),
+# so no 2^n x 2^n operator or Kronecker product is ever formed. Diagonal operators
+# (sig_z, P_L, P_R: the default model) reduce to elementwise 2x2 factors, so a
+# Lindblad step costs O(n 4^n) and an MCWF step O(n 2^n).
+# Memory: a pure state is 16 * 2^n bytes (25 qubits: 0.5 GB), a density matrix
+# 16 * 4^n bytes (12 qubits: 0.27 GB), times the few RK4 stages held at once.
+#
+# Trigger scope: 'local' gives every qubit its own trigger on the l1 coherence of
+# its reduced density matrix, pruning that qubit onto its pointer states; 'global'
+# uses one trigger on the l1 coherence of the whole state in the product pointer
+# basis and prunes all qubits at once (one site, outcomes 0..2^n-1).
+# Qubit 0 is the most significant bit of the basis index.
+
+import numpy as np
+from dtc import instrument
+from dtc.physics import sig_z, P_L, P_R, trigger_rate
+from dtc.density import hbar
+from dtc.pointer import born_sample
+
+def _view(x, n, k):
+    """x (2^n,) or (2^n, 2^n) reshaped so qubit k has its own axis (no copy)"""
+    shape = (2**k, 2, 2**(n - k - 1))
+    return x.reshape(shape if x.ndim == 1 else shape + shape)
+
+def _is_diag(op):
+    return not np.any(op - np.diag(np.diag(op)))
+
+def _pair(l):
+    """Elementwise factor of D[diag(l)] on a qubit's (row, column) index pair"""
+    a = np.abs(l)**2
+    return l[:, None] * l.conj()[None, :] - 0.5 * (a[:, None] + a[None, :])
+
+def apply_local(op, psi, n, k):
+    """op (2x2) acting on qubit k of a state vector (2^n,)"""
+    return np.einsum('ab,ibj->iaj', op, _view(psi, n, k)).reshape(psi.shape)
+
+def apply_local_rho(A, rho, n, k, B=None):
+    """A rho B^dagger with A, B (2x2) on qubit k of a density matrix (2^n, 2^n); B defaults to A"""
+    B = A if B is None else B
+    out = np.einsum('ab,ibjkcl->iajkcl', A, _view(rho, n, k))
+    return np.einsum('iajkcl,dc->iajkdl', out, B.conj()).reshape(rho.shape)
+
+def product_state(n, psi1=(1.0, 1.0)):
+    """Normalised product state psi1^(x n) as a (2^n,) vector"""
+    psi1 = np.asarray(psi1, dtype=complex) / np.linalg.norm(psi1)
+    psi = np.ones(1, dtype=complex)
+    for _ in range(n):
+        psi = np.multiply.outer(psi, psi1).reshape(-1)
+    return psi
+
+def density(psi):
+    """|psi><psi|"""
+    return np.multiply.outer(psi, psi.conj())
+
+class QubitModel:
+    """
+    n qubits, each with local Hamiltonian H, dephasing operator L at rate gamma and
+    pointer projectors; Gamma_0, C_th, kappa as in dtc.physics.trigger_rate.
+    trigger='sharp' prunes as a discrete event once C <= C_th; Gamma_0 = 0 with the
+    logistic trigger is plain decoherence.
+    """
+
+    def __init__(self, n, H=sig_z, L=sig_z, gamma=0.3, projectors=(P_L, P_R), Gamma_0=0.0,
+                 C_th=0.15, kappa=1000.0, trigger='logistic', scope='local'):
+        if scope not in ('local', 'global'):
+            raise ValueError(f"Unknown trigger scope '{scope}', expected 'local' or 'global'")
+        self.n = n
+        self.H = np.asarray(H, dtype=complex)
+        self.L = np.asarray(L, dtype=complex)
+        self.projectors = np.array(projectors, dtype=complex)
+        self.gamma, self.Gamma_0, self.C_th, self.kappa = gamma, Gamma_0, C_th, kappa
+        self.trigger, self.scope = trigger, scope
+        self.sites = n if scope == 'local' else 1
+        self.LdL = self.L.conj().T @ self.L
+        self.diagonal = all(_is_diag(A) for A in (self.H, self.L, *self.projectors))
+        if self.diagonal:
+            h = np.diag(self.H)
+            self.F_env = -1j/hbar * (h[:, None] - h[None, :]) + gamma * _pair(np.diag(self.L))
+            self.F_prune = sum(_pair(np.diag(P)) for P in self.projectors)
+            self.M_proj = sum(np.outer(np.diag(P), np.diag(P).conj()) for P in self.projectors)
+
+    # --- Coherence and trigger ---
+    def reduced(self, rho, k):
+        """Reduced density matrix of qubit k"""
+        return np.einsum('iajibj->ab', _view(rho, self.n, k))
+
+    def reduced_pure(self, psi, k, psi_conj=None):
+        """Reduced density matrix of qubit k of |psi><psi|"""
+        v = _view(psi, self.n, k)
+        vc = v.conj() if psi_conj is None else _view(psi_conj, self.n, k)
+        return np.einsum('iaj,ibj->ab', v, vc)
+
+    def coherences(self, rho):
+        """l1 coherence of each trigger site: (n,) for 'local', (1,) for 'global'"""
+        if self.scope == 'global':
+            return np.array([np.abs(rho).sum() - np.abs(np.diagonal(rho)).sum()])
+        return np.array([2 * np.abs(self.reduced(rho, k)[0, 1]) for k in range(self.n)])
+
+    def rates(self, C):
+        """Pruning rate per site (0 for the sharp trigger, which prunes by events)"""
+        if self.trigger == 'sharp' or not self.Gamma_0:
+            return np.zeros_like(C)
+        return trigger_rate(C, self.Gamma_0, self.C_th, self.kappa)
+
+    # --- Density matrices ---
+    def _local_generic(self, rho, k, G):
+        """Generator terms of qubit k for non-diagonal operators"""
+        n, I2 = self.n, np.eye(2)
+        left = lambda A: apply_local_rho(A, rho, n, k, I2)             # A rho
+        right = lambda A: apply_local_rho(I2, rho, n, k, A.conj().T)   # rho A
+        d = -1j/hbar * (left(self.H) - right(self.H))
+        d += self.gamma * (apply_local_rho(self.L, rho, n, k) - 0.5 * (left(self.LdL) + right(self.LdL)))
+        if G:
+            for P in self.projectors:
+                PP = P.conj().T @ P
+                d += G * (apply_local_rho(P, rho, n, k) - 0.5 * (left(PP) + right(PP)))
+        return d
+
+    def _rhs(self, rho, G):
+        out = np.zeros_like(rho)
+        for k in range(self.n):
+            G_k = G[k] if self.scope == 'local' else 0.0
+            if self.diagonal:
+                F = self.F_env + G_k * self.F_prune if G_k else self.F_env
+                _view(out, self.n, k)[...] += _view(rho, self.n, k) * F[None, :, None, None, :, None]
+            else:
+                out += self._local_generic(rho, k, G_k)
+        if self.scope == 'global' and G[0]:
+            out -= G[0] * rho # sum_x D[|x><x|] rho = diag(rho) - rho
+            out[np.diag_indices_from(out)] += G[0] * np.diagonal(rho)
+        return out
+
+    def rhs(self, t, rho):
+        """drho/dt of the full model (usable with dtc.density.integrate_adaptive)"""
+        return self._rhs(rho, self.rates(self.coherences(rho)))
+
+    def prune(self, rho, site):
+        """sum_b P_b rho P_b on one trigger site (global: the diagonal of rho)"""
+        if self.scope == 'global':
+            return np.diag(np.diagonal(rho))
+        if self.diagonal:
+            out = rho.copy()
+            _view(out, self.n, site)[...] *= self.M_proj[None, :, None, None, :, None]
+            return out
+        return sum(apply_local_rho(P, rho, self.n, site) for P in self.projectors)
+
+    # --- Pure states ---
+    def _pure_stats(self, psi):
+        """(coherence per site, pointer populations per site, <L^dagger L> per qubit)"""
+        psi_conj = psi.conj()
+        red = [self.reduced_pure(psi, k, psi_conj) for k in range(self.n)]
+        ldl = np.array([np.trace(self.LdL @ r).real for r in red])
+        if self.scope == 'global':
+            prob = psi.real**2 + psi.imag**2
+            a = np.abs(psi).sum()
+            return np.array([a * a - prob.sum()]), [prob], ldl
+        C = np.array([2 * np.abs(r[0, 1]) for r in red])
+        pops = [np.einsum('bac,ca->b', self.projectors, r).real for r in red]
+        return C, pops, ldl
+
+    def _prune_state(self, psi, site, branch):
+        if self.scope == 'global':
+            psi[:] = 0.0
+            psi[branch] = 1.0
+            return psi
+        psi = apply_local(self.projectors[branch], psi, self.n, site)
+        return psi / np.sqrt(np.vdot(psi, psi).real)
+
+def evolve_density(model, rho0, dt, steps, snap=True, record=False):
+    """
+    RK4 evolution of a (2^n, 2^n) density matrix under `model` for `steps` steps.
+    The trigger rate is held fixed over each step. With snap=True a site whose
+    coherence is below C_th at the start of a step is pruned (model.prune) and
+    its step index written to snap_index (-1 = never), as in dtc_batch.
+
+    Returns (rho, snap_index, history); history is the (steps, sites) coherence
+    record if record=True, else None.
+    """
+    rho = np.array(rho0, dtype=complex)
+    snap_index = np.full(model.sites, -1)
+    history = np.empty((steps, model.sites)) if record else None
+    rec = instrument.current # None unless a recording() block is active
+    for i in range(steps):
+        if rec: t_lap = rec.clock()
+        C = model.coherences(rho)
+        if rec: t_lap = rec.lap('coherence', t_lap)
+        if snap:
+            for s in np.flatnonzero((C < model.C_th) & (snap_index < 0)):
+                snap_index[s] = i
+                rho = model.prune(rho, s)
+                C[s] = 0.0
+                if rec: rec.count('pruned')
+            if rec: t_lap = rec.lap('snap', t_lap)
+        if record:
+            history[i] = C
+        G = model.rates(C)
+        if rec: t_lap = rec.lap('trigger', t_lap)
+        k1 = model._rhs(rho, G)
+        k2 = model._rhs(rho + 0.5*dt*k1, G)
+        k3 = model._rhs(rho + 0.5*dt*k2, G)
+        k4 = model._rhs(rho + dt*k3, G)
+        rho = rho + dt/6 * (k1 + 2*k2 + 2*k3 + k4)
+        if rec: rec.lap('integrate', t_lap)
+    return rho, snap_index, history
+
+def trajectory(model, psi0, dt, steps, rng=np.random, record=False):
+    """
+    One MCWF trajectory of a (2^n,) state, first order in dt as in dtc.mcwf:
+    dephasing jumps L on each qubit at rate gamma <L^dagger L>, pruning jumps per
+    site at the trigger rate (sharp trigger: as soon as C <= C_th) with Born
+    sampling over the site's pointer states, otherwise the no-jump step
+    (I - i H_eff dt / hbar) on every qubit. A pruned site is permanently defined
+    and does not trigger again.
+
+    Returns (psi, outcome, snap_index, history): outcome is the pointer-state index
+    per site (-1 = no collapse), snap_index the pruning step (-1 = never), history
+    the (steps, sites) coherence record if record=True, else None.
+    """
+    n = model.n
+    psi = np.array(psi0, dtype=complex)
+    H_eff = model.H - 0.5j * hbar * model.gamma * model.LdL
+    U = np.eye(2) - 1j * H_eff * dt / hbar
+    u_diag = np.diag(U).copy() if _is_diag(U) else None
+    outcome = np.full(model.sites, -1)
+    snap_index = np.full(model.sites, -1)
+    history = np.empty((steps, model.sites)) if record else None
+
+    def prune(site, pops, i):
+        nonlocal psi
+        outcome[site] = born_sample(pops, rng.random())
+        snap_index[site] = i
+        psi = model._prune_state(psi, site, outcome[site])
+
+    rec = instrument.current # None unless a recording() block is active
+    for i in range(steps):
+        if rec: t_lap = rec.clock()
+        C, pops, ldl = model._pure_stats(psi)
+        if record:
+            history[i] = C
+        if rec: t_lap = rec.lap('observable', t_lap)
+        open_sites = outcome < 0
+        if model.trigger == 'sharp':
+            fire = np.flatnonzero(open_sites & (C <= model.C_th))
+            for s in fire:
+                prune(s, model._pure_stats(psi)[1][s] if s != fire[0] else pops[s], i)
+            if len(fire):
+                _, pops, ldl = model._pure_stats(psi)
+            G = np.zeros(model.sites)
+        else:
+            G = np.where(open_sites, model.rates(C), 0.0)
+
+        p = np.concatenate([model.gamma * ldl * dt, G * dt])
+        p_total = p.sum()
+        if rec: t_lap = rec.lap('trigger', t_lap)
+        if rng.random() < p_total:
+            c = int(np.searchsorted(np.cumsum(p), rng.random() * p_total, side='right'))
+            if c < n:
+                psi = apply_local(model.L, psi, n, c)
+                psi /= np.sqrt(np.vdot(psi, psi).real)
+                if rec: rec.count('dephasing_jump')
+            else:
+                prune(c - n, pops[c - n], i)
+                if rec: rec.count('pruning_jump')
+            if rec: rec.lap('jump', t_lap)
+        else:
+            for k in range(n):
+                if u_diag is not None:
+                    _view(psi, n, k)[...] *= u_diag[:, None]
+                else:
+                    psi = apply_local(U, psi, n, k)
+            psi /= np.sqrt(np.vdot(psi, psi).real)
+            if rec:
+                rec.count('no_jump_step')
+                rec.lap('no_jump', t_lap)
+    return psi, outcome, snap_index, history
@@ -0,0 +1,91 @@
+# dtc/snap.py
+# Closed-form DTC snap times for exponential and piecewise-exponential coherence laws.
+# Everything broadcasts over NumPy arrays, so whole (gamma, Delta_x, sigma_x, C_th)
+# design grids are solved in one call instead of stepping a decay loop per point.
+
+import numpy as np
+
+def cat_decoherence_rate(gamma_env, Delta_x, sigma_x):
+    """Gamma_deco = gamma_env * (Delta_x / 2 sigma_x)^2 for a two-Gaussian cat state"""
+    return gamma_env * Delta_x**2 / (4 * sigma_x**2)
+
+def snap_time(Gamma_deco, C_th, C0=1.0):
+    """
+    First time C(t) = C0 exp(-Gamma_deco t) drops below C_th: ln(C0/C_th) / Gamma_deco.
+    Returns 0 where C0 <= C_th already and inf where the coherence never decays.
+    """
+    Gamma_deco, C_th, C0 = np.broadcast_arrays(*(np.asarray(a, dtype=float) for a in (Gamma_deco, C_th, C0)))
+    log_ratio = np.log(C0 / C_th)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = np.where(Gamma_deco > 0, log_ratio / Gamma_deco, np.inf)
+    t = np.where(log_ratio <= 0, 0.0, t)
+    return t[()] if t.ndim == 0 else t
+
+def cat_snap_time(gamma_env, Delta_x, sigma_x, C_th, C0=1.0):
+    """Snap time of the cat state: ln(C0/C_th) / (gamma_env (Delta_x / 2 sigma_x)^2)"""
+    return snap_time(cat_decoherence_rate(gamma_env, Delta_x, sigma_x), C_th, C0)
+
+def snap_time_piecewise(t_breaks, rates, C_th, C0=1.0, factors=None):
+    """
+    First crossing of C_th for a piecewise-exponential coherence law.
+
+    Segment k runs from t_breaks[k] to t_breaks[k+1] (the last one is open-ended)
+    with C'(t) = -rates[k] C(t); negative rates describe revivals (echo, eraser).
+    factors[k] multiplies C at the start of segment k (e.g. echo efficiency).
+    rates / factors may carry leading batch dimensions: shape (..., K).
+    Returns inf where C(t) stays at or above C_th.
+    """
+    t_breaks = np.asarray(t_breaks, dtype=float)
+    rates = np.asarray(rates, dtype=float)
+    factors = np.ones_like(rates) if factors is None else np.asarray(factors, dtype=float)
+    log_th = np.log(C_th)
+    durations = np.diff(t_breaks, append=np.inf)
+
+    # log C at the start (after the jump factor) and end of each segment
+    log_start = np.log(C0) + np.cumsum(np.log(factors), axis=-1)
+    log_start[..., 1:] -= np.cumsum(rates[..., :-1] * durations[:-1], axis=-1)
+    with np.errstate(invalid='ignore'):
+        log_end = np.where(rates == 0, log_start, log_start - rates * durations)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t_cross = np.where(log_start < log_th, t_breaks,
+                           t_breaks + (log_start - log_th) / rates)
+    crosses = (log_start < log_th) | ((rates > 0) & (log_end < log_th))
+    first = np.argmax(crosses, axis=-1)
+    t = np.take_along_axis(t_cross, first[..., None], axis=-1)[..., 0]
+    t = np.where(crosses.any(axis=-1), t, np.inf)
+    return t[()] if t.ndim == 0 else t
+
+def coherence_curve(times, Gamma_deco, C0=1.0):
+    """C(t) = C0 exp(-Gamma_deco t) on a time grid"""
+    return C0 * np.exp(-Gamma_deco * np.asarray(times))
+
+def dtc_curve(times, C_qm, t_snap, floor=0.0):
+    """DTC coherence: follows C_qm until the snap, then pinned at `floor` (pruned)"""
+    return np.where(np.asarray(times) < t_snap, C_qm, floor)
+
+def sample_branch(p_L=0.5, rng=np.random, shape=()):
+    """
+    Born-sampled post-snap branch, 'L' with probability p_L (broadcast to `shape`).
+    Returns a str for scalar input, else an object array of 'L' / 'R'.
+    """
+    p_L = np.broadcast_to(np.asarray(p_L, dtype=float), np.broadcast_shapes(np.shape(p_L), shape))
+    u = rng.random(p_L.shape or None)
+    branch = np.where(u < p_L, 'L', 'R').astype(object)
+    return branch[()] if branch.ndim == 0 else branch
+
+def solve_snap(Gamma_deco, C_th, times=None, C0=1.0, p_L=0.5, floor=0.0, rng=np.random):
+    """
+    Snap time, post-snap branch and (if a time grid is given) the QM and DTC curves
+    for pure exponential decay. Returns (t_snap, branch, C_qm, C_dtc); the curves
+    are None without `times`, and branch is None where the threshold is never reached.
+    Array parameters give arrays of snap times and branches (one draw from `rng` each).
+    """
+    t_snap = snap_time(Gamma_deco, C_th, C0)
+    finite = np.isfinite(t_snap)
+    branch = np.where(finite, sample_branch(p_L, rng, np.shape(t_snap)), None)
+    branch = branch[()] if branch.ndim == 0 else branch
+    if times is None:
+        return t_snap, branch, None, None
+    C_qm = coherence_curve(times, Gamma_deco, C0)
+    return t_snap, branch, C_qm, dtc_curve(times, C_qm, t_snap, floor)
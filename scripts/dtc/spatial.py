@@ -0,0 +1,558 @@
+# dtc/spatial.py
+# Split-step FFT engines on a 1D position grid:
+#   SplitStepEngine   - wavefunction with position-localising decoherence jumps, O(N log N)/step
+#   GridDensityEngine - density matrix rho(x, x') under Gaussian localisation kernels
+#                       (environmental scattering, CSL), O(N^2 log N)/step
+#   KrylovDensityEngine - full rho(x, x') under the same kernels plus a potential, by
+#                       Krylov exp(t L) rho with a matrix-free O(N^2) Liouvillian action;
+#                       the N^4 superoperator is never formed, and Tr rho^2 falls out
+#                       of the Krylov start vector norm
+#   LowRankDensityEngine - rho(x, x') = X S X^dagger with a few side-confined columns X
+#                       and a small core S, rank-adaptive, O(N q r (r_max + p) + r N log N)/step
+# Work arrays are allocated once and the FFTs write into them (NumPy >= 2 `out=`,
+# pocketfft keeps the plan for a given size cached).
+
+import warnings
+
+import numpy as np
+
+hbar = 1.0545718e-34 # J*s
+
+class SplitStepEngine:
+    """
+    Wavefunction engine on a uniform grid x.
+
+    The state is kept as branches psi = sum_b c_b phi_b: the parts of psi left and
+    right of x_split, each normalised and confined to its own side, with amplitudes
+    stored as log|c_b|. The DTC threshold (C_th ~ 1e-20) lies far below the ~1e-16
+    round-off floor an FFT leaves across the whole grid, so the branch coherence
+    C = 2|c_L c_R| / (|c_L|^2 + |c_R|^2) is only resolvable in this form.
+
+    Free evolution: phi -> IFFT[ exp(-i hbar k^2 dt / 2m) FFT[phi] ] (exact for V = 0).
+    Decoherence: Gaussian localisation jumps L_a(x) ∝ exp(-(x - a)^2 / (4 r^2)) at total
+    rate lam, the unravelling of  d rho(x,x')/dt = -lam (1 - exp(-(x-x')^2 / 8r^2)) rho(x,x').
+    DTC: once C < C_th the state is pruned to a Born-sampled branch, tail-free.
+    """
+
+    def __init__(self, x, dt, mass, lam, r_loc, x_split=0.0, rng=np.random):
+        self.x = x
+        self.dx = x[1] - x[0]
+        self.dt = dt
+        self.lam = lam
+        self.r_loc = r_loc
+        self.rng = rng
+        self.n_left = np.searchsorted(x, x_split) # grid points left of the split
+
+        k = 2 * np.pi * np.fft.fftfreq(len(x), d=self.dx)
+        self.kinetic = np.exp(-1j * hbar * k**2 * dt / (2 * mass))
+
+        self._kbuf = np.empty((2, len(x)), dtype=complex)
+        self._work = np.empty(len(x))
+
+    @staticmethod
+    def rate_for(Gamma_deco, Delta_x, r_loc):
+        """Jump rate lam that decoheres a separation Delta_x at Gamma_deco"""
+        return Gamma_deco / -np.expm1(-Delta_x**2 / (8 * r_loc**2))
+
+    def norm(self, phi):
+        return np.sqrt(np.vdot(phi, phi).real * self.dx)
+
+    def split(self, psi):
+        """psi -> (phi, log_c): normalised left/right branches and their log amplitudes"""
+        phi = np.zeros((2, len(psi)), dtype=complex)
+        phi[0, :self.n_left] = psi[:self.n_left]
+        phi[1, self.n_left:] = psi[self.n_left:]
+        norms = np.array([self.norm(phi[0]), self.norm(phi[1])])
+        phi /= norms[:, None]
+        with np.errstate(divide='ignore'):
+            return phi, np.log(norms)
+
+    def combine(self, phi, log_c):
+        """Normalised psi = sum_b c_b phi_b"""
+        c = np.exp(log_c - np.max(log_c))
+        psi = np.tensordot(c, phi, axes=1)
+        return psi / self.norm(psi)
+
+    def free_step(self, phi):
+        """One kinetic step for every branch, in place"""
+        kbuf = self._kbuf[:len(phi)]
+        np.fft.fft(phi, axis=-1, out=kbuf)
+        kbuf *= self.kinetic
+        np.fft.ifft(kbuf, axis=-1, out=phi)
+        if len(phi) == 2:
+            # Keep each branch on its own side: what leaks across the split is round-off
+            phi[0, self.n_left:] = 0.0
+            phi[1, :self.n_left] = 0.0
+        return phi
+
+    def localization_jump(self, phi, log_c):
+        """Apply L_a with a ~ p(a) = (|psi|^2 * Gaussian_r)(a); updates phi, log_c in place"""
+        w = self._work
+        p_branch = np.exp(2 * (log_c - np.max(log_c)))
+        b = np.searchsorted(np.cumsum(p_branch), self.rng.random() * np.sum(p_branch))
+        np.multiply(phi[b].real, phi[b].real, out=w)
+        w += phi[b].imag**2
+        np.cumsum(w, out=w)
+        i = np.searchsorted(w, self.rng.random() * w[-1])
+        a = self.x[min(i, len(w) - 1)] + self.r_loc * self.rng.normal()
+
+        np.subtract(self.x, a, out=w)
+        w *= w
+        w *= -1.0 / (4 * self.r_loc**2)
+        np.exp(w, out=w)
+        for k in range(len(phi)):
+            phi[k] *= w
+            n_k = self.norm(phi[k])
+            if n_k > 0:
+                phi[k] /= n_k
+                log_c[k] += np.log(n_k)
+            else:
+                log_c[k] = -np.inf
+
+    def coherence(self, log_c):
+        """Branch coherence 2|c_L c_R| / (|c_L|^2 + |c_R|^2)"""
+        if len(log_c) < 2:
+            return 0.0
+        m = np.max(log_c)
+        return 2 * np.exp(log_c[0] + log_c[1] - 2*m) / np.sum(np.exp(2 * (log_c - m)))
+
+    def run(self, psi0, steps, C_th=None):
+        """
+        Evolve psi0 for `steps` steps. Returns (psi, C_track, snap_index, branch);
+        C_track[i] is the coherence at step i, snap_index/branch are None without a snap.
+        """
+        phi, log_c = self.split(np.asarray(psi0, dtype=complex))
+        C_track = np.empty(steps)
+        C_track[0] = self.coherence(log_c)
+        snap_index = branch = None
+        for i in range(1, steps):
+            self.free_step(phi)
+            for _ in range(self.rng.poisson(self.lam * self.dt)):
+                self.localization_jump(phi, log_c)
+            C = self.coherence(log_c)
+            if snap_index is None and C_th is not None and C < C_th:
+                # Tail-free pruning: keep one Born-sampled branch, drop the other
+                p_L = 0.5 * (1.0 - np.tanh(log_c[1] - log_c[0])) # |c_L|^2 / (|c_L|^2 + |c_R|^2)
+                b = 0 if self.rng.random() < p_L else 1
+                branch = 'LR'[b]
+                phi, log_c = phi[b:b+1], log_c[b:b+1]
+                snap_index = i
+                C = self.coherence(log_c)
+            C_track[i] = C
+        return self.combine(phi, log_c), C_track, snap_index, branch
+
+
+class GridDensityEngine:
+    """
+    Density matrix rho(x, x') on a uniform grid.
+
+    Kinetic part: rho -> U rho U^dagger is the separable phase P(k) conj(P(q)),
+    P(k) = exp(-i hbar k^2 dt / 2m), on the 2D FFT of rho, O(N^2 log N).
+    Localisation part: every kernel (rate, length) contributes
+    d rho(x,x')/dt = -rate (1 - exp(-(x-x')^2 / 4 length^2)) rho(x,x'),
+    i.e. environmental scattering or CSL (length = r_C); the combined factor
+    exp(-Gamma(x - x') dt) is precomputed once and applied elementwise, O(N^2).
+
+    rho is stored as a stack of blocks of the left/right split ('LR', 'LL', 'RR';
+    RL = LR^dagger is implied), each confined to its own quadrant. Both parts of
+    the dynamics act block by block, so a coherence-only run evolves just LR.
+    LR carries a log scale so that cross-coherence far below the FFT round-off
+    floor (C_th ~ 1e-20) is resolved.
+    DTC: once C = 2|<phi_L|rho|phi_R>| < C_th the LR block is dropped, i.e.
+    rho -> sum_n P_n rho P_n.
+    """
+
+    def __init__(self, x, dt, mass, kernels, x_split=0.0):
+        self.x = x
+        self.dx = x[1] - x[0]
+        self.dt = dt
+        n = np.searchsorted(x, x_split)
+        N = len(x)
+        L, R = slice(0, n), slice(n, N)
+        self.quadrants = {'LR': (L, R), 'LL': (L, L), 'RR': (R, R)}
+
+        k = 2 * np.pi * np.fft.fftfreq(N, d=self.dx)
+        self.phase = np.exp(-1j * hbar * k**2 * dt / (2 * mass))
+        self.phase_conj = self.phase.conj()
+
+        d2 = (x[:, None] - x[None, :])**2
+        Gamma = np.zeros((N, N))
+        for rate, length in kernels:
+            Gamma += rate * -np.expm1(-d2 / (4 * length**2))
+        self.decay = np.exp(-Gamma * dt)
+
+        self._kbuf = np.empty((3, N, N), dtype=complex)
+
+    def init(self, psi_L, psi_R, c_L=1/np.sqrt(2), c_R=1/np.sqrt(2), coherence_only=False):
+        """
+        Blocks of rho = |psi><psi| for psi = c_L psi_L + c_R psi_R (psi_L, psi_R
+        normalised with dx and supported left / right of the split).
+        Returns (blocks, names, log_s); the LR block is stored divided by exp(log_s).
+        """
+        self.phi_L, self.phi_R = psi_L, psi_R
+        a, b = c_L * psi_L, c_R * psi_R
+        pairs = {'LR': (a, b), 'LL': (a, a), 'RR': (b, b)}
+        names = ['LR'] if coherence_only else ['LR', 'LL', 'RR']
+        blocks = np.stack([np.outer(pairs[name][0], pairs[name][1].conj()) for name in names])
+        self._confine(blocks, names)
+        return blocks, names, 0.0
+
+    def _confine(self, blocks, names):
+        for block, name in zip(blocks, names):
+            rows, cols = self.quadrants[name]
+            block[:rows.start] = 0.0; block[rows.stop:] = 0.0
+            block[:, :cols.start] = 0.0; block[:, cols.stop:] = 0.0
+
+    def step(self, blocks, names, log_s):
+        """One split step for all blocks in place; returns the updated LR log scale"""
+        kbuf = self._kbuf[:len(blocks)]
+        np.fft.fft2(blocks, out=kbuf)
+        kbuf *= self.phase[:, None]
+        kbuf *= self.phase_conj[None, :]
+        np.fft.ifft2(kbuf, out=blocks)
+        blocks *= self.decay
+        self._confine(blocks, names)
+        if names and names[0] == 'LR':
+            peak = np.max(np.abs(blocks[0]))
+            if peak > 0:
+                blocks[0] /= peak
+                log_s += np.log(peak)
+        return log_s
+
+    def coherence(self, blocks, names, log_s):
+        """C = 2 |<phi_L| rho |phi_R>| (0 after pruning)"""
+        if not names or names[0] != 'LR':
+            return 0.0
+        overlap = np.vdot(self.phi_L, blocks[0] @ self.phi_R) * self.dx**2
+        return 2 * np.exp(log_s) * np.abs(overlap)
+
+    def populations(self, blocks, names):
+        return tuple(np.trace(blocks[names.index(name)]).real * self.dx for name in ('LL', 'RR'))
+
+    def run(self, psi_L, psi_R, steps, C_th=None, coherence_only=False):
+        """
+        Evolve the cat state for `steps` steps. Returns (C_track, snap_index, blocks, names);
+        C_track[i] is the coherence after i steps, snap_index is None without a snap.
+        """
+        blocks, names, log_s = self.init(psi_L, psi_R, coherence_only=coherence_only)
+        C_track = np.empty(steps + 1)
+        C_track[0] = self.coherence(blocks, names, log_s)
+        snap_index = None
+        for i in range(1, steps + 1):
+            if not names:
+                C_track[i:] = 0.0 # coherence-only run after pruning: nothing left to evolve
+                break
+            log_s = self.step(blocks, names, log_s)
+            C = self.coherence(blocks, names, log_s)
+            if snap_index is None and C_th is not None and C < C_th:
+                blocks, names = blocks[1:].copy(), names[1:] # rho -> sum_n P_n rho P_n
+                snap_index = i
+                C = 0.0
+            C_track[i] = C
+        return C_track, snap_index, blocks, names
+
+
+class GridLiouvillian:
+    """
+    Matrix-free Lindblad action rho -> L(rho) on a uniform grid, O(N^2) per call.
+
+    rho is the (N, N) matrix in the orthonormal grid basis (rho_ij = rho(x_i, x_j) dx,
+    so Tr rho = sum_i rho_ii, Tr rho^2 = sum_ij |rho_ij|^2). H = T + V with the
+    three-point kinetic term T = -hbar^2/2m d^2/dx^2 (Dirichlet boundaries); the
+    localisation kernels (rate, length) give -rate (1 - exp(-(x-x')^2 / 4 length^2)) rho
+    as in GridDensityEngine. The diagonal parts of T cancel in [T, rho], leaving
+    nearest-neighbour shifts along rows and columns.
+    """
+
+    def __init__(self, x, mass, kernels=(), V=None):
+        dx = x[1] - x[0]
+        self.t = hbar / (2 * mass * dx**2) # off-diagonal of T / hbar
+        v = np.zeros(len(x)) if V is None else np.asarray(V) / hbar
+        Gamma = np.zeros((len(x), len(x)))
+        d2 = (x[:, None] - x[None, :])**2
+        for rate, length in kernels:
+            Gamma += rate * -np.expm1(-d2 / (4 * length**2))
+        self.local = -1j * (v[:, None] - v[None, :]) - Gamma # elementwise part of L
+
+    def __call__(self, rho, out=None):
+        out = np.multiply(self.local, rho, out=out)
+        it = 1j * self.t
+        out[:-1] += it * rho[1:]       # -i/hbar [T, rho]: row neighbours ...
+        out[1:] += it * rho[:-1]
+        out[:, :-1] -= it * rho[:, 1:] # ... minus column neighbours
+        out[:, 1:] -= it * rho[:, :-1]
+        return out
+
+def expm_krylov(action, v, t, m=30, tol=1e-10):
+    """
+    exp(t A) v for a matrix-free A (action(v) -> A v, v of any shape) by Arnoldi
+    projection onto an m-dimensional Krylov space, in adaptive substeps h. The
+    basis does not depend on h, so a rejected substep only repeats the m x m
+    exponential. Substeps are accepted when the error estimate
+    beta h h_{m+1,m} |[exp(h H_m)]_{m,1}| is below tol * beta.
+
+    Returns (exp(t A) v, norms): norms holds beta = ||v|| at the start of each
+    substep (for rho, sqrt(Tr rho^2)).
+    """
+    from scipy.linalg import expm
+    V = np.empty((m + 1,) + v.shape, dtype=complex)
+    t_done, h, norms = 0.0, t, []
+    while t_done < t:
+        beta = np.sqrt(np.vdot(v, v).real)
+        norms.append(beta)
+        if beta == 0:
+            break
+        Hm = np.zeros((m + 1, m), dtype=complex)
+        V[0] = v / beta
+        k = m
+        for j in range(m):
+            w = action(V[j], out=V[j + 1])
+            for i in range(j + 1): # modified Gram-Schmidt
+                Hm[i, j] = np.vdot(V[i], w)
+                w -= Hm[i, j] * V[i]
+            norm_w = np.sqrt(np.vdot(w, w).real)
+            Hm[j + 1, j] = norm_w
+            if norm_w <= 1e-12 * beta: # invariant subspace: exact for any h
+                k = j + 1
+                break
+            w /= norm_w
+        h = min(h, t - t_done)
+        while True:
+            E = expm(h * Hm[:k, :k])
+            err = 0.0 if k < m else h * abs(Hm[k, k - 1]) * abs(E[k - 1, 0])
+            if err <= tol:
+                break
+            h *= 0.5
+        v = beta * np.tensordot(E[:, 0], V[:k], axes=1)
+        t_done += h
+        if err < 0.1 * tol:
+            h *= 2.0
+    return v, norms
+
+
+class KrylovDensityEngine:
+    """
+    Full density matrix rho(x, x') on a uniform grid, propagated exactly in time
+    (to the Krylov tolerance) between output times: rho(t + h) = exp(h L) rho with L
+    the GridLiouvillian. Memory is (m + 3) N x N complex arrays, ~2.1 GB for
+    N = 2000 and m = 30 (8.4 GB for N = 4000), so the 2000-point cat-state grid
+    fits on one node. Purity Tr rho^2 is the squared Krylov start norm of each
+    step, so the trigger proxy sqrt(1 - Tr rho^2) costs nothing extra.
+    """
+
+    def __init__(self, x, mass, kernels, V=None, m=30, tol=1e-10):
+        self.x = x
+        self.dx = x[1] - x[0]
+        self.action = GridLiouvillian(x, mass, kernels, V)
+        self.m, self.tol = m, tol
+
+    def init(self, psi):
+        """rho = |psi><psi| for a grid wavefunction normalised with dx"""
+        return np.outer(psi, psi.conj()) * self.dx
+
+    @staticmethod
+    def purity(rho):
+        return np.vdot(rho, rho).real
+
+    def step(self, rho, h):
+        """rho -> exp(h L) rho (re-Hermitised); returns (rho, Tr rho^2 at the start)"""
+        rho, norms = expm_krylov(self.action, rho, h, self.m, self.tol)
+        rho = 0.5 * (rho + rho.conj().T)
+        return rho, norms[0]**2
+
+    def run(self, psi, times):
+        """
+        Evolve |psi><psi| through the output times. Returns (rho, purity, C_track)
+        with purity[i] = Tr rho(times[i])^2 and C_track the proxy sqrt(1 - Tr rho^2).
+        """
+        rho = self.init(np.asarray(psi, dtype=complex))
+        purity = np.empty(len(times))
+        for i in range(1, len(times)):
+            rho, purity[i - 1] = self.step(rho, times[i] - times[i - 1])
+        purity[-1] = self.purity(rho)
+        return rho, purity, np.sqrt(np.clip(1.0 - purity, 0.0, None))
+
+
+def kernel_factors(x, dt, kernels, tol=1e-12, max_rank=1000):
+    """
+    Pivoted Cholesky factors U (q, N) of the per-step localisation factor
+    K(x, x') = exp(-Gamma(x - x') dt) ~= sum_j U_j(x) U_j(x'), so that
+    K * rho = sum_j diag(U_j) rho diag(U_j) is a sum of q Kraus terms.
+    K is built row by row on demand (O(N q) memory); pivoting stops once the
+    largest residual diagonal is below tol. Warns if max_rank is reached first.
+    """
+    def row(i):
+        d2 = (x - x[i])**2
+        Gamma = np.zeros(len(x))
+        for rate, length in kernels:
+            Gamma += rate * -np.expm1(-d2 / (4 * length**2))
+        return np.exp(-Gamma * dt)
+
+    residual = np.ones(len(x)) # K(x, x) = 1
+    U = np.empty((min(max_rank, len(x)), len(x)))
+    q = 0
+    while q < len(U) and residual.max() > tol:
+        i = int(np.argmax(residual))
+        u = row(i) - U[:q].T @ U[:q, i]
+        u /= np.sqrt(residual[i])
+        U[q] = u
+        residual -= u * u
+        q += 1
+    if residual.max() > tol:
+        warnings.warn(f"kernel_factors: max_rank={max_rank} reached with residual "
+                      f"{residual.max():.1e} > tol={tol:.0e}", RuntimeWarning, stacklevel=2)
+    return U[:q]
+
+
+class LowRankDensityEngine:
+    """
+    Density matrix rho(x, x') of a two-branch state in factored form, for grids of
+    10^4-10^5 points where N x N storage is out of reach.
+
+    rho = sum_{a,b in L,R} X_a S_ab X_b^dagger, where the columns of X_L (X_R) are
+    dx-orthonormal and supported left (right) of the split, and S is a small
+    Hermitian core. Keeping the sides apart means the cross block S_LR is never
+    added to O(1) numbers, so coherence far below round-off (C_th ~ 1e-20) stays
+    resolved, as the log scale does in GridDensityEngine.
+
+    Step: the kinetic phase is applied to every column by FFT; the localisation
+    factor K = exp(-Gamma(x - x') dt) (same kernels as GridDensityEngine) enters
+    through its Cholesky factors U_j, factored once on the whole grid, as the Kraus
+    sum rho_ab -> sum_j U_j X_a S_ab (U_j X_b)^dagger. Only rows where the columns
+    have weight (|X|^2 above tol of its peak) and factors with weight there are
+    used. The q r expanded columns are never formed: a randomized range finder
+    applies rho_aa to max_rank + oversample Gaussian columns, one factor at a time,
+    and the core is projected onto the orthonormalised sample, O(N q r (max_rank + p))
+    per step. Each side is then truncated to the eigen-directions of S_aa above
+    tol * Tr rho; the dropped cross weight is bounded by sqrt(lambda_dropped * ||S_bb||)
+    per direction. If max_rank binds, run() warns with the largest weight dropped
+    in one step (self.truncated).
+    DTC: once C = 2|<phi_L|rho|phi_R>| < C_th, S_LR is dropped (rho -> sum_n P_n rho P_n).
+    """
+
+    def __init__(self, x, dt, mass, kernels, x_split=0.0, tol=1e-12, max_rank=32,
+                 oversample=8, kernel_rank=1000, seed=0):
+        self.x = x
+        self.dx = x[1] - x[0]
+        self.tol, self.max_rank, self.oversample, self.seed = tol, max_rank, oversample, seed
+        n = np.searchsorted(x, x_split)
+        self.sides = (slice(0, n), slice(n, len(x)))
+        k = 2 * np.pi * np.fft.fftfreq(len(x), d=self.dx)
+        self.phase = np.exp(-1j * hbar * k**2 * dt / (2 * mass))
+        self.U = kernel_factors(x, dt, kernels, tol=tol, max_rank=kernel_rank)
+        self.rng, self.truncated = np.random.default_rng(seed), 0.0
+
+    def _confine(self, X, side):
+        keep = self.sides[side]
+        X[:keep.start] = 0.0
+        X[keep.stop:] = 0.0
+        return X
+
+    def _orthonormalise(self, X):
+        """X = Q R with Q^dagger Q dx = I"""
+        Q, R = np.linalg.qr(X * np.sqrt(self.dx))
+        return Q / np.sqrt(self.dx), R
+
+    def init(self, psi_L, psi_R, c_L=1/np.sqrt(2), c_R=1/np.sqrt(2)):
+        """State (X, S) of rho = |psi><psi|, psi = c_L psi_L + c_R psi_R (dx-normalised branches)"""
+        self.phi_L, self.phi_R = psi_L, psi_R
+        self.rng = np.random.default_rng(self.seed) # same sketches on every run
+        self.truncated = 0.0 # largest weight (fraction of Tr rho) dropped by max_rank in one step
+        X = [self._confine(np.array(psi_L, dtype=complex)[:, None], 0),
+             self._confine(np.array(psi_R, dtype=complex)[:, None], 1)]
+        c = np.array([c_L, c_R], dtype=complex)
+        S = {(a, b): np.array([[c[a] * np.conj(c[b])]]) for a in (0, 1) for b in (0, 1)}
+        return X, S
+
+    def _range(self, U, Xa, Saa):
+        """dx-orthonormal basis of the range of sum_j U_j Xa Saa (U_j Xa)^dagger, sampled"""
+        k = min(U.shape[0] * Xa.shape[1], self.max_rank + self.oversample)
+        omega = self.rng.standard_normal((len(Xa), k)) + 1j * self.rng.standard_normal((len(Xa), k))
+        Y = np.zeros_like(omega)
+        for u in U:
+            UX = u[:, None] * Xa
+            Y += u[:, None] * (Xa @ (Saa @ (UX.conj().T @ omega)))
+        return self._orthonormalise(Y)[0]
+
+    def step(self, X, S, coherent=True):
+        """One split step; returns the new (X, S). coherent=False: S_LR already pruned."""
+        for a in (0, 1):
+            X[a] = self._confine(np.fft.ifft(self.phase[:, None] * np.fft.fft(X[a], axis=0), axis=0), a)
+        weight = sum(np.sum(np.abs(Xa)**2, axis=1) for Xa in X)
+        active = np.flatnonzero(weight > self.tol * weight.max())
+        U = self.U[:, active]
+        U = U[np.max(U * U, axis=1) > self.tol] # factors without weight on the packets
+        Xact = [Xa[active] for Xa in X]
+        Q = [self._range(U, Xact[a], S[a, a]) for a in (0, 1)]
+        pairs = ((0, 0), (1, 1), (0, 1)) if coherent else ((0, 0), (1, 1))
+        S_new = {ab: np.zeros((Q[ab[0]].shape[1], Q[ab[1]].shape[1]), dtype=complex) for ab in pairs}
+        for u in U: # S_ab -> sum_j B_aj S_ab B_bj^dagger, B_aj = Q_a^dagger U_j X_a dx
+            B = [Q[a].conj().T @ (u[:, None] * Xact[a]) * self.dx for a in (0, 1)]
+            for a, b in pairs:
+                S_new[a, b] += B[a] @ S[a, b] @ B[b].conj().T
+        S = S_new
+        trace = sum(np.trace(S[a, a]).real for a in (0, 1))
+        V = [None, None]
+        for a in (0, 1): # truncate each side to its significant directions
+            lam, vec = np.linalg.eigh(S[a, a])
+            order = np.argsort(lam)[::-1]
+            above = order[lam[order] > self.tol * trace]
+            self.truncated = max(self.truncated, lam[above[self.max_rank:]].sum() / trace)
+            keep = above[:self.max_rank]
+            V[a] = vec[:, keep]
+            X[a] = np.zeros((len(self.x), len(keep)), dtype=complex)
+            X[a][active] = Q[a] @ V[a]
+            S[a, a] = np.diag(lam[keep]).astype(complex)
+        if coherent:
+            S[0, 1] = V[0].conj().T @ S[0, 1] @ V[1]
+        S[1, 0] = S[0, 1].conj().T if coherent else None
+        return X, S
+
+    def coherence(self, X, S):
+        """C = 2 |<phi_L| rho |phi_R>|, O(N r)"""
+        if S.get((0, 1)) is None:
+            return 0.0
+        a = self.phi_L.conj() @ X[0] * self.dx
+        b = X[1].conj().T @ self.phi_R * self.dx
+        return 2 * np.abs(a @ S[0, 1] @ b)
+
+    @staticmethod
+    def purity(S):
+        """Tr rho^2 from the core alone (orthonormal columns): O(r^2)"""
+        total = sum(np.sum(np.abs(S[a, a])**2) for a in (0, 1))
+        return total + (2 * np.sum(np.abs(S[0, 1])**2) if S.get((0, 1)) is not None else 0.0)
+
+    def populations(self, S):
+        return tuple(np.trace(S[a, a]).real for a in (0, 1))
+
+    def factor(self, X, S):
+        """W with rho = W W^dagger dx, for the dtc.measures *_lowrank functions"""
+        Xf = np.concatenate(X, axis=1)
+        zero = np.zeros((X[0].shape[1], X[1].shape[1]), dtype=complex)
+        S01 = S[0, 1] if S.get((0, 1)) is not None else zero
+        core = np.block([[S[0, 0], S01], [S01.conj().T, S[1, 1]]])
+        lam, vec = np.linalg.eigh(core)
+        return Xf @ (vec * np.sqrt(np.clip(lam, 0.0, None)))
+
+    def run(self, psi_L, psi_R, steps, C_th=None):
+        """
+        Evolve the cat state for `steps` steps. Returns (C_track, snap_index, X, S, ranks);
+        C_track[i] is the coherence after i steps, ranks[i] the (left, right) ranks.
+        """
+        X, S = self.init(psi_L, psi_R)
+        C_track = np.empty(steps + 1)
+        ranks = np.empty((steps + 1, 2), dtype=int)
+        C_track[0], ranks[0] = self.coherence(X, S), (1, 1)
+        snap_index, coherent = None, True
+        for i in range(1, steps + 1):
+            X, S = self.step(X, S, coherent)
+            C = self.coherence(X, S)
+            if snap_index is None and C_th is not None and C < C_th:
+                S[0, 1] = S[1, 0] = None # rho -> sum_n P_n rho P_n
+                snap_index, coherent, C = i, False, 0.0
+            C_track[i] = C
+            ranks[i] = (X[0].shape[1], X[1].shape[1])
+        if self.truncated > 0:
+            warnings.warn(f"LowRankDensityEngine: max_rank={self.max_rank} binds, up to "
+                          f"{self.truncated:.1e} of Tr rho dropped per step", RuntimeWarning, stacklevel=2)
+        return C_track, snap_index, X, S, ranks
@@ -0,0 +1,286 @@
+# dtc_bench.py
+# Benchmarks for the DTC solvers with JSON baselines.
+# Each case times one workload (best of `repeat` runs), reports its throughput
+# (steps/s, trajectories/s or evaluations/s) and the peak traced allocation, and
+# sweeps one size axis (num_traj, steps, grid size, batch size or workers).
+#
+#   python dtc_bench.py                  run and compare with bench_baseline.json
+#   python dtc_bench.py --save           run and write the baseline
+#   python dtc_bench.py --quick -k mcwf  small sizes, only cases matching 'mcwf'
+#   python dtc_bench.py --tolerance 25   flag throughput drops beyond 25 %
+# Exit status is 1 when any case regressed beyond the tolerance.
+
+import os
+import sys
+import json
+import time
+import platform
+import tracemalloc
+import numpy as np
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench_baseline.json')
+
+def measure(fn, repeat=3):
+    """(best wall time in s, peak traced memory in MB) of fn()"""
+    best = np.inf
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak / 1e6
+
+# --- Cases: each returns {size: (fn, work, unit)} ---
+# MCWF workload: the module defaults start at C = C_th, where every trajectory
+# prunes on its first step; this trigger lets trajectories run, jump and prune.
+MCWF_WORKLOAD = dict(steps=5000, Gamma_0=4e7, kappa=10.0)
+
+def _mcwf_shard(n, rng, sampling, params):
+    from dtc import mcwf
+    mcwf.configure(**params)
+    run_one = mcwf.SAMPLERS[sampling]
+    ops = mcwf.make_backend('numpy')
+    for _ in range(n):
+        run_one(ops, rng)
+
+def case_mcwf_steps(quick):
+    """Strict MCWF, per-step sampler: one trajectory over `steps` grid points"""
+    def make(steps):
+        def fn():
+            _mcwf_shard(1, np.random.default_rng(0), 'grid', dict(MCWF_WORKLOAD, steps=steps))
+        return fn, steps, 'steps/s'
+    return {s: make(s) for s in ((500, 2000) if quick else (1000, 5000, 20000))}
+
+def case_mcwf_num_traj(quick):
+    """Strict MCWF, waiting-time sampler: num_traj trajectories of 5000 steps"""
+    def make(n):
+        def fn():
+            _mcwf_shard(n, np.random.default_rng(0), 'waiting_time', MCWF_WORKLOAD)
+        return fn, n, 'traj/s'
+    return {n: make(n) for n in ((20, 80) if quick else (100, 400, 1600))}
+
+def case_mcwf_workers(quick):
+    """Waiting-time MCWF ensemble sharded over a process pool of `workers`"""
+    from dtc_parallel import run_sharded
+    n = 200 if quick else 2000
+    def make(w):
+        def fn():
+            run_sharded(_mcwf_shard, n, 50, seed=0, workers=w, args=('waiting_time', MCWF_WORKLOAD))
+        return fn, n, 'traj/s'
+    sizes = sorted({1, 2, os.cpu_count() or 1})
+    return {w: make(w) for w in sizes}
+
+def case_lindblad_batch(quick):
+    """Batched Lindblad loop (dtc_batch, RK4): B density matrices x 1000 steps"""
+    from dtc_batch import evolve_batch
+    from dtc.physics import sig_z, P_L, P_R
+    rho0 = np.full((2, 2), 0.5, dtype=complex)
+    def make(B):
+        gammas = np.linspace(0.05, 1.0, B)
+        def fn():
+            evolve_batch(rho0, sig_z, [sig_z], gammas, 0.005, 1000, projectors=(P_L, P_R), C_th=0.15)
+        return fn, B * 1000, 'steps/s'
+    return {B: make(B) for B in ((1, 100) if quick else (1, 100, 10000))}
+
+def case_density_collapse(quick):
+    """
+    density_matrix_collapse.py integrators on its 2x2 model: the DTC run up to the
+    snap plus the full QM run, on the script's 3000-point output grid
+    """
+    from dtc.density import integrate_adaptive
+    from dtc.physics import sig_z, commutator, lindblad_dissipator, coherence
+    dt, steps, gamma, C_th = 0.005, 3000, 0.3, 0.15
+    times = np.linspace(0, steps * dt, steps)
+    rho0 = np.full((2, 2), 0.5, dtype=complex)
+    def rhs(t, rho):
+        return -1j * commutator(sig_z, rho) + gamma * lindblad_dissipator(sig_z, rho)
+    def adaptive():
+        for event in (lambda rho: coherence(rho) - C_th, None):
+            integrate_adaptive(rhs, rho0, (times[0], times[-1]), t_eval=times, event=event,
+                               rtol=1e-8, atol=1e-10)
+    def euler():
+        for stop_below in (C_th, None):
+            rho = rho0.copy()
+            for t in times:
+                if stop_below is not None and coherence(rho) < stop_below:
+                    break
+                rho = rho + rhs(t, rho) * dt
+                rho = rho / np.trace(rho)
+    return {'adaptive': (adaptive, steps, 'steps/s'), 'euler': (euler, steps, 'steps/s')}
+
+def case_lindblad_propagator(quick):
+    """Single density matrix with the cached exp(L dt) propagator: `steps` mat-vecs"""
+    from dtc.density import propagator
+    from dtc.physics import sig_z, P_L, P_R
+    U = propagator(sig_z, [sig_z], [0.3], 0.005, projectors=(P_L, P_R))
+    def make(steps):
+        def fn():
+            v = np.full(4, 0.5, dtype=complex)
+            for _ in range(steps):
+                v = U @ v
+        return fn, steps, 'steps/s'
+    return {s: make(s) for s in ((1000,) if quick else (3000, 30000))}
+
+def case_lindblad_spectral(quick):
+    """Cached Liouvillian eigenbasis: coherence curve at T times plus the snap-time solve"""
+    from dtc.density import spectral
+    from dtc.physics import sig_z, P_L, P_R
+    solver = spectral(sig_z, [sig_z], [0.3], projectors=(P_L, P_R))
+    rho0 = np.full((2, 2), 0.5, dtype=complex)
+    def make(T):
+        t = np.linspace(0, 15, T)
+        def fn():
+            solver.coherence(rho0, t)
+            solver.crossing(rho0, 0.15, 15)
+        return fn, T, 'times/s'
+    return {T: make(T) for T in ((3000,) if quick else (3000, 30000))}
+
+def case_cat_coherence(quick):
+    """Cat-state l1 coherence on a grid of N points (O(N) functional)"""
+    from dtc.measures import l1_coherence
+    from dtc.physics import cat_states
+    def make(N):
+        x = np.linspace(-400e-9, 400e-9, N)
+        psi_L, psi_R = cat_states(x, 100e-9, 5e-9)
+        psi = (psi_L + psi_R) / np.sqrt(2)
+        def fn():
+            for _ in range(100):
+                l1_coherence(psi, x[1] - x[0])
+        return fn, 100, 'evals/s'
+    return {N: make(N) for N in ((2000, 20000) if quick else (2000, 20000, 200000))}
+
+def case_cat_spatial(quick):
+    """Split-step FFT cat-state engine: 200 steps on a grid of N points"""
+    from dtc.spatial import SplitStepEngine
+    from dtc.physics import cat_states
+    def make(N):
+        x = np.linspace(-400e-9, 400e-9, N)
+        psi_L, psi_R = cat_states(x, 100e-9, 5e-9)
+        psi = (psi_L + psi_R) / np.sqrt(2)
+        def fn():
+            engine = SplitStepEngine(x, 1e-8, 1e-18, 1e6, 100e-9, rng=np.random.default_rng(0))
+            engine.run(psi, 200, C_th=1e-20)
+        return fn, 200, 'steps/s'
+    return {N: make(N) for N in ((512, 2048) if quick else (512, 2048, 8192))}
+
+def case_krylov_density(quick):
+    """Krylov exp(t L) rho(x, x') with the matrix-free Liouvillian: 10 output steps on N points"""
+    from dtc.spatial import KrylovDensityEngine
+    from dtc.physics import cat_states
+    def make(N):
+        x = np.linspace(-400e-9, 400e-9, N)
+        psi_L, psi_R = cat_states(x, 100e-9, 5e-9)
+        psi = (psi_L + psi_R) / np.sqrt(2)
+        engine = KrylovDensityEngine(x, 1e-18, [(1e6, 100e-9)])
+        def fn():
+            engine.run(psi, np.linspace(0, 2e-6, 11))
+        return fn, 10, 'steps/s'
+    return {N: make(N) for N in ((100, 200) if quick else (200, 500))}
+
+def case_lowrank_density(quick):
+    """Factored rho = X S X^dagger (LowRankDensityEngine): 20 steps on N points"""
+    from dtc.spatial import LowRankDensityEngine
+    from dtc.physics import cat_states
+    def make(N):
+        x = np.linspace(-400e-9, 400e-9, N)
+        psi_L, psi_R = cat_states(x, 100e-9, 5e-9)
+        engine = LowRankDensityEngine(x, 5e-6, 1e-18, [(1e5, 10e-9)])
+        def fn():
+            engine.run(psi_L, psi_R, 20)
+        return fn, 20, 'steps/s'
+    return {N: make(N) for N in ((500, 1000) if quick else (1000, 2000, 5000))}
+
+def case_parameter_space(quick):
+    """Allowed-region boundary of parameter_space.py by quadtree refinement (depth d)"""
+    from dtc_contour import refine_boundary
+    evals = {}
+    def allowed(G, C):
+        return (C < 1e-15) & (G * C < 1e10)
+    def make(depth):
+        def fn():
+            evals[depth] = refine_boundary(allowed, (1e16, 1e30), (1e-25, 1e-5), depth=depth)[2]
+        fn()
+        return fn, evals[depth], 'evals/s'
+    return {d: make(d) for d in ((3, 5) if quick else (3, 5, 7))}
+
+CASES = {
+    'mcwf_steps': case_mcwf_steps,
+    'mcwf_num_traj': case_mcwf_num_traj,
+    'mcwf_workers': case_mcwf_workers,
+    'lindblad_batch': case_lindblad_batch,
+    'density_collapse': case_density_collapse,
+    'lindblad_propagator': case_lindblad_propagator,
+    'lindblad_spectral': case_lindblad_spectral,
+    'cat_coherence': case_cat_coherence,
+    'cat_spatial': case_cat_spatial,
+    'krylov_density': case_krylov_density,
+    'lowrank_density': case_lowrank_density,
+    'parameter_space': case_parameter_space,
+}
+
+# --- Running and comparing ---
+def run(select=None, quick=False, repeat=3):
+    """
+    {'case[size]': {'seconds', 'rate', 'unit', 'peak_mb'}} for the selected cases.
+    The MCWF module parameters are restored after each case.
+    """
+    from dtc import mcwf
+    saved = {name: getattr(mcwf, name) for name in mcwf.PARAMS}
+    results = {}
+    for name, case in CASES.items():
+        if select and select not in name:
+            continue
+        try:
+            for size, (fn, work, unit) in case(quick).items():
+                seconds, peak = measure(fn, repeat)
+                key = f'{name}[{size}]'
+                results[key] = dict(seconds=seconds, rate=work / seconds, unit=unit, peak_mb=peak)
+                print(f"{key:<32} {work / seconds:12.4g} {unit:<8} {seconds*1e3:9.1f} ms  {peak:8.1f} MB")
+        finally:
+            mcwf.configure(**saved)
+    return results
+
+def machine():
+    return dict(python=platform.python_version(), numpy=np.__version__,
+                machine=platform.machine(), processor=platform.processor(), cpus=os.cpu_count())
+
+def save_baseline(results, path=BASELINE):
+    with open(path, 'w') as f:
+        json.dump(dict(machine=machine(), results=results), f, indent=2, sort_keys=True)
+
+def compare(results, path=BASELINE, tolerance=20.0):
+    """
+    Cases whose throughput dropped by more than `tolerance` percent against the
+    baseline, as {key: (baseline rate, rate, change in %)}
+    """
+    with open(path) as f:
+        baseline = json.load(f)
+    if baseline.get('machine') != machine():
+        print("Note: baseline was recorded on a different machine/software stack")
+    regressions = {}
+    for key, r in results.items():
+        ref = baseline['results'].get(key)
+        if ref is None:
+            continue
+        change = 100.0 * (r['rate'] / ref['rate'] - 1.0)
+        if change < -tolerance:
+            regressions[key] = (ref['rate'], r['rate'], change)
+    return regressions
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    opt = lambda flag, default: args[args.index(flag) + 1] if flag in args else default
+    results = run(select=opt('-k', None), quick='--quick' in args, repeat=int(opt('--repeat', 3)))
+    if '--save' in args:
+        save_baseline(results)
+        print(f"Baseline written to {BASELINE}")
+    elif os.path.exists(BASELINE):
+        regressions = compare(results, tolerance=float(opt('--tolerance', 20.0)))
+        for key, (ref, rate, change) in regressions.items():
+            print(f"REGRESSION {key}: {ref:.4g} -> {rate:.4g} ({change:+.1f}%)")
+        sys.exit(1 if regressions else 0)
+    else:
+        print("No baseline yet; rerun with --save to record one")
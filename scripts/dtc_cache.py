@@ -0,0 +1,92 @@
+# dtc_cache.py
+# Content-addressed cache for simulation outputs.
+# An entry is keyed by the SHA-256 of the physical parameters, solver settings, seed
+# and the source of the code that produced it, and stored as one .npz file, so a
+# figure script whose inputs are unchanged loads its arrays instead of rerunning.
+# Entries are written atomically; reads refresh their mtime and the least recently
+# used ones are evicted once the directory exceeds max_bytes.
+#
+#   cache = ResultCache()
+#   key = cache_key(params, code_version(__file__, 'dtc_stream.py'))
+#   arrays = cache.get(key)
+#   if arrays is None:
+#       arrays = cache.put(key, **simulate())
+
+import os
+import glob
+import json
+import hashlib
+import numpy as np
+
+def code_version(*sources):
+    """SHA-256 over the contents of the given source files (paths or modules)"""
+    h = hashlib.sha256()
+    here = os.path.dirname(os.path.abspath(__file__))
+    for src in sources:
+        path = getattr(src, '__file__', src)
+        if not os.path.exists(path):
+            path = os.path.join(here, path)
+        with open(path, 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+def cache_key(params, code=''):
+    """Key of a run: canonical JSON of params (sorted, NumPy values as lists) plus code version"""
+    default = lambda v: v.tolist() if hasattr(v, 'tolist') else repr(v)
+    blob = json.dumps(params, sort_keys=True, default=default) + code
+    return hashlib.sha256(blob.encode()).hexdigest()
+
+class ResultCache:
+    """Directory of <key>.npz entries with size-bounded LRU eviction"""
+
+    def __init__(self, path='.dtc_cache', max_bytes=2 * 1024**3):
+        self.path = path
+        self.max_bytes = max_bytes
+        os.makedirs(path, exist_ok=True)
+
+    def _file(self, key):
+        return os.path.join(self.path, key + '.npz')
+
+    def __contains__(self, key):
+        return os.path.exists(self._file(key))
+
+    def get(self, key):
+        """Stored arrays as a dict, or None on a miss"""
+        name = self._file(key)
+        try:
+            with np.load(name, allow_pickle=False) as f:
+                arrays = {k: f[k] for k in f.files}
+        except (FileNotFoundError, OSError, ValueError):
+            return None
+        os.utime(name) # mark as recently used
+        return arrays
+
+    def put(self, key, **arrays):
+        """Store arrays under key (atomic replace), evict if over budget; returns arrays"""
+        tmp = self._file(key) + f'.{os.getpid()}.tmp'
+        with open(tmp, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp, self._file(key))
+        self.evict()
+        return arrays
+
+    def invalidate(self, key=None):
+        """Drop one entry, or every entry when key is None"""
+        names = [self._file(key)] if key is not None else glob.glob(os.path.join(self.path, '*.npz'))
+        for name in names:
+            if os.path.exists(name):
+                os.remove(name)
+
+    def size(self):
+        return sum(os.path.getsize(n) for n in glob.glob(os.path.join(self.path, '*.npz')))
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits in max_bytes"""
+        entries = sorted((os.path.getmtime(n), os.path.getsize(n), n)
+                         for n in glob.glob(os.path.join(self.path, '*.npz')))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in entries:
+            if total <= self.max_bytes:
+                break
+            os.remove(name)
+            total -= size
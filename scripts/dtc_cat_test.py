@@ -7,6 +7,11 @@ import matplotlib.pyplot as plt
 import sys
 import os
 import matplotlib.patches as mpatches
+from dtc.physics import cat_states
+from dtc.scenarios import cat_coherence
+from dtc.measures import l1_coherence
+from dtc.spatial import SplitStepEngine, KrylovDensityEngine
+from dtc_cache import ResultCache, cache_key, code_version
 
 # --- 1. ROBUST MATPLOTLIB BACKEND SETUP ---
 try:
@@ -20,6 +25,13 @@ Delta_x = 100e-9            # 100 nm separation
 sigma_x = 5e-9              # packet width
 gamma_env = 1e4             # decoherence rate (s^-1)
 C_th = 1e-20                # DTC threshold
+mass = 1e-18                # kg, ~100 nm silica sphere
+r_loc = Delta_x             # localisation length of the environmental jumps
+engine = 'analytic'         # 'analytic' (closed-form decay) or 'spatial' (split-step FFT on the x grid)
+# Purity proxy sqrt(1 - Tr rho^2) from a full Lindblad solve of rho(x, x') on the grid
+# (KrylovDensityEngine, ~2 GB at 2000 points), at this many output times; 0 = off
+krylov_points = 0
+cache_dir = '.dtc_cache'    # result cache for the Krylov run (dtc_cache), None = off
 
 # CALCULATED DECOHERENCE RATE: Gamma = 10^6 s^-1. Snap time ≈ 46 µs.
 t_final = 200e-6 # Set to 200 µs to capture the 46 µs snap point
@@ -32,18 +44,14 @@ x = np.linspace(-400e-9, 400e-9, 2000)
 dx = x[1] - x[0]
 
 # === INITIAL STATE SETUP ===
-psi_L = np.exp(-(x + Delta_x/2)**2 / (4*sigma_x**2))
-psi_R = np.exp(-(x - Delta_x/2)**2 / (4*sigma_x**2))
-psi_L /= np.sqrt(np.sum(np.abs(psi_L)**2) * dx)
-psi_R /= np.sqrt(np.sum(np.abs(psi_R)**2) * dx)
+psi_L, psi_R = cat_states(x, Delta_x, sigma_x)
 psi_cat = (psi_L + psi_R) / np.sqrt(2)
 
 # === COHERENCE FUNCTION (Used only for initial state C(0) and final state C_dtc) ===
 def coh(psi):
-    # Approximation for coherence C(t) = 2|ρ_LR|
-    rho = np.outer(psi, psi.conj())
-    # Return 2 * |Off-diagonal coherence term| (Approximation)
-    return np.sum(np.abs(rho - np.diag(np.diag(rho)))) * dx
+    # Approximation for coherence C(t) = 2|ρ_LR|: l1 off-diagonal sum of ρ = |ψ><ψ|,
+    # evaluated in O(N) as (Σ|ψ|)² − Σ|ψ|² without forming the N×N outer product
+    return l1_coherence(psi, dx)
 
 # === DTC SIMULATION ===
 print("\n[STARTING] Running DTC Simulation...")
@@ -51,36 +59,51 @@ sys.stdout.flush()
 
 # --- CORE SIMULATION LOGIC ---
 psi = psi_cat.copy()
-# Start all coherence tracking from 1.0 for a clean exponential decay plot
-C_dtc_track = [1.0]
-C_deco_track = [1.0]
 triggered = False
 t_trigger = None
 
-# Correct decay rate is Gamma = gamma_env * (Delta_x / 2sigma_x)^2
-Gamma_deco = gamma_env * (Delta_x**2) / (4*sigma_x**2)
-decay_factor = np.exp(-Gamma_deco * dt)
-
 try:
-    for i in range(1, steps):
-        # 1. Pure Decoherence step
-        C_deco_next = C_deco_track[-1] * decay_factor
-        
-        # 2. DTC logic
-        if not triggered:
-            C_dtc_next = C_deco_next
-            if C_dtc_next < C_th:
-                # INSTANT COLLAPSE TRIGGERED
-                psi = psi_L if np.random.rand() < 0.5 else psi_R # Collapse to L or R
-                triggered = True
-                t_trigger = times[i]
-                C_dtc_next = 1e-40 # Set value very low to record snap, though we will slice it out in plotting
+    # Pure exponential decay at Gamma = gamma_env * (Delta_x / 2sigma_x)^2: the snap time
+    # and both curves are closed-form, C(t) = exp(-Gamma_deco t) crosses C_th at
+    # t = ln(1/C_th) / Gamma_deco
+    Gamma_deco, t_snap, branch, C_deco_track, C_dtc_track = cat_coherence(
+        times, gamma_env, Delta_x, sigma_x, C_th, p_L=0.5,
+        floor=1e-40) # Value very low to record snap, though we will slice it out in plotting
+    if engine == 'spatial':
+        # Evolve psi_cat itself: free evolution + localisation jumps, DTC trigger on the state
+        lam = SplitStepEngine.rate_for(Gamma_deco, Delta_x, r_loc)
+        spatial = SplitStepEngine(x, dt, mass, lam, r_loc)
+        psi, C_traj, snap_step, branch = spatial.run(psi_cat, steps, C_th)
+        C_dtc_track = C_traj.copy()
+        if snap_step is not None:
+            C_dtc_track[snap_step:] = 1e-40
+            triggered = True
+            t_trigger = times[snap_step]
+    elif t_snap <= times[-1]:
+        # INSTANT COLLAPSE TRIGGERED
+        psi = psi_L if branch == 'L' else psi_R # Collapse to L or R
+        triggered = True
+        t_trigger = t_snap
+
+    proxy_track = None
+    if krylov_points:
+        lam = SplitStepEngine.rate_for(Gamma_deco, Delta_x, r_loc)
+        t_proxy = np.linspace(0, t_final, krylov_points)
+        cache = ResultCache(cache_dir) if cache_dir else None
+        if cache and '--clear-cache' in sys.argv:
+            cache.invalidate()
+        key = cache_key(dict(x=[x[0], x[-1], len(x)], Delta_x=Delta_x, sigma_x=sigma_x, mass=mass,
+                             kernels=[(lam, np.sqrt(2) * r_loc)], t_proxy=t_proxy),
+                        code_version('dtc/spatial.py', 'dtc/physics.py'))
+        entry = cache.get(key) if cache else None
+        if entry is not None:
+            print(f"Loaded Krylov run from cache {key[:12]}")
+            purity_track, proxy_track = entry['purity'], entry['proxy']
         else:
-            # DTC is already triggered
-            C_dtc_next = 1e-40
-
-        C_dtc_track.append(C_dtc_next)
-        C_deco_track.append(C_deco_next)
+            krylov = KrylovDensityEngine(x, mass, [(lam, np.sqrt(2) * r_loc)])
+            _, purity_track, proxy_track = krylov.run(psi_cat, t_proxy)
+            if cache:
+                cache.put(key, purity=purity_track, proxy=proxy_track)
 
     print("[100%] Simulation complete.")
     sys.stdout.flush()
@@ -90,6 +113,10 @@ try:
     print("Simulation Key Results (Calculations Completed):")
     print(f"Decoherence Threshold (C_th): {C_th:.1e}")
     print(f"Decoherence Rate (Gamma_deco): {Gamma_deco:.2e} s^-1")
+    print(f"Grid coherence: C(0) = {coh(psi_cat):.3e}, C_final = {coh(psi):.3e}")
+    if proxy_track is not None:
+        print(f"Purity proxy sqrt(1 - Tr rho^2): {proxy_track[0]:.3e} -> {proxy_track[-1]:.3e} "
+              f"(Tr rho^2 = {purity_track[-1]:.6f})")
     if t_trigger:
         print(f"✅ DTC Collapse Triggered at t = {t_trigger*1e6:.1f} µs")
     else:
@@ -111,8 +138,8 @@ if simulation_success:
     try:
         # Determine the index where the collapse occurred
         if t_trigger:
-            # Find the index of the collapse time
-            snap_index = np.where(times == t_trigger)[0][0]
+            # Index of the first grid point at or after the collapse time
+            snap_index = np.searchsorted(times, t_trigger)
         else:
             snap_index = len(times) # Plot full length if no collapse
 
@@ -142,6 +169,9 @@ if simulation_success:
         # The gray line continues for the full duration
         plt.semilogy(times*1e6, C_deco_track, 'gray', lw=2, ls='--', label='Pure Decoherence (Exponential Decay)')
         
+        if proxy_track is not None:
+            plt.semilogy(t_proxy*1e6, proxy_track, 'green', lw=2, label=r'Purity proxy $\sqrt{1-{\rm Tr}\rho^2}$ (Krylov)')
+
         plt.axhline(C_th, color='orange', ls='--', lw=2, label=r'$C_{\rm th}=10^{-20}$')
         
         if t_trigger:
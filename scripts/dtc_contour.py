@@ -0,0 +1,123 @@
+# dtc_contour.py
+# Adaptive extraction of the allowed/forbidden boundary of a 2D parameter map.
+# A quadtree over the (optionally log-scaled) plane splits only the cells whose
+# corners disagree, so model evaluations concentrate along the boundary: a map that
+# needs an N x N uniform grid costs O(N) evaluations instead of O(N^2). Boundary
+# crossings on the finest cell edges are then bisected, and each returned vertex
+# comes with the allowed/forbidden pair that brackets it.
+# Features smaller than the initial cells (n0 x n0) can be missed, as with any
+# corner-sampled refinement; raise n0 if the boundary has small islands.
+
+import numpy as np
+
+def _chain(segments):
+    """Join segments (pairs of node ids) into polylines, walking open ends first"""
+    links = {}
+    for a, b in segments:
+        links.setdefault(a, []).append(b)
+        links.setdefault(b, []).append(a)
+    seen, lines = set(), []
+    starts = [n for n in links if len(links[n]) == 1] + list(links)
+    for start in starts:
+        if start in seen:
+            continue
+        line, node = [start], start
+        seen.add(start)
+        while True:
+            nxt = [n for n in links[node] if n not in seen]
+            if not nxt:
+                break
+            node = nxt[0]
+            seen.add(node)
+            line.append(node)
+        if len(line) > 2 and start in links[node]:
+            line.append(start) # closed loop
+        lines.append(line)
+    return lines
+
+def refine_boundary(allowed, x_range, y_range, log=(True, True), n0=16, depth=5, bisect=12):
+    """
+    Boundary of the region where allowed(x, y) is True.
+
+    allowed is vectorised: it takes equal-length arrays x, y and returns a bool array.
+    The plane is cut into n0 x n0 cells and mixed cells are halved `depth` times;
+    crossings on the finest edges are bisected `bisect` times (in the scaled
+    coordinates, so the bracket is 2^-bisect of a finest cell edge).
+
+    Returns (polylines, brackets, n_evals): polylines is a list of (m, 2) arrays of
+    (x, y) vertices, brackets the matching (m, 2, 2) arrays holding for each vertex
+    the allowed and the forbidden point that enclose the true crossing.
+    """
+    log = np.broadcast_to(log, 2)
+    lo = np.array([np.log10(r[0]) if l else r[0] for r, l in zip((x_range, y_range), log)])
+    hi = np.array([np.log10(r[1]) if l else r[1] for r, l in zip((x_range, y_range), log)])
+    N = n0 * 2**depth # finest lattice: corners (i, j), 0 <= i, j <= N
+
+    def to_xy(u):
+        """Scaled lattice coordinates (..., 2) in units of the finest cell -> physical (x, y)"""
+        s = lo + (hi - lo) * np.asarray(u, dtype=float) / N
+        return np.where(log, 10.0**s, s)
+
+    n_evals = 0
+    def evaluate(u):
+        nonlocal n_evals
+        n_evals += len(u)
+        xy = to_xy(u)
+        return np.asarray(allowed(xy[:, 0], xy[:, 1]), dtype=bool)
+
+    cache = {}
+    def corners(cells):
+        """Allowed flags at the four corners of each (i, j, size) cell: (n, 4)"""
+        offs = np.array([[0, 0], [1, 0], [1, 1], [0, 1]])
+        pts = (cells[:, None, :2] + offs * cells[:, None, 2:3]).reshape(-1, 2)
+        keys = list(map(tuple, pts.tolist()))
+        new = sorted(set(k for k in keys if k not in cache))
+        if new:
+            cache.update(zip(new, evaluate(np.array(new)).tolist()))
+        return np.array([cache[k] for k in keys]).reshape(-1, 4)
+
+    size = 2**depth
+    ii, jj = np.meshgrid(np.arange(n0) * size, np.arange(n0) * size, indexing='ij')
+    cells = np.stack([ii.ravel(), jj.ravel(), np.full(ii.size, size)], axis=1)
+    for level in range(depth + 1):
+        flags = corners(cells)
+        mixed = flags.any(axis=1) & ~flags.all(axis=1)
+        cells, flags = cells[mixed], flags[mixed]
+        if level == depth or not len(cells):
+            break
+        half = cells[:, 2:3] // 2
+        cells = np.concatenate([np.column_stack([cells[:, :2] + d * half, half[:, 0]])
+                                for d in ([0, 0], [1, 0], [0, 1], [1, 1])])
+
+    # Crossing edges of the finest mixed cells, in order bottom, right, top, left
+    edges, segments = {}, []
+    for (i, j, s), f in zip(cells.tolist(), flags):
+        c = [(i, j), (i + s, j), (i + s, j + s), (i, j + s)]
+        crossing = []
+        for k in range(4):
+            if f[k] != f[(k + 1) % 4]:
+                a, b = c[k], c[(k + 1) % 4]
+                key = (a, b) if f[k] else (b, a) # (allowed end, forbidden end)
+                node = tuple(sorted(key))
+                edges[node] = key
+                crossing.append(node)
+        segments += [tuple(crossing[k:k + 2]) for k in range(0, len(crossing) - 1, 2)]
+    if not edges:
+        return [], [], n_evals
+
+    # Bisect every crossing edge at once
+    nodes = list(edges)
+    a = np.array([edges[n][0] for n in nodes], dtype=float)
+    b = np.array([edges[n][1] for n in nodes], dtype=float)
+    for _ in range(bisect):
+        mid = 0.5 * (a + b)
+        ok = evaluate(mid)
+        a[ok], b[~ok] = mid[ok], mid[~ok]
+    index = {n: k for k, n in enumerate(nodes)}
+
+    polylines, brackets = [], []
+    for line in _chain(segments):
+        k = [index[n] for n in line]
+        polylines.append(to_xy(0.5 * (a[k] + b[k])))
+        brackets.append(np.stack([to_xy(a[k]), to_xy(b[k])], axis=1))
+    return polylines, brackets, n_evals
@@ -0,0 +1,99 @@
+# dtc_events.py
+# Event-log storage for piecewise-deterministic jump trajectories.
+# Between jumps prob_L is constant and <x>(t) is pure drift along the two branches,
+# so a trajectory is fully described by its jumps (step, kind, phase, prob_L after)
+# plus snap index and outcome. Events are kept struct-of-arrays in CSR layout
+# (offsets into flat event columns); samples are rebuilt only for the rows and
+# time window asked for, so storage is O(events) instead of O(num_traj * steps).
+
+import numpy as np
+
+DEPHASING, PRUNING = 0, 1
+
+class EventLog:
+    """
+    Jump events of num_traj trajectories on a grid of `steps` time points.
+
+      prob_L0            (n,)   prob_L before the first event
+      offsets            (n+1,) events of row r are [offsets[r], offsets[r+1])
+      step, kind, phase  (E,)   step index of the jump, DEPHASING / PRUNING, jump phase
+      prob_L             (E,)   prob_L after the jump, seen from step + 1 on
+      snap, outcome      (n,)   first-jump index and final branch (0 = L, 1 = R)
+    """
+    __slots__ = ('steps', 'prob_L0', 'offsets', 'step', 'kind', 'phase', 'prob_L', 'snap', 'outcome')
+
+    def __init__(self, steps, prob_L0, offsets, step, kind, phase, prob_L, snap, outcome):
+        self.steps = int(steps)
+        self.prob_L0 = np.asarray(prob_L0, dtype=float)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.step = np.asarray(step, dtype=np.int32)
+        self.kind = np.asarray(kind, dtype=np.int8)
+        self.phase = np.asarray(phase, dtype=np.float32)
+        self.prob_L = np.asarray(prob_L, dtype=float)
+        self.snap = np.asarray(snap, dtype=np.int32)
+        self.outcome = np.asarray(outcome, dtype=np.int8)
+
+    @classmethod
+    def from_events(cls, steps, prob_L0, row, step, kind, phase, prob_L, snap, outcome):
+        """Build from unsorted event columns tagged with their trajectory row"""
+        row, step = np.asarray(row, dtype=np.int64), np.asarray(step, dtype=np.int64)
+        order = np.lexsort((step, row))
+        counts = np.bincount(row, minlength=len(prob_L0))
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+        return cls(steps, prob_L0, offsets, step[order], np.asarray(kind)[order],
+                   np.asarray(phase)[order], np.asarray(prob_L)[order], snap, outcome)
+
+    @classmethod
+    def concatenate(cls, logs):
+        """Stack logs on the same grid row-wise, in the given order"""
+        logs = list(logs)
+        shift = np.cumsum([0] + [len(log.step) for log in logs[:-1]])
+        offsets = np.concatenate([[0]] + [log.offsets[1:] + s for log, s in zip(logs, shift)])
+        cat = lambda name: np.concatenate([getattr(log, name) for log in logs])
+        return cls(logs[0].steps, cat('prob_L0'), offsets, cat('step'), cat('kind'),
+                   cat('phase'), cat('prob_L'), cat('snap'), cat('outcome'))
+
+    def __len__(self):
+        return len(self.prob_L0)
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in self.__slots__[1:])
+
+    def events(self, r):
+        """(step, kind, phase, prob_L) columns of trajectory r"""
+        sl = slice(self.offsets[r], self.offsets[r + 1])
+        return self.step[sl], self.kind[sl], self.phase[sl], self.prob_L[sl]
+
+    def prob_L_window(self, rows=None, start=0, stop=None):
+        """prob_L on steps [start, stop) for the given rows (default all): (len(rows), stop - start)"""
+        rows = np.arange(len(self)) if rows is None else np.atleast_1d(rows)
+        stop = self.steps if stop is None else stop
+        i = np.arange(start, stop)
+        if len(self.step) == 0:
+            return np.repeat(self.prob_L0[rows][:, None], len(i), axis=1)
+
+        # Last event of each row with step < i: search (row, step + 1) keys for (row, i)
+        stride = self.steps + 1
+        ev_row = np.repeat(np.arange(len(self)), np.diff(self.offsets))
+        keys = ev_row * stride + self.step + 1
+        last = np.searchsorted(keys, rows[:, None] * stride + i, side='right') - 1
+        has = last >= self.offsets[rows][:, None]
+        return np.where(has, self.prob_L[np.maximum(last, 0)], self.prob_L0[rows][:, None])
+
+    def trajectory_x(self, pos_L, pos_R, rows=None, start=0, stop=None):
+        """
+        <x> = pos_L prob_L + pos_R (1 - prob_L) on steps [start, stop), with pos_L / pos_R
+        the branch positions on the full time grid
+        """
+        stop = self.steps if stop is None else stop
+        p = self.prob_L_window(rows, start, stop)
+        return pos_L[start:stop] * p + pos_R[start:stop] * (1.0 - p)
+
+    def save(self, path):
+        np.savez_compressed(path, **{name: getattr(self, name) for name in self.__slots__})
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as f:
+            return cls(*(f[name] for name in cls.__slots__))
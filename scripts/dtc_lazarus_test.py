@@ -4,6 +4,7 @@
 
 import numpy as np
 import matplotlib.pyplot as plt
+from dtc.scenarios import lazarus_curves
 
 # --- PARAMETERS ---
 # Tuned so the collapse happens visibly at ~7.6 µs (before the 10 µs pulse)
@@ -11,38 +12,11 @@ gamma = 6e6          # decoherence rate (s^-1)
 C_th = 1e-20         # DTC threshold
 t = np.linspace(0, 20, 2000)        # time in microseconds (0 to 20 µs)
 
-# --- PHASE 1: DECOHERENCE (0 to 10 µs) ---
-mid = len(t)//2
-t_decay = t[:mid]
-C_decay = np.exp(-gamma * t_decay * 1e-6)   # convert µs → s
-
-# --- PHASE 2: ATTEMPTED REVIVAL (10 to 20 µs) ---
-t_revive = t[mid:]
 revival_factor = 0.8                        # realistic echo efficiency (80%)
-# The revival mirrors the decay (Spin Echo logic)
-C_qm_revive = C_decay[-1] * np.exp(gamma * (t_revive - t_revive[0]) * 1e-6) * revival_factor
-
-# --- BUILD CURVES ---
-# 1. Standard QM Curve (Reversible)
-C_qm = np.concatenate([C_decay, C_qm_revive])
-
-# 2. DTC Curve (Irreversible)
-C_dtc = np.copy(C_decay)
-# Find the exact moment we hit the threshold
-snap_idx = np.where(C_decay < C_th)[0]
+mid = len(t)//2
 
-if len(snap_idx) > 0:
-    first_snap = snap_idx[0]
-    snap_time = t_decay[first_snap]
-    # PHYSICS: Once crossed, it stays at 0 forever.
-    C_dtc[first_snap:] = 0.0
-    
-    # During revival phase, it MUST remain 0 (Irreversibility)
-    C_dtc_full = np.concatenate([C_dtc, np.zeros(len(t_revive))])
-else:
-    snap_time = None
-    # If it never snapped, it behaves like QM (rare case in this setup)
-    C_dtc_full = np.concatenate([C_dtc, C_qm_revive])
+# --- CURVES: QM (decay, then echo revival) and DTC (irreversible after the snap) ---
+C_qm, C_dtc_full, snap_time = lazarus_curves(t, gamma, C_th, revival_factor)
 
 # --- PLOTTING ---
 plt.figure(figsize=(11, 6.5))
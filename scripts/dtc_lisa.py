@@ -2,19 +2,20 @@
 import matplotlib.pyplot as plt
 import numpy as np
 import matplotlib.patches as mpatches
+from dtc.scenarios import LISA_MODELS, LISA_UPPER_LIMIT, LISA_PREDICTIONS
 
 # === 1. DATA AND SETUP ===
-models = ['QM + decoherence', 'CSL (λ ≤ 10^{-11})', 'DTC']
+models = LISA_MODELS
 x = np.arange(len(models))
 
 # LISA Upper Limit (Threshold)
-upper_limit = 5.7e-34 
+upper_limit = LISA_UPPER_LIMIT
 y_min_plot = 5e-37 # Bottom of the visible plot axis
 
 # Prediction Values:
 # QM and DTC predict 0 (represented by 1e-36 for log scale visibility).
 # CSL predicts 10^-23.
-prediction_values = [1e-36, 1e-23, 1e-36] 
+prediction_values = LISA_PREDICTIONS
 
 # === 2. PLOT GENERATION ===
 fig, ax = plt.subplots(figsize=(10, 6))
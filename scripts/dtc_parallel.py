@@ -0,0 +1,78 @@
+# dtc_parallel.py
+# Process-pool sharding for Monte Carlo ensembles.
+# Trajectories are cut into fixed-size shards, each driven by its own generator
+# spawned from one SeedSequence, and shard results come back in shard order.
+# The shard layout depends only on (num_traj, shard_size, seed), never on the
+# number of workers, so a seed reproduces the ensemble bit for bit on 1 or 64 cores.
+# Scripts that use it must keep their run section under `if __name__ == '__main__':`
+# (spawned workers re-import the script).
+# With reduce=, results are folded in as they arrive (memory independent of the
+# number of shards).
+# Profiling: pass a dtc.instrument Recorder; every shard records into its own one in
+# its worker and they are merged into it in shard order, so any pool size is profiled.
+
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from dtc import instrument
+
+def seed_sequence(seed=None):
+    """SeedSequence from an int, None (fresh OS entropy) or an existing SeedSequence"""
+    return seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+
+def shard_sizes(num_traj, shard_size):
+    """Trajectory counts per shard: full shards of shard_size, then the remainder"""
+    full, rest = divmod(num_traj, shard_size)
+    return [shard_size] * full + ([rest] if rest else [])
+
+def _run_shard(job):
+    fn, n, child, args, profile = job
+    rng = np.random.default_rng(child)
+    if profile is None:
+        return fn(n, rng, *args), None
+    with instrument.recording(**profile) as rec:
+        return fn(n, rng, *args), rec
+
+def _results(jobs, workers):
+    """_run_shard over the jobs, yielded in shard order; at most 2 * workers in flight"""
+    if workers <= 1:
+        for job in jobs:
+            yield _run_shard(job)
+        return
+    with ProcessPoolExecutor(workers) as pool:
+        pending = deque()
+        for job in jobs:
+            pending.append(pool.submit(_run_shard, job))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def run_sharded(fn, num_traj, shard_size, seed=None, workers=None, args=(), recorder=None, reduce=None):
+    """
+    Call fn(n, rng, *args) once per shard and return the results in shard order.
+    fn must be a module-level function (it is pickled to the workers);
+    workers=1 runs every shard in this process, None uses all cores.
+    reduce(acc, result) -> acc folds each result into an accumulator as it
+    arrives, in shard order (acc is None for the first shard), and the final
+    accumulator is returned instead of the list, so memory does not grow with
+    the number of shards.
+    With a recorder (dtc.instrument.Recorder) each shard runs under its own
+    recording() with the same settings and is merged into it in shard order.
+    """
+    sizes = shard_sizes(num_traj, shard_size)
+    children = seed_sequence(seed).spawn(len(sizes))
+    profile = None if recorder is None else dict(sample_every=recorder.sample_every,
+                                                  allocations=recorder.allocations)
+    jobs = [(fn, n, child, args, profile) for n, child in zip(sizes, children)]
+    workers = min(workers or os.cpu_count(), len(jobs))
+    acc = [] if reduce is None else None
+    for result, rec in _results(jobs, workers):
+        if rec is not None:
+            recorder.merge(rec)
+        if reduce is None:
+            acc.append(result)
+        else:
+            acc = reduce(acc, result)
+    return acc
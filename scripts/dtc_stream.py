@@ -0,0 +1,124 @@
+# dtc_stream.py
+# Constant-memory ensemble statistics for trajectory runs.
+# Batches (e.g. process-pool shards) are folded into an EnsembleStats and partial
+# results are merged pairwise, so memory is O(steps) however many trajectories
+# are run, and merging in a fixed order reproduces the same numbers bit for bit.
+
+import numpy as np
+
+class EnsembleStats:
+    """
+    Running summary of trajectories x(t_i), i < steps:
+      mean / var per time point   Welford moments, merged with Chan et al.'s update
+      outcome_counts              trajectories per outcome label
+      snap_hist                   snap-index histogram, one bin per time step
+      reservoir                   up to `reservoir` example trajectories, a uniform
+                                  sample kept as the bottom-k of random keys (mergeable)
+    """
+
+    def __init__(self, steps, labels, reservoir=8):
+        self.steps = steps
+        self.labels = list(labels)
+        self.k = reservoir
+        self.count = 0
+        self.mean = np.zeros(steps)
+        self.m2 = np.zeros(steps)
+        self.outcome_counts = np.zeros(len(self.labels), dtype=np.int64)
+        self.snap_hist = np.zeros(steps, dtype=np.int64)
+        self.keys = np.empty(0)
+        self.samples = np.empty((0, steps))
+        self.sample_outcomes = np.empty(0, dtype=int)
+        self.sample_snaps = np.empty(0, dtype=int)
+
+    def _empty_like(self):
+        return EnsembleStats(self.steps, self.labels, self.k)
+
+    def update(self, trajs, outcomes, snaps, rng=np.random):
+        """
+        Fold in a batch: trajs (n, steps), outcomes as label indices (n,), snap
+        indices (n,). rng draws the reservoir keys. Returns self.
+        """
+        trajs = np.asarray(trajs, dtype=float)
+        if len(trajs) == 0:
+            return self
+        outcomes, snaps = np.asarray(outcomes), np.asarray(snaps)
+        batch = self._empty_like()
+        batch.count = len(trajs)
+        batch.mean = trajs.mean(axis=0)
+        batch.m2 = np.sum((trajs - batch.mean)**2, axis=0)
+        batch.outcome_counts = np.bincount(outcomes, minlength=len(self.labels)).astype(np.int64)
+        batch.snap_hist = np.bincount(np.clip(snaps, 0, self.steps - 1), minlength=self.steps).astype(np.int64)
+        keys = rng.random(len(trajs))
+        keep = np.argsort(keys, kind='stable')[:self.k]
+        batch.keys = keys[keep]
+        batch.samples = trajs[keep].copy()
+        batch.sample_outcomes = outcomes[keep].astype(int)
+        batch.sample_snaps = snaps[keep].astype(int)
+        return self.merge(batch)
+
+    def merge(self, other):
+        """Fold another EnsembleStats into this one; returns self"""
+        if other.count == 0:
+            return self
+        n_a, n_b = self.count, other.count
+        n = n_a + n_b
+        delta = other.mean - self.mean
+        self.mean = self.mean + delta * (n_b / n)
+        self.m2 = self.m2 + other.m2 + delta**2 * (n_a * n_b / n)
+        self.count = n
+        self.outcome_counts += other.outcome_counts
+        self.snap_hist += other.snap_hist
+
+        keys = np.concatenate([self.keys, other.keys])
+        keep = np.argsort(keys, kind='stable')[:self.k]
+        self.keys = keys[keep]
+        self.samples = np.concatenate([self.samples, other.samples])[keep]
+        self.sample_outcomes = np.concatenate([self.sample_outcomes, other.sample_outcomes])[keep]
+        self.sample_snaps = np.concatenate([self.sample_snaps, other.sample_snaps])[keep]
+        return self
+
+    FIELDS = ('count', 'mean', 'm2', 'outcome_counts', 'snap_hist',
+              'keys', 'samples', 'sample_outcomes', 'sample_snaps')
+
+    def to_arrays(self):
+        """Plain arrays for storage (np.savez / dtc_cache)"""
+        return dict(labels=np.array(self.labels), reservoir=np.array(self.k),
+                    **{name: np.asarray(getattr(self, name)) for name in self.FIELDS})
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """Inverse of to_arrays()"""
+        stats = cls(len(arrays['mean']), arrays['labels'].tolist(), int(arrays['reservoir']))
+        for name in cls.FIELDS:
+            setattr(stats, name, arrays[name])
+        stats.count = int(stats.count)
+        return stats
+
+    @classmethod
+    def merged(cls, parts):
+        """Merge a sequence of EnsembleStats in the given order"""
+        parts = list(parts)
+        total = parts[0]._empty_like()
+        for part in parts:
+            total.merge(part)
+        return total
+
+    def var(self, ddof=1):
+        """Per-time-point variance of x(t_i)"""
+        return self.m2 / max(self.count - ddof, 1)
+
+    def stderr(self):
+        """Standard error of the ensemble mean per time point"""
+        return np.sqrt(self.var() / max(self.count, 1))
+
+    def counts(self):
+        """{label: number of trajectories}"""
+        return dict(zip(self.labels, self.outcome_counts.tolist()))
+
+    def snap_mean(self):
+        return np.dot(np.arange(self.steps), self.snap_hist) / self.count
+
+    def snap_quantile(self, q):
+        """Snap index at quantile q (lower value, from the histogram)"""
+        cum = np.cumsum(self.snap_hist)
+        return int(np.searchsorted(cum, q * self.count))
@@ -0,0 +1,214 @@
+# dtc_sweep.py
+# Resumable parameter sweeps over (Gamma_0, C_th, kappa, gamma, dt).
+# Points are scheduled on a process pool and every finished point is appended to a
+# chunked JSON-lines store straight away (flushed and fsynced), so an interrupted
+# sweep loses at most the points still in flight; a rerun skips every stored point.
+# A point is stored under the key of everything its result depends on: the resolved
+# parameters (DEFAULTS overridden by the point), the simulator, the seed and the
+# source of the simulation code, so changing any of them reruns the point.
+# Each point's generator is seeded from (seed, parameters), never from the schedule,
+# so a resumed sweep gives the same numbers as an uninterrupted one.
+#
+#   store = ResultStore('sweep_results')
+#   run_sweep(trajectory_point, grid(Gamma_0=[1e11, 1e12], C_th=[0.3, 0.5]), store, seed=1)
+
+import os
+import json
+import glob
+import hashlib
+import inspect
+import itertools
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from dtc import mcwf
+from dtc.physics import sig_z, P_L, P_R, lindblad_dissipator, coherence, gamma_trigger
+from dtc.density import integrate_adaptive, clear_caches
+from dtc_cache import cache_key, code_version
+
+# Model defaults, overridden per point
+DEFAULTS = dict(Gamma_0=1e12, C_th=0.4, kappa=1000.0, gamma=1e8, dt=1e-10, t_max=5e-8, num_traj=200)
+
+# --- Points ---
+def grid(**axes):
+    """Cartesian product of the given axes as a list of point dicts"""
+    names = list(axes)
+    return [dict(zip(names, values)) for values in itertools.product(*(np.atleast_1d(axes[n]).tolist() for n in names))]
+
+def zipped(**axes):
+    """Points taken element-wise from equal-length lists (no product)"""
+    names = list(axes)
+    return [dict(zip(names, values)) for values in zip(*(np.atleast_1d(axes[n]).tolist() for n in names))]
+
+def resolve(point):
+    """Full parameter set of a point: DEFAULTS overridden by the point, as floats"""
+    return {k: float(v) for k, v in sorted({**DEFAULTS, **point}.items())}
+
+def point_key(params, model, seed, code):
+    """Store key of one run: resolved params, simulator name, seed and code version (see cache_key)"""
+    return cache_key({'params': resolve(params), 'model': model, 'seed': seed}, code)
+
+def point_seed(seed, params):
+    """SeedSequence for a point, independent of its position in the schedule"""
+    digest = hashlib.sha256(json.dumps(resolve(params), sort_keys=True).encode()).digest()
+    return np.random.SeedSequence([seed or 0, int.from_bytes(digest[:8], 'little')])
+
+# Sources every simulator here runs on; run_sweep adds the simulator's own file
+SOURCES = ('dtc_sweep.py', 'dtc/physics.py', 'dtc/density.py', 'dtc/mcwf.py', 'dtc/pointer.py')
+
+def sweep_version(simulate):
+    """Code version of a simulator: SOURCES plus the file it is defined in"""
+    return code_version(*SOURCES, inspect.getsourcefile(simulate))
+
+# --- On-disk store ---
+class ResultStore:
+    """
+    Append-only store of {'key', 'model', 'seed', 'point', 'result'} records
+    ('point' holds the resolved parameters) in a directory of
+    chunk-NNNNN.jsonl files holding up to chunk_size records each. A line cut short
+    by an interruption is ignored on load and its point is recomputed.
+    """
+
+    def __init__(self, path, chunk_size=1000):
+        self.path = path
+        self.chunk_size = chunk_size
+        os.makedirs(path, exist_ok=True)
+        self.records = {}
+        self._chunk, self._fill = 0, 0
+        for self._chunk, name in enumerate(sorted(glob.glob(os.path.join(path, 'chunk-*.jsonl')))):
+            self._fill = 0
+            with open(name) as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        self._fill = chunk_size # never append after a torn line
+                        continue
+                    self.records[record['key']] = record
+                    self._fill += 1
+
+    def __contains__(self, key):
+        return key in self.records
+
+    def __len__(self):
+        return len(self.records)
+
+    def append(self, key, point, result, model=None, seed=None):
+        if self._fill >= self.chunk_size:
+            self._chunk, self._fill = self._chunk + 1, 0
+        record = {'key': key, 'model': model, 'seed': seed, 'point': resolve(point),
+                  'result': {k: float(v) for k, v in result.items()}}
+        name = os.path.join(self.path, f'chunk-{self._chunk:05d}.jsonl')
+        with open(name, 'a') as f:
+            f.write(json.dumps(record) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        self.records[record['key']] = record
+        self._fill += 1
+
+    def table(self, names=None, model=None):
+        """Stored points and results as {column: array}, in insertion order (optionally one model's only)"""
+        rows = [{**r['point'], **r['result']} for r in self.records.values()
+                if model is None or r.get('model') == model]
+        names = names or list(dict.fromkeys(k for row in rows for k in row))
+        return {n: np.array([row.get(n, np.nan) for row in rows], dtype=float) for n in names}
+
+# --- Scheduling ---
+def _run_point(job):
+    simulate, params, seed = job
+    try:
+        return simulate(params, np.random.default_rng(seed))
+    finally:
+        clear_caches() # dtc.density entries are keyed by this point's parameters
+
+def run_sweep(simulate, points, store, seed=None, workers=None, progress=print, code=None):
+    """
+    Run simulate(params, rng) -> {name: float} for every point not yet in `store`
+    and append each result as it finishes. simulate must be a module-level
+    function; params are DEFAULTS overridden by the point. `code` is the version
+    hashed into the keys (default: sweep_version(simulate)). workers=1 runs in-process.
+    Returns the number of points computed.
+    """
+    model = simulate.__qualname__
+    code = sweep_version(simulate) if code is None else code
+    keyed = {point_key(p, model, seed, code): resolve(p) for p in points}
+    todo = [(key, params) for key, params in keyed.items() if key not in store]
+    if progress:
+        progress(f"Sweep: {len(todo)} of {len(keyed)} points to run ({len(store)} stored)")
+    jobs = [(simulate, params, point_seed(seed, params)) for _, params in todo]
+    label = lambda params: {k: v for k, v in params.items() if DEFAULTS.get(k) != v}
+    workers = min(workers or os.cpu_count(), max(len(jobs), 1))
+    if workers <= 1:
+        for k, ((key, params), job) in enumerate(zip(todo, jobs), 1):
+            store.append(key, params, _run_point(job), model, seed)
+            if progress:
+                progress(f"  [{k}/{len(jobs)}] {label(params)}")
+        return len(jobs)
+    with ProcessPoolExecutor(workers) as pool:
+        futures = {pool.submit(_run_point, job): item for item, job in zip(todo, jobs)}
+        for k, future in enumerate(as_completed(futures), 1):
+            key, params = futures[future]
+            store.append(key, params, future.result(), model, seed)
+            if progress:
+                progress(f"  [{k}/{len(jobs)}] {label(params)}")
+    return len(jobs)
+
+# --- Point simulators (two-level DTC model, L/R pointer basis) ---
+# Thin adapters from a parameter dict onto the shared solvers: dtc.density for the
+# master equation, dtc.mcwf for the trajectories.
+def density_matrix_point(params, rng=None):
+    """
+    Master equation drho/dt = gamma D[sig_z] rho + Gamma_trig(C) sum_n D[P_n] rho
+    (dtc.physics trigger on the l1 coherence C) integrated with dtc.density's
+    adaptive DP5(4) up to t_max; the snap is the exact crossing of C = C_th.
+    dt is the integrator's first and largest step, so the trigger is resolved at
+    least as finely as on the trajectories' dt grid (a point's dt is in its key).
+    """
+    def rhs(t, rho):
+        Gamma_trig = gamma_trigger(rho, params['Gamma_0'], params['C_th'], params['kappa'])
+        return (params['gamma'] * lindblad_dissipator(sig_z, rho)
+                + Gamma_trig * (lindblad_dissipator(P_L, rho) + lindblad_dissipator(P_R, rho)))
+
+    rho0 = np.full((2, 2), 0.5, dtype=complex)
+    _, t_snap, rho = integrate_adaptive(rhs, rho0, (0.0, params['t_max']),
+                                        event=lambda rho: coherence(rho) - params['C_th'],
+                                        h0=params['dt'], max_step=params['dt'])
+    p_L = float(rho[0, 0].real)
+    if t_snap is None:
+        return dict(snap_time=np.nan, collapse_fraction=0.0, p_L=p_L)
+    return dict(snap_time=t_snap, collapse_fraction=1.0, p_L=p_L)
+
+def trajectory_point(params, rng=np.random):
+    """
+    num_traj strict-MCWF trajectories from dtc.mcwf (NumPy backend, waiting-time
+    sampler, logistic trigger on mcwf's coherence) on a dt grid up to t_max.
+    Returns the mean snap time of the collapsed trajectories, the collapse
+    fraction and the L share of collapses. mcwf's module parameters are restored.
+    """
+    saved = {name: getattr(mcwf, name) for name in mcwf.PARAMS}
+    mcwf.configure(gamma=params['gamma'], C_th=params['C_th'], Gamma_0=params['Gamma_0'],
+                   kappa=params['kappa'], steps=int(round(params['t_max'] / params['dt'])) + 1,
+                   t_max=params['t_max'], backend='numpy', trigger='logistic')
+    try:
+        ops = mcwf.make_backend('numpy')
+        runs = [mcwf.waiting_time_trajectory(ops, rng) for _ in range(int(params['num_traj']))]
+        times = mcwf.times
+    finally:
+        mcwf.configure(**saved)
+
+    outcome = np.array([out for _, out, _ in runs])
+    collapsed = outcome != 'no_collapse'
+    # dephasing keeps <x> = 0; the pruning jump puts it on a branch at |x| >= 2
+    snap = times[[np.argmax(np.abs(x) > 1.0) for x, _, _ in runs]]
+    return dict(snap_time=float(snap[collapsed].mean()) if collapsed.any() else np.nan,
+                collapse_fraction=float(collapsed.mean()),
+                p_L=float(np.mean(outcome[collapsed] == 'L')) if collapsed.any() else np.nan)
+
+MODELS = {'density_matrix': density_matrix_point, 'trajectory': trajectory_point}
+
+if __name__ == '__main__':
+    store = ResultStore('sweep_results')
+    points = grid(Gamma_0=np.logspace(10, 13, 4), C_th=[0.2, 0.4, 0.6], kappa=[100, 1000])
+    run_sweep(MODELS['trajectory'], points, store, seed=1)
+    table = store.table(model='trajectory_point')
+    for name in ('Gamma_0', 'C_th', 'kappa', 'snap_time', 'collapse_fraction', 'p_L'):
+        print(f"{name:>18}: {np.array2string(table[name], precision=3)}")
@@ -1,6 +1,14 @@
 # bounds_plot_FIXED_CONCEPT.py
 
+import os
 import numpy as np, matplotlib.pyplot as plt
+from dtc_sweep import ResultStore
+from dtc_contour import refine_boundary
+
+# Simulated points from a dtc_sweep run (own figure when the store exists): the sweep
+# covers Gamma_0 ~ 1e10-1e13 and C_th ~ 0.1-1, decades away from the bound axes below
+sweep_store = 'sweep_results'
+sweep_model = 'trajectory_point'
 
 # --- 1. Define Axes ---
 Gamma0 = np.logspace(16, 30, 500)
@@ -36,6 +44,21 @@ plt.fill_between(Gamma0, Cth_axis.min(),
                  np.minimum(Cth_decoherence_limit, Cth_heating_limit), 
                  color='#90EE90', alpha=0.7, label='Allowed Region (DTC Compatible)')
 
+# --- 3b. Adaptive Boundary (only evaluates the model near the allowed/forbidden edge) ---
+# Any vectorised allowed(Gamma0, Cth) works here, including simulation-backed ones.
+def allowed(G, C):
+    return (C < Cth_decoherence_limit) & (G * C < 1e10)
+
+# 8x8 base cells halved 4 times (finest cell 1/128 of each axis) and 6 bisections:
+# vertices are bracketed to ~2e-3 decades, finer than one cell of the 500 x 500
+# grid above (~0.03-0.04 decades), for ~150x fewer evaluations
+boundary, brackets, n_evals = refine_boundary(allowed, (Gamma0.min(), Gamma0.max()),
+                                              (Cth_axis.min(), Cth_axis.max()),
+                                              n0=8, depth=4, bisect=6)
+for k, line in enumerate(boundary):
+    plt.plot(line[:, 0], line[:, 1], 'k-', lw=1.5, label='Adaptive boundary' if k == 0 else None)
+print(f"Adaptive boundary: {n_evals} model evaluations (uniform grid: {G.size}, {G.size / n_evals:.0f}x)")
+
 # --- 4. Plot the Crosshairs (Chosen Parameters) ---
 plt.axvline(1e20, color='blue', ls='--', lw=2, label=r'Chosen $\Gamma_0 = 10^{20}$ s$^{-1}$')
 plt.axhline(1e-20, color='purple', ls='--', lw=2, label=r'Chosen $C_{\rm th} = 10^{-20}$')
@@ -51,4 +74,20 @@ plt.title('DTIP Parameter Space vs. Conceptual Experimental Bounds')
 plt.legend(loc='lower left')
 plt.grid(alpha=0.3)
 plt.tight_layout()
+
+# --- 6. Simulated Sweep Points (collapse fraction from the actual dynamics) ---
+if os.path.isdir(sweep_store):
+    table = ResultStore(sweep_store).table(model=sweep_model)
+    if len(table.get('Gamma_0', ())):
+        plt.figure(figsize=(7, 5))
+        sc = plt.scatter(table['Gamma_0'], table['C_th'], c=table['collapse_fraction'],
+                         cmap='viridis', vmin=0, vmax=1, edgecolor='k', zorder=5)
+        plt.colorbar(sc, label='Simulated collapse fraction')
+        plt.xscale('log')
+        plt.xlabel(r'Pruning rate $\Gamma_0$ [s$^{-1}$]')
+        plt.ylabel(r'Coherence threshold $C_{\rm th}$')
+        plt.title(f'dtc_sweep points ({sweep_model})')
+        plt.grid(alpha=0.3)
+        plt.tight_layout()
+
 plt.show()
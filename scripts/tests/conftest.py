@@ -0,0 +1,16 @@
+# Shared pytest setup: the scripts directory holds the flat dtc_* modules and the
+# dtc package, so put it on sys.path; `mcwf_params` restores the MCWF module
+# parameters after tests that call mcwf.configure().
+
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture
+def mcwf_params():
+    from dtc import mcwf
+    saved = {name: getattr(mcwf, name) for name in mcwf.PARAMS}
+    yield mcwf
+    mcwf.configure(**saved)
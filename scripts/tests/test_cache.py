@@ -0,0 +1,59 @@
+# dtc_cache: keys follow parameters and code, hits return the stored arrays, and
+# invalidation / LRU eviction remove entries.
+
+import os
+import time
+import numpy as np
+from dtc_cache import ResultCache, cache_key, code_version
+
+def test_key_follows_params_and_code():
+    key = cache_key({'a': 1.0, 'b': np.arange(3)}, 'v1')
+    assert key == cache_key({'b': np.arange(3), 'a': 1.0}, 'v1')
+    assert key != cache_key({'a': 2.0, 'b': np.arange(3)}, 'v1')
+    assert key != cache_key({'a': 1.0, 'b': np.arange(4)}, 'v1')
+    assert key != cache_key({'a': 1.0, 'b': np.arange(3)}, 'v2')
+
+def test_code_version_tracks_source(tmp_path):
+    src = tmp_path / 'model.py'
+    src.write_text('rate = 1\n')
+    before = code_version(str(src))
+    assert code_version(str(src)) == before
+    src.write_text('rate = 2\n')
+    assert code_version(str(src)) != before
+
+def test_hit_miss_and_invalidate(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    key = cache_key({'n': 1})
+    assert cache.get(key) is None and key not in cache
+    cache.put(key, C=np.linspace(0, 1, 5), snap=np.array(3))
+    hit = cache.get(key)
+    np.testing.assert_array_equal(hit['C'], np.linspace(0, 1, 5))
+    assert int(hit['snap']) == 3 and key in cache
+
+    other = cache_key({'n': 2})
+    cache.put(other, C=np.zeros(2))
+    cache.invalidate(key)
+    assert cache.get(key) is None and cache.get(other) is not None
+    cache.invalidate()
+    assert cache.get(other) is None and cache.size() == 0
+
+def test_torn_entry_is_a_miss(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    key = cache_key({'n': 1})
+    with open(os.path.join(str(tmp_path), key + '.npz'), 'wb') as f:
+        f.write(b'not an npz')
+    assert cache.get(key) is None
+
+def test_lru_eviction(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    keys = [cache_key({'n': k}) for k in range(3)]
+    for k, key in enumerate(keys):
+        cache.put(key, x=np.zeros(1000))
+        past = time.time() - 100 + k
+        os.utime(cache._file(key), (past, past))
+    entry = cache.size() // 3
+    cache.get(keys[0])   # refreshes the oldest entry
+    cache.max_bytes = 2 * entry
+    cache.evict()
+    assert keys[0] in cache and keys[2] in cache and keys[1] not in cache
+    assert cache.size() <= 2 * entry
@@ -0,0 +1,47 @@
+# dtc_contour.refine_boundary on regions with a known boundary: a disc in the
+# log-log plane (one closed loop) and a half-plane on linear axes (one open line
+# across the box). Vertices sit on the analytic boundary to the bisection
+# tolerance, brackets enclose it, and the evaluation count stays far below the
+# uniform grid of the same resolution.
+
+import numpy as np
+from dtc_contour import refine_boundary
+
+N0, DEPTH, BISECT = 8, 4, 12
+
+def disc(x, y):
+    return np.log10(x)**2 + np.log10(y)**2 < 1.0
+
+def test_disc_in_log_plane():
+    lines, brackets, n_evals = refine_boundary(disc, (1e-2, 1e2), (1e-2, 1e2), n0=N0, depth=DEPTH, bisect=BISECT)
+    assert len(lines) == 1
+    u = np.log10(lines[0])
+    np.testing.assert_array_equal(u[0], u[-1])   # closed loop
+    tol = 4.0 / (N0 * 2**DEPTH) * 2.0**-BISECT      # finest edge in log10 units / 2^bisect
+    assert np.all(np.abs(np.hypot(u[:, 0], u[:, 1]) - 1.0) < tol)
+    area = 0.5 * abs(np.sum(u[:-1, 0] * u[1:, 1] - u[1:, 0] * u[:-1, 1]))   # shoelace
+    assert abs(area - np.pi) < 1e-3   # vertices are chained in order around the disc
+    inside, outside = brackets[0][:, 0], brackets[0][:, 1]
+    assert disc(*inside.T).all() and not disc(*outside.T).any()
+    assert np.all(np.abs(np.log10(inside) - np.log10(outside)).max(axis=1) <= tol * (1 + 1e-9))
+    refine_evals = n_evals - BISECT * (len(u) - 1)   # one bisection per crossing edge
+    assert refine_evals < 0.1 * (N0 * 2**DEPTH + 1)**2
+
+def test_half_plane_on_linear_axes():
+    below = lambda x, y: y < 2 * x + 1
+    lines, brackets, _ = refine_boundary(below, (-3.0, 3.0), (-3.0, 3.0), log=False,
+                                         n0=N0, depth=DEPTH, bisect=BISECT)
+    assert len(lines) == 1
+    xy = lines[0]
+    tol = 6.0 / (N0 * 2**DEPTH) * 2.0**-BISECT
+    # the vertex is the bracket midpoint on an axis-parallel edge: |y - (2x + 1)| <= 2 tol
+    assert np.all(np.abs(xy[:, 1] - (2 * xy[:, 0] + 1)) <= 2 * tol)
+    ends = sorted([xy[0, 1], xy[-1, 1]])
+    assert abs(ends[0] + 3) < 0.1 and abs(ends[1] - 3) < 0.1   # crosses the whole box
+    assert below(*brackets[0][:, 0].T).all() and not below(*brackets[0][:, 1].T).any()
+
+def test_uniform_region_has_no_boundary():
+    lines, brackets, n_evals = refine_boundary(lambda x, y: np.ones(len(x), dtype=bool),
+                                               (1.0, 10.0), (1.0, 10.0), n0=N0, depth=DEPTH)
+    assert lines == [] and brackets == []
+    assert n_evals == (N0 + 1)**2
@@ -0,0 +1,100 @@
+# dtc.density: the adaptive Dormand-Prince integrator, its event root-finder and the
+# spectral solver against the closed-form dephasing of density_matrix_collapse.py's
+# 2x2 model, rho_01(t) = 1/2 exp(-2i t) exp(-2 gamma t), i.e. C(t) = exp(-2 gamma t),
+# and the spectral solver against the cached propagator on a non-diagonal model;
+# the caches stay bounded and keep the most recently used entries.
+
+import numpy as np
+import pytest
+from dtc import density
+from dtc.density import integrate_adaptive, propagator, SpectralSolver, spectral, clear_caches
+from dtc.physics import sig_z, P_L, P_R, commutator, lindblad_dissipator, coherence
+
+GAMMA, C_TH = 0.3, 0.15
+RHO0 = np.full((2, 2), 0.5, dtype=complex)
+
+def rhs(t, rho):
+    return -1j * commutator(sig_z, rho) + GAMMA * lindblad_dissipator(sig_z, rho)
+
+def exact(t):
+    rho = np.empty(np.shape(t) + (2, 2), dtype=complex)
+    rho[..., 0, 0] = rho[..., 1, 1] = 0.5
+    rho[..., 0, 1] = 0.5 * np.exp((-2j - 2 * GAMMA) * np.asarray(t))
+    rho[..., 1, 0] = rho[..., 0, 1].conj()
+    return rho
+
+def test_snap_time_matches_closed_form():
+    _, t_event, rho_event = integrate_adaptive(rhs, RHO0, (0.0, 15.0),
+                                               event=lambda rho: coherence(rho) - C_TH)
+    assert abs(t_event - np.log(1 / C_TH) / (2 * GAMMA)) < 1e-7   # 3.161867
+    assert abs(coherence(rho_event) - C_TH) < 1e-8
+
+def test_dense_output_at_t_eval():
+    t_eval = np.linspace(0.0, 15.0, 3000)
+    y_eval, t_event, _ = integrate_adaptive(rhs, RHO0, (0.0, 15.0), t_eval=t_eval)
+    assert t_event is None and len(y_eval) == len(t_eval)
+    np.testing.assert_allclose(y_eval, exact(t_eval), rtol=0, atol=1e-7)
+
+def test_no_crossing_returns_none():
+    t_eval = np.linspace(0.0, 2.0, 50)
+    y_eval, t_event, y_end = integrate_adaptive(rhs, RHO0, (0.0, 2.0), t_eval=t_eval,
+                                                event=lambda rho: coherence(rho) - C_TH)
+    assert t_event is None
+    assert len(y_eval) == len(t_eval)
+    np.testing.assert_allclose(y_end, exact(2.0), atol=1e-8)
+
+def test_scalar_event_on_dense_output():
+    # dy/dt = -y crosses 1/2 at ln 2 (scalar state, coarse initial step)
+    _, t_event, y_event = integrate_adaptive(lambda t, y: -y, 1.0, (0.0, 10.0), event=lambda y: y.real - 0.5,
+                                             rtol=1e-10, atol=1e-12, h0=5.0)
+    assert abs(t_event - np.log(2)) < 1e-8
+    assert abs(y_event - 0.5) < 1e-8
+
+def test_spectral_coherence_and_crossing_match_closed_form():
+    solver = spectral(sig_z, [sig_z], [GAMMA])
+    t = np.linspace(0.0, 15.0, 301)
+    np.testing.assert_allclose(solver.coherence(RHO0, t), np.exp(-2 * GAMMA * t), rtol=1e-12)
+    np.testing.assert_allclose(solver.rho(RHO0, t), exact(t), atol=1e-12)
+    assert abs(solver.crossing(RHO0, C_TH, 15.0) - np.log(1 / C_TH) / (2 * GAMMA)) < 1e-9
+    assert solver.crossing(RHO0, C_TH, 2.0) is None
+
+def test_spectral_matches_propagator():
+    # Transverse field, dephasing and a weak pruning term: a non-diagonal generator
+    sig_x = np.array([[0, 1], [1, 0]], dtype=complex)
+    H, ops, rates = sig_z + 0.7 * sig_x, [sig_z], [GAMMA]
+    solver = spectral(H, ops, rates, projectors=(P_L, P_R), Gamma_trig=0.2)
+    U = propagator(H, ops, rates, 0.05, projectors=(P_L, P_R), Gamma_trig=0.2)
+    vec = RHO0.reshape(-1)
+    for k in range(1, 61):
+        vec = U @ vec
+        if k % 20 == 0:
+            np.testing.assert_allclose(solver.rho(RHO0, 0.05 * k), vec.reshape(2, 2), atol=1e-10)
+    assert solver.cond < SpectralSolver.cond_max
+
+def test_near_defective_liouvillian_warns():
+    L = np.zeros((4, 4), dtype=complex)
+    L[0, 1], L[1, 1] = 1.0, 1e-12   # a 2x2 Jordan block, split by 1e-12
+    with pytest.warns(RuntimeWarning, match='near-defective'):
+        solver = SpectralSolver(L)
+    assert solver.cond > SpectralSolver.cond_max
+
+def test_caches_are_bounded_lru(monkeypatch):
+    monkeypatch.setattr(density, 'cache_size', 3)
+    clear_caches()
+    first = propagator(sig_z, [sig_z], [0.1], 0.05)
+    for rate in (0.2, 0.3):
+        propagator(sig_z, [sig_z], [rate], 0.05)
+    hits = density.cache_stats['hits']
+    assert propagator(sig_z, [sig_z], [0.1], 0.05) is first   # hit, now most recent
+    assert density.cache_stats['hits'] == hits + 1
+    propagator(sig_z, [sig_z], [0.4], 0.05)   # evicts 0.2, the least recently used
+    assert [key[2] for key in density._propagator_cache] == [(0.3,), (0.1,), (0.4,)]
+    for rate in (0.5, 0.6, 0.7):
+        spectral(sig_z, [sig_z], [rate])
+        propagator(sig_z, [sig_z], [rate], 0.05)
+    for cache in (density._liouvillian_cache, density._propagator_cache, density._spectral_cache):
+        assert len(cache) == 3
+    assert list(density._propagator_cache)[-1][2] == (0.7,)   # rates part of the key
+    assert propagator(sig_z, [sig_z], [0.1], 0.05) is not first   # evicted, rebuilt
+    clear_caches()
+    assert not (density._liouvillian_cache or density._propagator_cache or density._spectral_cache)
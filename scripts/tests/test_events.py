@@ -0,0 +1,94 @@
+# dtc_events.EventLog: trajectories rebuilt from the jump events equal the dense
+# step-by-step replay, for any row subset and time window, and the waiting-time
+# engine of double_slit_trajectory.1.py produces consistent logs.
+
+import importlib.util
+import os
+import numpy as np
+import pytest
+from dtc_events import EventLog, DEPHASING, PRUNING
+
+STEPS = 60
+
+def random_log(n, seed):
+    """Synthetic log: a few dephasing jumps, then (for some rows) one pruning jump"""
+    rng = np.random.default_rng(seed)
+    rows, steps, kinds, probs = [], [], [], []
+    snap, outcome = np.full(n, STEPS - 1), np.zeros(n, dtype=int)
+    for r in range(n):
+        jumps = np.sort(rng.choice(STEPS, size=rng.integers(0, 5), replace=False))
+        for k, j in enumerate(jumps):
+            prune = k == len(jumps) - 1 and rng.random() < 0.5
+            rows.append(r)
+            steps.append(j)
+            kinds.append(PRUNING if prune else DEPHASING)
+            probs.append(float(rng.integers(0, 2)) if prune else rng.random())
+            outcome[r] = 1 - probs[-1] if prune else 0
+        if len(jumps):
+            snap[r] = jumps[0]
+    order = rng.permutation(len(rows))   # from_events sorts the columns itself
+    take = lambda a: np.asarray(a)[order]
+    return EventLog.from_events(STEPS, rng.random(n), take(rows), take(steps), take(kinds),
+                                np.zeros(len(rows)), take(probs), snap, outcome)
+
+def dense_prob_L(log):
+    """Step-by-step replay: the jump at step j is seen from step j + 1 on"""
+    out = np.empty((len(log), log.steps))
+    for r in range(len(log)):
+        step, _, _, prob = log.events(r)
+        p, e = log.prob_L0[r], 0
+        for i in range(log.steps):
+            out[r, i] = p
+            while e < len(step) and step[e] == i:
+                p = prob[e]
+                e += 1
+    return out
+
+def test_reconstruction_equals_dense_replay():
+    log = random_log(40, seed=0)
+    dense = dense_prob_L(log)
+    np.testing.assert_array_equal(log.prob_L_window(), dense)
+    rows = np.array([3, 0, 17, 39])
+    np.testing.assert_array_equal(log.prob_L_window(rows, 10, 45), dense[rows, 10:45])
+
+    pos_L, pos_R = -1.0 - np.arange(STEPS), 1.0 + np.arange(STEPS)
+    np.testing.assert_allclose(log.trajectory_x(pos_L, pos_R, rows, 5, 30),
+                               pos_L[5:30] * dense[rows, 5:30] + pos_R[5:30] * (1 - dense[rows, 5:30]))
+
+def test_no_events():
+    log = EventLog.from_events(STEPS, [0.5, 0.25], [], [], [], [], [], [STEPS - 1] * 2, [0, 0])
+    np.testing.assert_array_equal(log.prob_L_window(), dense_prob_L(log))
+
+def test_concatenate_and_save_round_trip(tmp_path):
+    a, b = random_log(10, seed=1), random_log(7, seed=2)
+    both = EventLog.concatenate([a, b])
+    np.testing.assert_array_equal(both.prob_L_window(), np.vstack([dense_prob_L(a), dense_prob_L(b)]))
+    both.save(tmp_path / 'log.npz')
+    back = EventLog.load(tmp_path / 'log.npz')
+    for name in EventLog.__slots__:
+        np.testing.assert_array_equal(getattr(back, name), getattr(both, name), err_msg=name)
+
+@pytest.fixture
+def ensemble_script():
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'double_slit_trajectory.1.py')
+    spec = importlib.util.spec_from_file_location('double_slit_trajectory_1', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def test_waiting_time_log_matches_dense_trajectories(ensemble_script):
+    m = ensemble_script
+    # dephasing keeps C = 1, so sit the threshold there: both jump kinds occur
+    m.C_th, m.kappa, m.Gamma_0 = 1.0, 3.0, 1e10
+    log = m.run_event_log(200, np.random.default_rng(3))
+    pos_L, pos_R = -m.sep0/2 - m.v_drift * m.times, m.sep0/2 + m.v_drift * m.times
+    x = log.trajectory_x(pos_L, pos_R)
+    np.testing.assert_allclose(log.prob_L_window(), dense_prob_L(log))
+
+    # pruned rows end on their branch; until the first jump <x> sits midway
+    pruned = np.array([PRUNING in log.events(r)[1] for r in range(len(log))])
+    assert pruned.any() and (log.kind == DEPHASING).any()
+    final = np.where(log.outcome[pruned] == 0, pos_L[-1], pos_R[-1])
+    np.testing.assert_allclose(x[pruned, -1], final, rtol=1e-12)
+    for r in np.flatnonzero(pruned)[:20]:
+        np.testing.assert_allclose(x[r, :log.snap[r] + 1], 0.0, atol=1e-9)
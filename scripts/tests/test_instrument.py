@@ -0,0 +1,47 @@
+# dtc.instrument: per-worker recorders merged by dtc_parallel.run_sharded see every
+# shard, whatever the pool size, and merging adds phases and counters up.
+
+import pytest
+from dtc import instrument, mcwf
+from dtc_parallel import run_sharded
+
+WORKLOAD = dict(steps=200, Gamma_0=4e7, kappa=10.0, backend='numpy')
+
+def shard(n, rng, params):
+    """Module-level (picklable) shard: n waiting-time trajectories, pruning outcomes only"""
+    mcwf.configure(**params)
+    return [mcwf.waiting_time_trajectory(rng=rng)[1] for _ in range(n)]
+
+def profiled(workers):
+    rec = instrument.Recorder()
+    outcomes = sum(run_sharded(shard, 60, 15, seed=3, workers=workers, args=(WORKLOAD,), recorder=rec), [])
+    rec.stop()
+    return rec, outcomes
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_every_shard_is_recorded(mcwf_params, workers):
+    rec, outcomes = profiled(workers)
+    pruned = sum(outcome != 'no_collapse' for outcome in outcomes)
+    assert rec.counters['pruning_jump'] == pruned > 0
+    assert rec.counters['no_jump_step'] > 0
+    assert rec.merged_seconds > 0 and rec.report()['busy_seconds'] == rec.merged_seconds
+
+def test_counts_do_not_depend_on_workers(mcwf_params):
+    serial, pooled = profiled(1)[0], profiled(2)[0]
+    assert serial.counters == pooled.counters
+    assert serial.calls == pooled.calls
+
+def test_no_recorder_no_recording(mcwf_params):
+    assert instrument.current is None
+    run_sharded(shard, 4, 2, seed=1, workers=1, args=(WORKLOAD,))
+    assert instrument.current is None
+
+def test_merge_adds_up():
+    a, b = instrument.Recorder(), instrument.Recorder()
+    a.times, a.calls, a.counters = {'x': 1.0}, {'x': 2}, {'jump': 3}
+    b.times, b.calls, b.counters = {'x': 0.5, 'y': 1.0}, {'x': 1, 'y': 4}, {'jump': 1, 'prune': 2}
+    a.stop(), b.stop()
+    total = instrument.Recorder().merge(a).merge(b)
+    assert total.times == {'x': 1.5, 'y': 1.0} and total.calls == {'x': 3, 'y': 4}
+    assert total.counters == {'jump': 4, 'prune': 2}
+    assert total.busy() == pytest.approx(a.wall() + b.wall())
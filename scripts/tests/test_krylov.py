@@ -0,0 +1,62 @@
+# dtc.spatial: the matrix-free GridLiouvillian and expm_krylov against the dense
+# N^2 x N^2 Lindblad generator and scipy.linalg.expm on a grid small enough to
+# form it, and KrylovDensityEngine's rho, purity and trace against the same.
+
+import numpy as np
+import pytest
+from scipy.linalg import expm
+from dtc.physics import cat_states
+from dtc.spatial import GridLiouvillian, KrylovDensityEngine, expm_krylov, hbar
+
+x = np.linspace(-400e-9, 400e-9, 24)
+dx = x[1] - x[0]
+mass, kernels = 1e-24, [(1e5, 100e-9)]
+V = hbar * 1e5 * (x / 400e-9)**2
+psi_L, psi_R = cat_states(x, 100e-9, 80e-9)
+PSI = (psi_L + psi_R) / np.sqrt(np.sum(np.abs(psi_L + psi_R)**2) * dx)
+
+def dense_liouvillian():
+    """-i/hbar [H, .] - Gamma(x, x') . on vec(rho) = rho.reshape(-1), H = T + V (Dirichlet)"""
+    N = len(x)
+    T = hbar**2 / (2 * mass * dx**2) * (2 * np.eye(N) - np.eye(N, k=1) - np.eye(N, k=-1))
+    H, I = T + np.diag(V), np.eye(N)
+    Gamma = sum(rate * -np.expm1(-(x[:, None] - x[None, :])**2 / (4 * length**2)) for rate, length in kernels)
+    return -1j / hbar * (np.kron(H, I) - np.kron(I, H.T)) - np.diag(Gamma.reshape(-1))
+
+L_DENSE = dense_liouvillian()
+
+def rho0():
+    return np.outer(PSI, PSI.conj()) * dx
+
+def test_action_matches_dense_generator():
+    rng = np.random.default_rng(0)
+    rho = rng.normal(size=(len(x),) * 2) + 1j * rng.normal(size=(len(x),) * 2)
+    action = GridLiouvillian(x, mass, kernels, V)
+    np.testing.assert_allclose(action(rho, out=np.empty_like(rho)), (L_DENSE @ rho.reshape(-1)).reshape(rho.shape),
+                               rtol=0, atol=1e-12 * np.abs(L_DENSE).max() * np.abs(rho).max())
+
+@pytest.mark.parametrize('m', [30, 8])   # m = 8 forces adaptive substeps
+def test_expm_krylov_matches_scipy_expm(m):
+    t = 1e-4
+    assert np.abs(L_DENSE).sum(axis=1).max() * t > 10   # far from a single Taylor step
+    rho, norms = expm_krylov(GridLiouvillian(x, mass, kernels, V), rho0(), t, m=m, tol=1e-10)
+    exact = (expm(L_DENSE * t) @ rho0().reshape(-1)).reshape(rho.shape)
+    np.testing.assert_allclose(rho, exact, rtol=0, atol=1e-8)
+    assert abs(norms[0]**2 - 1.0) < 1e-12   # pure start: Tr rho^2 = 1
+    if m == 8:
+        assert len(norms) > 1
+
+def test_engine_tracks_dense_propagation():
+    times = np.linspace(0.0, 1e-4, 7)
+    engine = KrylovDensityEngine(x, mass, kernels, V)
+    rho, purity, C_track = engine.run(PSI, times)
+    U = expm(L_DENSE * (times[1] - times[0]))
+    vecs = [rho0().reshape(-1)]
+    for _ in times[1:]:
+        vecs.append(U @ vecs[-1])
+    exact = [np.vdot(v, v).real for v in vecs]
+    np.testing.assert_allclose(rho, vecs[-1].reshape(rho.shape), rtol=0, atol=1e-8)
+    np.testing.assert_allclose(purity, exact, rtol=0, atol=1e-8)
+    np.testing.assert_allclose(C_track, np.sqrt(np.clip(1 - np.array(exact), 0, None)), atol=1e-4)
+    assert purity[-1] < 0.9 * purity[0]   # the kernel decoheres within the window
+    assert abs(np.trace(rho) - 1) < 1e-10
@@ -0,0 +1,38 @@
+# dtc.spatial.LowRankDensityEngine: the factored rho = X S X^dagger tracks the full
+# N x N GridDensityEngine on a grid small enough for both, including the snap.
+
+import numpy as np
+import pytest
+from dtc.physics import cat_states
+from dtc.spatial import GridDensityEngine, LowRankDensityEngine, kernel_factors
+
+x = np.linspace(-400e-9, 400e-9, 128)
+psi_L, psi_R = cat_states(x, 100e-9, 5e-9)
+dt, mass, kernels = 5e-6, 1e-18, [(1e5, 10e-9)]
+
+def test_kernel_factors_reproduce_kernel():
+    U = kernel_factors(x, dt, kernels)
+    Gamma = kernels[0][0] * -np.expm1(-(x[:, None] - x[None, :])**2 / (4 * kernels[0][1]**2))
+    np.testing.assert_allclose(U.T @ U, np.exp(-Gamma * dt), atol=1e-10)
+
+def test_coherence_tracks_grid_engine():
+    steps, C_th = 30, 1e-5
+    C_grid, snap_grid, blocks, names = GridDensityEngine(x, dt, mass, kernels).run(psi_L, psi_R, steps, C_th)
+    engine = LowRankDensityEngine(x, dt, mass, kernels)
+    C_low, snap_low, X, S, ranks = engine.run(psi_L, psi_R, steps, C_th)
+    assert snap_low == snap_grid is not None
+    np.testing.assert_allclose(C_low, C_grid, rtol=1e-6, atol=0)
+    dx = x[1] - x[0]
+    populations = [np.trace(blocks[names.index(name)]).real * dx for name in ('LL', 'RR')]
+    np.testing.assert_allclose(engine.populations(S), populations, rtol=1e-8)
+    assert ranks.max() <= 32
+
+def test_runs_are_reproducible():
+    engine = LowRankDensityEngine(x, dt, mass, kernels)
+    np.testing.assert_array_equal(engine.run(psi_L, psi_R, 5)[0], engine.run(psi_L, psi_R, 5)[0])
+
+def test_binding_max_rank_warns():
+    engine = LowRankDensityEngine(x, dt, mass, kernels, max_rank=2)
+    with pytest.warns(RuntimeWarning, match='max_rank=2 binds'):
+        _, _, _, _, ranks = engine.run(psi_L, psi_R, 10)
+    assert ranks.max() == 2 and engine.truncated > 0
@@ -0,0 +1,46 @@
+# QuTiP vs NumPy MCWF backends: exact agreement on shared random numbers, and
+# statistical agreement of the pruning fraction and the mean coherence curve on
+# independent streams.
+
+import numpy as np
+import pytest
+
+pytest.importorskip('qutip')
+
+# Non-degenerate workload: about half the trajectories prune within the window
+WORKLOAD = dict(steps=200, Gamma_0=4e7, kappa=10.0)
+N_TRAJ = 200
+Z = 5.0   # two-sample tolerance in standard errors
+
+def ensemble(mcwf, backend, seed):
+    """(pruned flags, per-trajectory coherence curves) for N_TRAJ grid trajectories"""
+    ops = mcwf.make_backend(backend)
+    rng = np.random.default_rng(seed)
+    runs = [mcwf.single_trajectory(ops, rng) for _ in range(N_TRAJ)]
+    pruned = np.array([outcome != 'no_collapse' for _, outcome, _ in runs])
+    # pure dephasing keeps <x> = 0 and C = 1/2 until the pruning jump, after which
+    # the pointer sits at |x| >= 2 and C = 0
+    coherence = 0.5 * (np.abs(np.array([x for x, _, _ in runs])) < 1.0)
+    return pruned, coherence
+
+def two_sample_bound(p_a, p_b):
+    p = 0.5 * (p_a + p_b)
+    return Z * np.sqrt(p * (1 - p) * 2 / N_TRAJ) + 1e-12
+
+def test_same_seed_trajectories_agree(mcwf_params):
+    mcwf_params.configure(**WORKLOAD)
+    mcwf_params.cross_check_backends(n_check=3)
+
+def test_pruning_fraction_and_mean_coherence_agree(mcwf_params):
+    mcwf_params.configure(**WORKLOAD)
+    pruned_np, coh_np = ensemble(mcwf_params, 'numpy', seed=1)
+    pruned_qt, coh_qt = ensemble(mcwf_params, 'qutip', seed=2)
+
+    f_np, f_qt = pruned_np.mean(), pruned_qt.mean()
+    assert 0.1 < f_np < 0.9, f"degenerate workload (pruning fraction {f_np})"
+    assert abs(f_np - f_qt) <= two_sample_bound(f_np, f_qt)
+
+    # mean coherence = C/2 * P(not yet pruned), compared point by point in t
+    mean_np, mean_qt = coh_np.mean(axis=0), coh_qt.mean(axis=0)
+    bound = 0.5 * two_sample_bound(2 * mean_np, 2 * mean_qt)
+    assert np.all(np.abs(mean_np - mean_qt) <= bound)
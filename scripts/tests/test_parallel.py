@@ -0,0 +1,71 @@
+# dtc_parallel: the shard layout and RNG streams depend only on (num_traj,
+# shard_size, seed), so the merged ensemble is bit-identical for any pool size; with
+# reduce= the shards are folded in as they arrive, in constant memory.
+
+import tracemalloc
+import numpy as np
+import pytest
+from dtc import mcwf
+from dtc_parallel import run_sharded, seed_sequence, shard_sizes
+from dtc_stream import EnsembleStats
+
+WORKLOAD = dict(steps=200, Gamma_0=4e7, kappa=10.0, backend='numpy')
+
+def shard(n, rng, params):
+    """Module-level (picklable) shard: n NumPy-backend trajectories reduced to EnsembleStats"""
+    mcwf.configure(**params)
+    labels = mcwf.outcome_labels()
+    trajs, codes, snaps = np.empty((n, params['steps'])), np.empty(n, dtype=int), np.empty(n, dtype=int)
+    for k in range(n):
+        trajs[k], outcome, snaps[k] = mcwf.single_trajectory(rng=rng)
+        codes[k] = labels.index(outcome)
+    return EnsembleStats(params['steps'], labels, 4).update(trajs, codes, snaps, rng)
+
+def test_shard_sizes():
+    assert shard_sizes(10, 4) == [4, 4, 2]
+    assert shard_sizes(8, 4) == [4, 4]
+    assert shard_sizes(3, 4) == [3]
+
+def test_seed_sequence_passthrough():
+    ss = np.random.SeedSequence(7)
+    assert seed_sequence(ss) is ss
+    assert seed_sequence(7).entropy == 7
+
+@pytest.mark.parametrize('workers', [2, 3])
+def test_bit_identical_across_worker_counts(mcwf_params, workers):
+    serial = EnsembleStats.merged(run_sharded(shard, 90, 20, seed=42, workers=1, args=(WORKLOAD,)))
+    pooled = EnsembleStats.merged(run_sharded(shard, 90, 20, seed=42, workers=workers, args=(WORKLOAD,)))
+    assert serial.count == pooled.count == 90
+    assert 0 < serial.outcome_counts[:2].sum() < 90   # some, not all, trajectories prune
+    for name, value in serial.to_arrays().items():
+        np.testing.assert_array_equal(pooled.to_arrays()[name], value, err_msg=name)
+
+def test_seed_changes_the_ensemble(mcwf_params):
+    a = EnsembleStats.merged(run_sharded(shard, 40, 20, seed=1, workers=1, args=(WORKLOAD,)))
+    b = EnsembleStats.merged(run_sharded(shard, 40, 20, seed=2, workers=1, args=(WORKLOAD,)))
+    assert not np.array_equal(a.mean, b.mean)
+
+def stats_shard(n, rng, steps):
+    """Module-level shard with a large reservoir (steps floats per kept trajectory)"""
+    trajs = rng.random((n, steps))
+    return EnsembleStats(steps, ('L', 'R'), 16).update(trajs, rng.integers(0, 2, n), np.zeros(n, dtype=int), rng)
+
+def fold(acc, stats):
+    return stats if acc is None else acc.merge(stats)
+
+def test_reduce_matches_merging_the_list(mcwf_params):
+    listed = EnsembleStats.merged(run_sharded(shard, 90, 20, seed=42, workers=1, args=(WORKLOAD,)))
+    folded = run_sharded(shard, 90, 20, seed=42, workers=2, args=(WORKLOAD,), reduce=fold)
+    for name, value in listed.to_arrays().items():
+        np.testing.assert_array_equal(folded.to_arrays()[name], value, err_msg=name)
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_reduce_memory_does_not_grow_with_shards(workers):
+    def peak(num_shards):
+        tracemalloc.start()
+        run_sharded(stats_shard, 16 * num_shards, 16, seed=0, workers=workers, args=(2000,), reduce=fold)
+        result = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return result
+    few, many = peak(8), peak(48)
+    assert many < 1.5 * few   # the list of 48 reservoirs alone would be ~6x the 8-shard peak
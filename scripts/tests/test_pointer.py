@@ -0,0 +1,62 @@
+# dtc.pointer.PointerBasis: the sparse branch-label forms against the explicit
+# projector stack P_n = sum_{i in n} |i><i|, for rank-one and multi-state branches
+# (unsorted labels) and batched density matrices.
+
+import numpy as np
+import pytest
+from dtc.physics import lindblad_dissipator
+from dtc.pointer import PointerBasis, born_sample
+
+BASES = {
+    'rank_one': PointerBasis.slits(5),
+    'multi_state': PointerBasis([2, 0, 1, 0, 2, 2, 1]),
+}
+
+def projectors(basis):
+    return [np.diag((basis.branch_of == n).astype(complex)) for n in range(basis.n)]
+
+def random_rho(d, batch=(), seed=0):
+    rng = np.random.default_rng(seed)
+    A = rng.normal(size=batch + (d, d)) + 1j * rng.normal(size=batch + (d, d))
+    rho = A @ np.swapaxes(A.conj(), -1, -2)
+    return rho / np.trace(rho, axis1=-2, axis2=-1)[..., None, None]
+
+def random_psi(d, seed=0):
+    rng = np.random.default_rng(seed)
+    psi = rng.normal(size=d) + 1j * rng.normal(size=d)
+    return psi / np.linalg.norm(psi)
+
+@pytest.mark.parametrize('name', list(BASES))
+def test_density_forms_match_projectors(name):
+    basis = BASES[name]
+    assert basis.rank_one == (name == 'rank_one')
+    P = projectors(basis)
+    rho = random_rho(basis.d, batch=(3,))
+    projected = sum(P_n @ rho @ P_n for P_n in P)
+    np.testing.assert_allclose(basis.project(rho), projected, atol=1e-15)
+    np.testing.assert_allclose(basis.dissipator(rho[0]), sum(lindblad_dissipator(P_n, rho[0]) for P_n in P),
+                               atol=1e-15)
+    np.testing.assert_allclose(basis.populations(rho),
+                               np.stack([np.trace(P_n @ rho, axis1=-2, axis2=-1).real for P_n in P], axis=-1),
+                               atol=1e-15)
+    np.testing.assert_allclose(basis.coherence(rho), np.abs(rho - projected).sum(axis=(-2, -1)), atol=1e-14)
+    assert np.all(basis.coherence(basis.project(rho)) < 1e-15)
+
+@pytest.mark.parametrize('name', list(BASES))
+def test_pure_state_forms_match_density_forms(name):
+    basis = BASES[name]
+    psi = random_psi(basis.d)
+    rho = np.outer(psi, psi.conj())
+    np.testing.assert_allclose(basis.state_populations(psi), basis.populations(rho), atol=1e-15)
+    assert abs(basis.state_coherence(psi) - basis.coherence(rho)) < 1e-14
+    for n, P_n in enumerate(projectors(basis)):
+        branch = P_n @ psi / np.linalg.norm(P_n @ psi)
+        out = basis.project_state(psi.copy(), n)
+        assert abs(abs(np.vdot(branch, out)) - 1) < 1e-14   # P_n psi / |P_n psi| up to a phase
+        assert abs(np.linalg.norm(out) - 1) < 1e-14
+
+def test_born_sample_follows_populations():
+    pops = np.array([0.2, 0.0, 0.5, 0.3]) * 7.0   # unnormalised
+    u = (np.arange(10000) + 0.5) / 10000
+    counts = np.bincount([born_sample(pops, v) for v in u], minlength=len(pops))
+    np.testing.assert_allclose(counts / len(u), pops / pops.sum(), atol=1e-4)
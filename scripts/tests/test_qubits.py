@@ -0,0 +1,82 @@
+# dtc.qubits: the tensor-structured generator (local 2x2 factors on one qubit axis)
+# against the full 2^n x 2^n Liouvillian built from Kronecker products by
+# dtc.density.liouvillian, for the diagonal fast path and the generic path, local and
+# global trigger scope, and RK4 evolve_density against expm of the dense generator.
+
+import numpy as np
+import pytest
+from scipy.linalg import expm
+from dtc.density import liouvillian
+from dtc.physics import sig_z, P_L, P_R
+from dtc.qubits import QubitModel, evolve_density, density
+
+N = 3
+sig_x = np.array([[0, 1], [1, 0]], dtype=complex)
+H_TILTED = sig_z + 0.7 * sig_x
+P_TILTED = np.linalg.eigh(H_TILTED)[1]
+P_TILTED = [np.outer(v, v.conj()) for v in P_TILTED.T]   # non-diagonal pointer basis
+
+def on_qubit(op, k, n=N):
+    """op on qubit k of n (qubit 0 most significant) as a 2^n x 2^n matrix"""
+    return np.kron(np.kron(np.eye(2**k), op), np.eye(2**(n - k - 1)))
+
+def dense_generator(model, G):
+    """The model's generator at fixed per-site rates G, built from Kronecker products"""
+    n = model.n
+    H = sum(on_qubit(model.H, k, n) for k in range(n))
+    ops = [on_qubit(model.L, k, n) for k in range(n)]
+    rates = [model.gamma] * n
+    if model.scope == 'local':
+        for k in range(n):
+            ops += [on_qubit(P, k, n) for P in model.projectors]
+            rates += [G[k]] * len(model.projectors)
+        return liouvillian(H, ops, rates)
+    basis = [np.diag(row) for row in np.eye(2**n, dtype=complex)]
+    return liouvillian(H, ops, rates, projectors=basis, Gamma_trig=G[0])
+
+def random_rho(n=N, seed=0):
+    rng = np.random.default_rng(seed)
+    psi = rng.normal(size=2**n) + 1j * rng.normal(size=2**n)
+    return density(psi / np.linalg.norm(psi))
+
+MODELS = {
+    'diagonal': dict(),
+    'tilted': dict(H=H_TILTED, projectors=P_TILTED),
+    'transverse_jump': dict(L=sig_x),
+}
+
+@pytest.mark.parametrize('scope', ['local', 'global'])
+@pytest.mark.parametrize('name', list(MODELS))
+def test_rhs_matches_kron_liouvillian(name, scope):
+    model = QubitModel(N, Gamma_0=2.0, C_th=0.5, kappa=10.0, scope=scope, **MODELS[name])
+    rho = random_rho()
+    G = model.rates(model.coherences(rho))
+    assert np.all(G > 0)
+    expected = (dense_generator(model, G) @ rho.reshape(-1)).reshape(rho.shape)
+    np.testing.assert_allclose(model.rhs(0.0, rho), expected, atol=1e-12)
+
+@pytest.mark.parametrize('name', list(MODELS))
+def test_coherences_match_partial_trace(name):
+    model = QubitModel(N, **MODELS[name])
+    rho = random_rho(seed=1)
+    for k in range(N):
+        # <a|rho_k|b> = sum over the other qubits' bits, read off the basis index
+        bit = lambda x: (x >> (N - 1 - k)) & 1
+        red = np.zeros((2, 2), dtype=complex)
+        for x in range(2**N):
+            for y in range(2**N):
+                if x ^ y in (0, 1 << (N - 1 - k)):
+                    red[bit(x), bit(y)] += rho[x, y]
+        np.testing.assert_allclose(model.reduced(rho, k), red, atol=1e-14)
+        assert abs(model.coherences(rho)[k] - 2 * abs(red[0, 1])) < 1e-14
+
+@pytest.mark.parametrize('name', list(MODELS))
+def test_evolve_density_matches_expm(name):
+    # Gamma_0 = 0: a fixed generator, so RK4 is compared with the exact propagator
+    model = QubitModel(N, **MODELS[name])
+    rho0, dt, steps = random_rho(seed=2), 0.005, 600
+    rho, snap_index, _ = evolve_density(model, rho0, dt, steps, snap=False)
+    U = expm(dense_generator(model, np.zeros(N)) * dt * steps)
+    np.testing.assert_allclose(rho, (U @ rho0.reshape(-1)).reshape(rho0.shape), atol=1e-9)
+    assert np.all(snap_index == -1)
+    assert abs(np.trace(rho) - 1) < 1e-12
@@ -0,0 +1,97 @@
+# Faster engines against the reference loops they replace: waiting-time samplers vs
+# per-step samplers, and the vectorised ensemble engine of double_slit_trajectory.1.py
+# vs its scalar run_trajectories loop. Seeded ensembles give matching snap-index and
+# outcome distributions (and mean trajectories), also where the per-step jump
+# probability is far from small (the logistic transition region).
+
+import importlib.util
+import os
+import numpy as np
+
+Z = 5.0   # two-sample tolerance in standard errors
+
+def assert_same_mean(a, b, z=Z):
+    a, b = np.asarray(a, dtype=float), np.asarray(b, dtype=float)
+    se = np.sqrt(a.var(ddof=1) / len(a) + b.var(ddof=1) / len(b)) + 1e-12
+    assert abs(a.mean() - b.mean()) < z * se, (a.mean(), b.mean(), se)
+
+def assert_same_fraction(a, b, z=Z):
+    a, b = np.asarray(a, dtype=bool), np.asarray(b, dtype=bool)
+    p = 0.5 * (a.mean() + b.mean())
+    bound = z * np.sqrt(p * (1 - p) * (1 / len(a) + 1 / len(b))) + 1e-12
+    assert abs(a.mean() - b.mean()) < bound, (a.mean(), b.mean(), bound)
+
+# --- dtc.mcwf: single_trajectory ('grid') vs waiting_time_trajectory ---
+# Coherence starts at C_th, so the trigger rate is Gamma_0 / 2 until the pruning jump:
+# p_prune ~ 0.5 and p_decoh ~ 0.1 per step (the exponential waiting time this
+# replaced jumped with 1 - exp(-0.6) = 0.45 instead of 0.6 per step).
+MCWF_WORKLOAD = dict(steps=50, Gamma_0=1e9, kappa=10.0, backend='numpy')
+
+def mcwf_ensemble(sampler, n, seed):
+    """(pruning step, returned snap index, outcome) per trajectory"""
+    rng = np.random.default_rng(seed)
+    runs = [sampler(rng=rng) for _ in range(n)]
+    # <x> = 0 until the pruning jump puts the pointer at |x| >= 2
+    prune = np.array([np.argmax(np.abs(x) > 1) for x, _, _ in runs])
+    return prune, np.array([snap for _, _, snap in runs]), np.array([outcome for _, outcome, _ in runs])
+
+def test_mcwf_samplers_agree(mcwf_params):
+    mcwf_params.configure(**MCWF_WORKLOAD)
+    prune_g, snap_g, out_g = mcwf_ensemble(mcwf_params.single_trajectory, 1000, seed=1)
+    prune_w, snap_w, out_w = mcwf_ensemble(mcwf_params.waiting_time_trajectory, 1000, seed=2)
+    assert_same_mean(prune_g, prune_w)
+    assert_same_fraction(prune_g == 0, prune_w == 0)
+    assert_same_mean(snap_g, snap_w)
+    assert_same_fraction(out_g == 'L', out_w == 'L')
+    assert_same_fraction(out_g == 'no_collapse', out_w == 'no_collapse')
+
+# --- double_slit_trajectory.1.py: batch engines ---
+def load_double_slit(**params):
+    """Fresh copy of the script module with a short grid and the given overrides"""
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        'double_slit_trajectory.1.py')
+    spec = importlib.util.spec_from_file_location('double_slit_trajectory_1', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    for name, value in params.items():
+        setattr(module, name, value)
+    module.times = np.linspace(0, module.t_max, module.steps)
+    module.dt = module.times[1] - module.times[0]
+    return module
+
+# C = 1 stays at C_th (dephasing only rotates the phase), so the trigger runs at
+# Gamma_0 / 2: p_prune = 0.5 per step, p_decoh = gamma dt ~ 0.02.
+DOUBLE_SLIT = dict(steps=100, C_th=1.0, kappa=3.0, Gamma_0=2 / (6e-9 / 99))
+
+def engine_ensemble(module, name, n, seed):
+    trajs, outcomes, snaps = module.ENGINES[name](n, np.random.default_rng(seed))
+    return trajs, outcomes, snaps
+
+def test_waiting_time_engine_matches_ensemble_engine():
+    module = load_double_slit(**DOUBLE_SLIT)
+    _, out_e, snap_e = engine_ensemble(module, 'ensemble', 2000, seed=1)
+    _, out_w, snap_w = engine_ensemble(module, 'waiting_time', 2000, seed=2)
+    assert_same_mean(snap_e, snap_w)
+    assert_same_fraction(snap_e == 0, snap_w == 0)
+    assert_same_fraction(out_e == 0, out_w == 0)
+
+def final_prob_L(module, trajs):
+    """Left weight at the last step, from <x> = pos_L p_L + pos_R (1 - p_L)"""
+    pos_L = -module.sep0 / 2 - module.v_drift * module.times[-1]
+    pos_R = module.sep0 / 2 + module.v_drift * module.times[-1]
+    return (pos_R - trajs[:, -1]) / (pos_R - pos_L)
+
+def test_ensemble_engine_matches_scalar_loop():
+    # p_prune ~ 0.02 per step: most, not all, trajectories prune within the grid
+    module = load_double_slit(**dict(DOUBLE_SLIT, Gamma_0=0.04 / (6e-9 / 99)))
+    trajs_s, out_s, snap_s = engine_ensemble(module, 'scalar', 1000, seed=1)
+    trajs_e, out_e, snap_e = engine_ensemble(module, 'ensemble', 2000, seed=2)
+    p_s, p_e = final_prob_L(module, trajs_s), final_prob_L(module, trajs_e)
+    pruned_s, pruned_e = np.isclose(p_s, 0) | np.isclose(p_s, 1), np.isclose(p_e, 0) | np.isclose(p_e, 1)
+    assert 0.2 < pruned_e.mean() < 0.95, f"degenerate workload (pruned fraction {pruned_e.mean()})"
+    assert_same_fraction(pruned_s, pruned_e)
+    assert_same_fraction(pruned_s & (out_s == 0), pruned_e & (out_e == 0))   # L
+    assert_same_fraction(pruned_s & (out_s == 1), pruned_e & (out_e == 1))   # R
+    assert_same_mean(snap_s, snap_e)
+    se = np.sqrt(trajs_s.var(axis=0, ddof=1) / len(trajs_s) + trajs_e.var(axis=0, ddof=1) / len(trajs_e))
+    assert np.all(np.abs(trajs_s.mean(axis=0) - trajs_e.mean(axis=0)) < Z * se + 1e-9)
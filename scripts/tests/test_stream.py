@@ -0,0 +1,51 @@
+# dtc_stream.EnsembleStats: folding shards and merging them equals one pass over
+# all trajectories, and the stored arrays round-trip.
+
+import numpy as np
+from dtc_stream import EnsembleStats
+
+STEPS, LABELS = 50, ('L', 'R', 'no_collapse')
+
+def batch(n, seed):
+    rng = np.random.default_rng(seed)
+    trajs = np.cumsum(rng.normal(size=(n, STEPS)), axis=1)
+    return trajs, rng.integers(0, len(LABELS), n), rng.integers(0, STEPS, n)
+
+def test_shard_merge_equals_single_pass():
+    trajs, outcomes, snaps = batch(300, seed=0)
+    single = EnsembleStats(STEPS, LABELS, reservoir=8).update(trajs, outcomes, snaps, np.random.default_rng(5))
+
+    # same reservoir keys: the shards draw consecutive blocks of one key stream
+    keys = np.random.default_rng(5)
+    cuts = [0, 70, 71, 200, 300]
+    parts = [EnsembleStats(STEPS, LABELS, reservoir=8).update(trajs[a:b], outcomes[a:b], snaps[a:b], keys)
+             for a, b in zip(cuts[:-1], cuts[1:])]
+    merged = EnsembleStats.merged(parts)
+
+    assert merged.count == single.count == 300
+    np.testing.assert_allclose(merged.mean, trajs.mean(axis=0), rtol=1e-12, atol=1e-12)
+    np.testing.assert_allclose(merged.mean, single.mean, rtol=1e-12, atol=1e-12)
+    np.testing.assert_allclose(merged.var(), trajs.var(axis=0, ddof=1), rtol=1e-10)
+    np.testing.assert_allclose(merged.var(), single.var(), rtol=1e-10)
+    np.testing.assert_array_equal(merged.outcome_counts, single.outcome_counts)
+    np.testing.assert_array_equal(merged.snap_hist, single.snap_hist)
+    for name in ('keys', 'samples', 'sample_outcomes', 'sample_snaps'):
+        np.testing.assert_array_equal(getattr(merged, name), getattr(single, name), err_msg=name)
+
+def test_merge_with_empty_and_empty_update():
+    trajs, outcomes, snaps = batch(20, seed=1)
+    stats = EnsembleStats(STEPS, LABELS).update(trajs, outcomes, snaps, np.random.default_rng(0))
+    mean = stats.mean.copy()
+    stats.merge(EnsembleStats(STEPS, LABELS)).update(np.empty((0, STEPS)), [], [])
+    assert stats.count == 20
+    np.testing.assert_array_equal(stats.mean, mean)
+
+def test_arrays_round_trip():
+    trajs, outcomes, snaps = batch(40, seed=2)
+    stats = EnsembleStats(STEPS, LABELS, reservoir=4).update(trajs, outcomes, snaps, np.random.default_rng(0))
+    back = EnsembleStats.from_arrays(stats.to_arrays())
+    assert back.labels == list(LABELS) and back.k == 4 and back.count == 40
+    for name in EnsembleStats.FIELDS:
+        np.testing.assert_array_equal(getattr(back, name), getattr(stats, name), err_msg=name)
+    assert back.counts() == stats.counts()
+    assert back.snap_quantile(0.5) == stats.snap_quantile(0.5)
@@ -0,0 +1,78 @@
+# dtc_sweep: keys cover everything a result depends on, and a resumed sweep skips
+# stored points and ends with the same numbers as an uninterrupted one.
+
+import os
+import glob
+import numpy as np
+import dtc_sweep
+from dtc_sweep import ResultStore, grid, point_key, resolve, run_sweep, trajectory_point, density_matrix_point
+
+POINTS = grid(Gamma_0=[1e9, 1e11], C_th=[0.4, 0.6], num_traj=[20])
+
+def results(store):
+    return {key: record['result'] for key, record in store.records.items()}
+
+def test_point_key_covers_params_model_seed_and_code():
+    point = dict(Gamma_0=1e11, C_th=0.4)
+    key = point_key(point, 'trajectory_point', 1, 'v1')
+    assert key == point_key({**point, 'kappa': dtc_sweep.DEFAULTS['kappa']}, 'trajectory_point', 1, 'v1')
+    assert key != point_key({**point, 'kappa': 10.0}, 'trajectory_point', 1, 'v1')
+    assert key != point_key(point, 'density_matrix_point', 1, 'v1')
+    assert key != point_key(point, 'trajectory_point', 2, 'v1')
+    assert key != point_key(point, 'trajectory_point', 1, 'v2')
+
+def test_resume_skips_completed_points(tmp_path):
+    first = ResultStore(str(tmp_path / 'resumed'))
+    assert run_sweep(trajectory_point, POINTS[:3], first, seed=7, workers=1, progress=None) == 3
+
+    # reopen from disk, as a rerun after an interruption would
+    resumed = ResultStore(str(tmp_path / 'resumed'))
+    assert len(resumed) == 3
+    assert run_sweep(trajectory_point, POINTS, resumed, seed=7, workers=2, progress=None) == 1
+    assert run_sweep(trajectory_point, POINTS, resumed, seed=7, workers=1, progress=None) == 0
+
+    straight = ResultStore(str(tmp_path / 'straight'))
+    run_sweep(trajectory_point, POINTS, straight, seed=7, workers=1, progress=None)
+    np.testing.assert_equal(results(ResultStore(str(tmp_path / 'resumed'))), results(straight))
+
+def test_new_seed_or_model_reruns(tmp_path):
+    store = ResultStore(str(tmp_path / 'store'))
+    run_sweep(trajectory_point, POINTS[:2], store, seed=1, workers=1, progress=None)
+    assert run_sweep(trajectory_point, POINTS[:2], store, seed=2, workers=1, progress=None) == 2
+    assert run_sweep(density_matrix_point, POINTS[:2], store, seed=1, workers=1, progress=None) == 2
+    table = store.table(model='density_matrix_point')
+    np.testing.assert_array_equal(table['Gamma_0'], [p['Gamma_0'] for p in POINTS[:2]])
+    assert set(table['kappa']) == {dtc_sweep.DEFAULTS['kappa']}   # resolved parameters are stored
+
+def test_torn_line_is_recomputed(tmp_path):
+    path = str(tmp_path / 'store')
+    run_sweep(trajectory_point, POINTS[:2], ResultStore(path), seed=3, workers=1, progress=None)
+    chunk, = glob.glob(os.path.join(path, 'chunk-*.jsonl'))
+    with open(chunk) as f:
+        lines = f.readlines()
+    with open(chunk, 'w') as f:
+        f.write(lines[0] + lines[1][:len(lines[1]) // 2])
+    store = ResultStore(path)
+    assert len(store) == 1
+    assert run_sweep(trajectory_point, POINTS[:2], store, seed=3, workers=1, progress=None) == 1
+    assert len(ResultStore(path)) == 2
+
+def test_density_matrix_point_snaps_at_crossing():
+    params = resolve(dict(Gamma_0=1e12, C_th=0.4, kappa=1000.0))
+    out = density_matrix_point(params)
+    # C(t) = exp(-2 gamma t) until the logistic trigger takes over just above C_th,
+    # which can only bring the crossing forward
+    t_deph = np.log(1 / 0.4) / (2 * params['gamma'])
+    assert 0.95 * t_deph < out['snap_time'] <= t_deph
+    assert np.isnan(density_matrix_point(resolve(dict(C_th=1e-6, t_max=1e-9)))['snap_time'])
+    assert out['collapse_fraction'] == 1.0 and out['p_L'] == 0.5
+
+def test_density_matrix_point_steps_at_most_dt(monkeypatch):
+    calls = []
+    trigger = dtc_sweep.gamma_trigger
+    monkeypatch.setattr(dtc_sweep, 'gamma_trigger', lambda *args: calls.append(1) or trigger(*args))
+    coarse = density_matrix_point(resolve(dict(dt=1e-9)))
+    calls.clear()
+    fine = density_matrix_point(resolve(dict(dt=1e-11)))
+    assert len(calls) >= 6 * fine['snap_time'] / 1e-11   # six stages per step of at most dt
+    assert abs(fine['snap_time'] - coarse['snap_time']) < 1e-6 * coarse['snap_time']